@@ -0,0 +1,287 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ShockerBackends import OpenShockLanBackend, MockBackend
+from BenchCommon import CYAN, RESET, bench_parser, report_header, check_line, write_report, finish, wait_until
+import threading
+import socket
+import logging
+import random
+import json
+import time
+
+
+# ~~~      STAND-IN HUB      ~~~
+# Local HTTP server that takes the LAN backend's posts like a hub would. latency_s delays every answer,
+# error_rate answers that share of posts with a 500 and drop_rate closes the connection without answering.
+class StandInHub:
+    def __init__(self, latency_s: float = 0.0, error_rate: float = 0.0, drop_rate: float = 0.0, port: int = 0, seed: int = 0):
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.commands = []
+        self.posts = 0
+        self.connections = 0
+        self.sockets = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.httpd = self._serve(port)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/rftransmit"
+
+    def _serve(self, port):
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # Keep-alive
+            wbufsize = -1                   # Headers and body in one write, not two small segments held up by delayed ACKs
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with hub.lock:
+                    hub.connections += 1
+                    hub.sockets.add(self.connection)
+
+            def finish(self):
+                super().finish()
+                with hub.lock:
+                    hub.sockets.discard(self.connection)
+
+            def reply(self, code, body=b"ok"):
+                self.send_response(code)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            # The bridge handshake from the README
+            def do_GET(self):
+                self.reply(200, b'{"rftransmit": true}')
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with hub.lock:
+                    hub.posts += 1
+                    hub.in_flight += 1
+                    hub.max_in_flight = max(hub.max_in_flight, hub.in_flight)
+                    roll = hub.rng.random()
+                try:
+                    time.sleep(hub.latency_s)
+                    if roll < hub.drop_rate:
+                        self.close_connection = True
+                        return
+                    if roll < hub.drop_rate + hub.error_rate:
+                        self.reply(500, b"busy")
+                        return
+                    with hub.lock:
+                        hub.commands += json.loads(body)
+                    self.reply(200)
+                finally:
+                    with hub.lock:
+                        hub.in_flight -= 1
+
+            def log_message(self, *a): pass
+
+        httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, name="stand-in-hub", daemon=True).start()
+        return httpd
+
+    # Also drops the open keep-alive connections, like a hub losing power
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        with self.lock:
+            for sock in self.sockets:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self.sockets.clear()
+
+    # Same port again, like a hub coming back after a reboot
+    def restart(self):
+        port = self.httpd.server_address[1]
+        self.stop()
+        self.httpd = self._serve(port)
+
+
+def connected_backend(hub, **kwargs):
+    backend = OpenShockLanBackend(hub.url, [41838], **kwargs).start()
+    backend.connect()
+    return backend
+
+
+# ~~~      CHECKS      ~~~
+# Commands are sent one per call so every one is its own post
+def check_pipelining(count: int = 200, latency_s: float = 0.01, max_in_flight: int = 4) -> dict:
+    hub = StandInHub(latency_s=latency_s)
+    backend = connected_backend(hub, max_in_flight=max_in_flight)
+    start = time.perf_counter()
+    for _ in range(count):
+        backend.send(0, 20, 0.5)
+    delivered = wait_until(lambda: len(hub.commands) == count, count * latency_s + 5)
+    elapsed = time.perf_counter() - start
+    health = backend.health()
+    backend.close()
+    hub.stop()
+    serial_s = count * latency_s
+    return {
+        "check": "pipelining",
+        "commands": count,
+        "elapsed_s": round(elapsed, 3),
+        "one_at_a_time_s": round(serial_s, 3),
+        "hub_max_in_flight": hub.max_in_flight,
+        "connections": hub.connections,
+        "latency_p99_ms": health.get("latency_p99_ms"),
+        # Overlapping posts on a few reused connections
+        "passed": delivered and elapsed < serial_s * 0.6 and 1 < hub.max_in_flight <= max_in_flight and hub.connections <= max_in_flight + 1,
+    }
+
+
+def check_batching(count: int = 64, batch: int = 8) -> dict:
+    hub = StandInHub(latency_s=0.005)
+    backend = connected_backend(hub)
+    for _ in range(count // batch):
+        backend.send_batch([(0, 30, 1.0)] * batch)
+    delivered = wait_until(lambda: len(hub.commands) == count, 5)
+    backend.close()
+    hub.stop()
+    payload = hub.commands[0] if hub.commands else {}
+    return {
+        "check": "batching",
+        "commands": count,
+        "delivered": len(hub.commands),
+        "passed": delivered and payload.get("id") == 41838 and payload.get("durationMs") == 1000 and payload.get("intensity") == 30,
+    }
+
+
+def check_errors(count: int = 200, error_rate: float = 0.1, drop_rate: float = 0.1, seed: int = 0) -> dict:
+    hub = StandInHub(latency_s=0.002, error_rate=error_rate, drop_rate=drop_rate, seed=seed)
+    backend = connected_backend(hub)
+    for _ in range(count):
+        backend.send(0, 20, 0.5)
+    settled = wait_until(lambda: backend.sent + backend.errors + backend.dropped >= count, 10)
+    health = backend.health()
+    backend.close()
+    hub.stop()
+    return {
+        "check": "errors",
+        "commands": count,
+        "sent": health["sent"],
+        "errors": health["errors"],
+        "dropped": health["dropped"],
+        "delivered": len(hub.commands),
+        "posts": hub.posts,
+        # Neither 500s nor dropped answers are resent, the hub may have fired already
+        "passed": settled and health["sent"] == len(hub.commands) and health["errors"] > 0 and hub.posts == count
+                  and health["sent"] > count * (1 - error_rate - drop_rate) * 0.9,
+    }
+
+
+def check_reconnect(count: int = 20) -> dict:
+    hub = StandInHub(latency_s=0.002)
+    reconnected = threading.Event()
+    backend = connected_backend(hub, on_connected=reconnected.set)
+    backend.MAX_AGE_S = 0.5
+    backend.send(0, 20, 0.5)
+    wait_until(lambda: len(hub.commands) == 1, 2)
+
+    hub.stop()
+    backend.send(0, 20, 0.5)
+    noticed = wait_until(lambda: not backend.connected(), 5)
+    # The worker's reconnect call must not wait on the network
+    start = time.perf_counter()
+    backend.connect()
+    connect_ms = (time.perf_counter() - start) * 1000
+    backend.send(0, 20, 0.5)
+    stale_dropped = wait_until(lambda: backend.dropped >= 1, 3)
+
+    hub.restart()
+    back = reconnected.wait(10)
+    before = len(hub.commands)
+    for _ in range(count):
+        backend.send(0, 20, 0.5)
+    delivered = wait_until(lambda: len(hub.commands) == before + count, 5)
+    health = backend.health()
+    backend.close()
+    hub.stop()
+    return {
+        "check": "reconnect",
+        "noticed_loss": noticed,
+        "connect_call_ms": round(connect_ms, 3),
+        "stale_dropped": health["dropped"],
+        "reconnects": health["reconnects"],
+        "delivered_after": len(hub.commands) - before,
+        "passed": noticed and connect_ms < 50 and stale_dropped and back and delivered and health["reconnects"] == 1,
+    }
+
+
+# ~~~      TIMINGS      ~~~
+# Round trip per post with a fresh connection each time against the pooled keep-alive session
+def time_keep_alive(count: int = 300) -> dict:
+    import requests
+
+    hub = StandInHub()
+    body = json.dumps([{"model": "caixianlin", "id": 41838, "type": "shock", "intensity": 20, "durationMs": 500}])
+    start = time.perf_counter()
+    for _ in range(count):
+        requests.post(hub.url, data=body, timeout=2).close()
+    fresh_us = (time.perf_counter() - start) / count * 1e6
+
+    backend = connected_backend(hub)
+    start = time.perf_counter()
+    for _ in range(count):
+        backend._post(body)
+    pooled_us = (time.perf_counter() - start) / count * 1e6
+    backend.close()
+    hub.stop()
+    return {"fresh_connection_us": round(fresh_us, 1), "keep_alive_us": round(pooled_us, 1),
+            "speedup": round(fresh_us / pooled_us, 2)}
+
+
+# Hand-off cost of send() on the worker thread, the mock for reference
+def time_send_call(count: int = 20_000) -> dict:
+    hub = StandInHub()
+    backend = connected_backend(hub)
+    start = time.perf_counter()
+    for _ in range(count):
+        backend.send(0, 20, 0.5)
+    lan_us = (time.perf_counter() - start) / count * 1e6
+    backend.close()
+    hub.stop()
+
+    mock = MockBackend()
+    mock.connect()
+    start = time.perf_counter()
+    for _ in range(count):
+        mock.send(0, 20, 0.5)
+    mock_us = (time.perf_counter() - start) / count * 1e6
+    return {"lan_send_us": round(lan_us, 2), "mock_send_us": round(mock_us, 2)}
+
+
+def run(seed: int = 0) -> dict:
+    # The backend's own error lines would drown the report
+    logging.getLogger("serial").setLevel(logging.CRITICAL)
+    checks = [check_pipelining(), check_batching(), check_errors(seed=seed), check_reconnect()]
+    timings = dict(time_keep_alive(), **time_send_call())
+    return report_header(seed=seed, passed=all(c["passed"] for c in checks), checks=checks, timings=timings)
+
+
+def render(report) -> str:
+    lines = [check_line("Backend", r["passed"], f"{r['check']:<11} | " + " | ".join(f"{k} {v}" for k, v in r.items() if k not in ("check", "passed")))
+             for r in report["checks"]]
+    lines.append(f"[Backend] {CYAN}Timings{RESET} " + ", ".join(f"{k} {v}" for k, v in report["timings"].items()))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = bench_parser("Checks the OpenShock LAN backend against a local stand-in hub and times it.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the simulated errors (default: 0)")
+    args = parser.parse_args()
+
+    report = run(args.seed)
+    write_report("Backend", report, args.json, render)
+    finish("Backend", report["passed"], "LAN backend checks failed")
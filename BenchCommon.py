@@ -0,0 +1,62 @@
+import platform
+import argparse
+import logging
+import json
+import time
+import sys
+
+RED = "\033[31m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(message)s'
+    )
+
+# What the bench scripts share: the --json option, the report header, PASS/FAIL lines and the exit code.
+# The checks themselves are plain functions returning a dict with "passed". They only report, the tests under tests/
+# assert the same conditions themselves.
+
+
+def bench_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--json", nargs="?", const="-", metavar="FILE", help="Write the results as JSON to FILE, or stdout without a file")
+    return parser
+
+
+# Header of every report, so saved results can be told apart
+def report_header(**extra) -> dict:
+    return dict({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(), "platform": platform.platform()}, **extra)
+
+
+def check_line(tag: str, passed: bool, text: str) -> str:
+    return f"[{tag}] {CYAN if passed else RED}{text} | {'PASS' if passed else 'FAIL'}{RESET}"
+
+
+# Prints the report as JSON with --json and no file, otherwise logs render(report) and writes the file if one was given
+def write_report(tag: str, report: dict, json_arg, render):
+    if json_arg == "-":
+        print(json.dumps(report, indent=2))
+        return
+    logging.info(render(report))
+    if json_arg:
+        with open(json_arg, "w") as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"[{tag}] {CYAN}Wrote results to {json_arg}{RESET}")
+
+
+def finish(tag: str, passed: bool, failure: str):
+    if not passed:
+        logging.error(f"[{tag}] {RED}{failure}{RESET}")
+    sys.exit(0 if passed else 1)
+
+
+def wait_until(condition, timeout_s: float) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
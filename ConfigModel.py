@@ -0,0 +1,302 @@
+from dataclasses import dataclass, fields, replace
+from UpdateConfig import CANONICAL, RENAMED_KEYS
+import threading
+import logging
+import time
+import yaml
+import os
+import re
+
+RED = "\033[31m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+LOG_LEVEL_NAMES = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+def return_list(x):
+    if x is None:
+        return []
+
+    if isinstance(x, str):
+        parts = [p.strip() for p in x.split(",")]
+        return [p for p in parts if p]
+
+    if isinstance(x, (list, tuple)):
+        return list(x)
+
+    return [x]
+
+
+# Defaults come straight from the canonical config.yml lines
+CANONICAL_DEFAULTS = {}
+for ctype, ckey, cline in CANONICAL:
+    if ctype == "key":
+        CANONICAL_DEFAULTS.update(yaml.safe_load(cline) or {})
+
+# Keys that can change while running without touching the serial link or the OSC servers
+RUNTIME_SAFE_KEYS = {
+    "SHOCK_PARAMETER",
+    "SECOND_SHOCK_PARAMETER",
+    "RANDOM_OR_SEQUENTIAL",
+    "EARLY_TRIGGER_POLICY",
+    "EARLY_TRIGGER_MAX_AGE_S",
+    "BASE_COOLDOWN_S",
+    "MAX_COOLDOWN_S",
+    "COOLDOWN_FACTOR_S",
+    "COOLDOWN_WINDOW_S",
+    "COOLDOWN_POLICY",
+    "TOKEN_BUCKET_SIZE",
+    "TOKEN_BUCKET_REFILL_S",
+    "SLIDING_WINDOW_MAX",
+    "SHOCKER_COOLDOWN_S",
+    "MERGE_WINDOW_S",
+    "LOG_LEVELS",
+}
+
+# Changing any of these reconfigures the cooldown policies
+COOLDOWN_KEYS = {
+    "BASE_COOLDOWN_S",
+    "MAX_COOLDOWN_S",
+    "COOLDOWN_FACTOR_S",
+    "COOLDOWN_WINDOW_S",
+    "COOLDOWN_POLICY",
+    "TOKEN_BUCKET_SIZE",
+    "TOKEN_BUCKET_REFILL_S",
+    "SLIDING_WINDOW_MAX",
+    "SHOCKER_COOLDOWN_S",
+}
+
+COLOR_RE = re.compile(r"^#[0-9a-fA-F]{6}$")
+
+
+def _default(key, fallback=None):
+    value = CANONICAL_DEFAULTS.get(key, fallback)
+    return tuple(return_list(value)) if isinstance(fallback, tuple) else value
+
+
+@dataclass(frozen=True, slots=True)
+class ShockerConfig:
+    # Serial config
+    SHOCK_PARAMETER: str = _default("SHOCK_PARAMETER", "")
+    SECOND_SHOCK_PARAMETER: str = _default("SECOND_SHOCK_PARAMETER", "")
+    USE_PISHOCK: bool = _default("USE_PISHOCK", False)
+    SHOCKER_BACKEND: str = _default("SHOCKER_BACKEND", "")
+    OPENSHOCK_SHOCKER_ID: tuple = _default("OPENSHOCK_SHOCKER_ID", ())
+    PISHOCK_SHOCKER_ID: tuple = _default("PISHOCK_SHOCKER_ID", ())
+    RANDOM_OR_SEQUENTIAL: bool = _default("RANDOM_OR_SEQUENTIAL", False)
+    SERIAL_PORT: str = _default("SERIAL_PORT", "")
+    OPENSHOCK_LAN_URL: str = _default("OPENSHOCK_LAN_URL", "")
+    OPENSHOCK_LAN_TOKEN: str = _default("OPENSHOCK_LAN_TOKEN", "")
+    EARLY_TRIGGER_POLICY: str = _default("EARLY_TRIGGER_POLICY", "queue")
+    EARLY_TRIGGER_MAX_AGE_S: float = _default("EARLY_TRIGGER_MAX_AGE_S", 5)
+    SAMPLER_SEED: str = _default("SAMPLER_SEED", "")
+
+    # Cooldown
+    BASE_COOLDOWN_S: float = _default("BASE_COOLDOWN_S", 2)
+    MAX_COOLDOWN_S: float = _default("MAX_COOLDOWN_S", 6)
+    COOLDOWN_FACTOR_S: float = _default("COOLDOWN_FACTOR_S", 0.4)
+    COOLDOWN_WINDOW_S: float = _default("COOLDOWN_WINDOW_S", 30)
+    COOLDOWN_ENABLED: bool = _default("COOLDOWN_ENABLED", True)
+    COOLDOWN_POLICY: str = _default("COOLDOWN_POLICY", "linear")
+    TOKEN_BUCKET_SIZE: int = _default("TOKEN_BUCKET_SIZE", 3)
+    TOKEN_BUCKET_REFILL_S: float = _default("TOKEN_BUCKET_REFILL_S", 10)
+    SLIDING_WINDOW_MAX: int = _default("SLIDING_WINDOW_MAX", 5)
+    SHOCKER_COOLDOWN_S: float = _default("SHOCKER_COOLDOWN_S", 0)
+    MERGE_WINDOW_S: float = _default("MERGE_WINDOW_S", 0.5)
+
+    # Shock journal
+    JOURNAL_ENABLED: bool = _default("JOURNAL_ENABLED", True)
+    JOURNAL_MAX_MB: float = _default("JOURNAL_MAX_MB", 8)
+    METRICS_PORT: int = _default("METRICS_PORT", 0)
+    LOG_LEVELS: tuple = _default("LOG_LEVELS", ())
+    ENGINE_PROCESS: bool = _default("ENGINE_PROCESS", False)
+
+    # Style
+    PRESET_COUNT: int = _default("PRESET_COUNT", 3)
+    CURVE_EDITOR: str = _default("CURVE_EDITOR", "matplotlib")
+    TOUCH_SELECT_THRESHOLD: float = _default("TOUCH_SELECT_THRESHOLD", 8)
+    TOUCH_MARKER_SIZE: float = _default("TOUCH_MARKER_SIZE", 120)
+    LINE_WIDTH: float = _default("LINE_WIDTH", 3)
+    OUTSIDE_CURVE_BG: str = _default("OUTSIDE_CURVE_BG", "#2A313D")
+    INSIDE_CURVE_BG: str = _default("INSIDE_CURVE_BG", "#2C3749")
+    BACKGROUND_COLOR: str = _default("BACKGROUND_COLOR", "#202630")
+    CURVE_LINE_COLOR: str = _default("CURVE_LINE_COLOR", "#00C2FF")
+    MARKER_COLOR: str = _default("MARKER_COLOR", "#D88A91")
+    LABEL_COLOR: str = _default("LABEL_COLOR", "#E6EEF6")
+    PRESET_NORMAL_BG: str = _default("PRESET_NORMAL_BG", "#202630")
+    PRESET_DEFAULT_BG: str = _default("PRESET_DEFAULT_BG", "#2E8A57")
+    GRADIENT_LEFT_COLOR: str = _default("GRADIENT_LEFT_COLOR", "#42953b")
+    GRADIENT_RIGHT_COLOR: str = _default("GRADIENT_RIGHT_COLOR", "#6e173b")
+
+    # VRChat
+    VRCHAT_HOST: str = _default("VRCHAT_HOST", "127.0.0.1")
+    SESSIONS: tuple = _default("SESSIONS", ())
+
+    @property
+    def sampler_seed(self):
+        return int(self.SAMPLER_SEED) if self.SAMPLER_SEED else None
+
+    # Full OSC addresses, None if the parameter isn't set
+    @property
+    def shock_address(self):
+        return f"/avatar/parameters/{self.SHOCK_PARAMETER}" if self.SHOCK_PARAMETER else None
+
+    @property
+    def second_shock_address(self):
+        return f"/avatar/parameters/{self.SECOND_SHOCK_PARAMETER}" if self.SECOND_SHOCK_PARAMETER else None
+
+
+FIELD_TYPES = {f.name: f.type for f in fields(ShockerConfig)}
+
+# Extra checks on top of the type, (check, description)
+VALIDATORS = {
+    "SHOCKER_BACKEND": (lambda v: v in ("", "openshock_serial", "openshock_lan", "pishock_serial", "mock"), 'blank, "openshock_serial", "openshock_lan", "pishock_serial" or "mock"'),
+    "OPENSHOCK_LAN_URL": (lambda v: v == "" or v.startswith(("http://", "https://")), "blank or an http:// address"),
+    "EARLY_TRIGGER_POLICY": (lambda v: v in ("queue", "drop"), '"queue" or "drop"'),
+    "EARLY_TRIGGER_MAX_AGE_S": (lambda v: v >= 0, "a positive number"),
+    "BASE_COOLDOWN_S": (lambda v: v >= 0, "a positive number"),
+    "MAX_COOLDOWN_S": (lambda v: v >= 0, "a positive number"),
+    "COOLDOWN_FACTOR_S": (lambda v: v >= 0, "a positive number"),
+    "COOLDOWN_WINDOW_S": (lambda v: v >= 0, "a positive number"),
+    "COOLDOWN_POLICY": (lambda v: v in ("linear", "token_bucket", "sliding_window"), '"linear", "token_bucket" or "sliding_window"'),
+    "TOKEN_BUCKET_SIZE": (lambda v: v >= 1, "at least 1"),
+    "TOKEN_BUCKET_REFILL_S": (lambda v: v >= 0, "a positive number"),
+    "SLIDING_WINDOW_MAX": (lambda v: v >= 1, "at least 1"),
+    "SHOCKER_COOLDOWN_S": (lambda v: v >= 0, "a positive number"),
+    "MERGE_WINDOW_S": (lambda v: v >= 0, "a positive number"),
+    "SAMPLER_SEED": (lambda v: v == "" or v.isdigit(), "blank or a whole number"),
+    "JOURNAL_MAX_MB": (lambda v: v > 0, "a number above 0"),
+    "METRICS_PORT": (lambda v: 0 <= v <= 65535, "a port number, or 0 to disable"),
+    "LOG_LEVELS": (lambda v: all(e.partition("=")[2].strip().upper() in LOG_LEVEL_NAMES for e in v), "entries like shocker=WARNING"),
+    "PRESET_COUNT": (lambda v: 1 <= v <= 20, "between 1 and 20"),
+    "CURVE_EDITOR": (lambda v: v in ("matplotlib", "canvas"), '"matplotlib" or "canvas"'),
+    "SESSIONS": (lambda v: all(isinstance(s, dict) and (s.get("shock") or s.get("second")) for s in v), "a list of {name, host, port, shock, second, preset} entries"),
+}
+
+
+def _coerce(key, value):
+    kind = FIELD_TYPES[key]
+
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+            return value.strip().lower() == "true"
+        raise ValueError("expected True or False")
+
+    if kind is tuple:
+        return tuple(return_list(value))
+
+    if kind is str:
+        value = "" if value is None else str(value)
+        if key in ("SHOCKER_BACKEND", "EARLY_TRIGGER_POLICY", "COOLDOWN_POLICY", "CURVE_EDITOR"):
+            value = value.lower()
+        if key.endswith(("_COLOR", "_BG")) and not COLOR_RE.match(value):
+            raise ValueError("expected a color like #1A2B3C")
+        return value
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"expected a number, got {value!r}")
+    if kind is int and isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"expected a whole number, got {value!r}")
+    return kind(value)
+
+
+def parse_config(raw: dict, previous: ShockerConfig = None) -> ShockerConfig:
+    # Invalid values fall back to the previous value (hot reload) or the default
+    base = previous or ShockerConfig()
+    values = {}
+
+    for key, value in raw.items():
+        # Old spellings are still accepted. With both set, the new one wins unless it is blank.
+        if key in RENAMED_KEYS and raw.get(RENAMED_KEYS[key]) not in (None, ""):
+            continue
+        if value in (None, "") and any(raw.get(old) not in (None, "") for old, new in RENAMED_KEYS.items() if new == key):
+            continue
+        key = RENAMED_KEYS.get(key, key)
+        if key not in FIELD_TYPES:
+            logging.warning(f"[Config] {YELLOW}Unknown key {key}, ignoring it.{RESET}")
+            continue
+        try:
+            value = _coerce(key, value)
+            check = VALIDATORS.get(key)
+            if check and not check[0](value):
+                raise ValueError(f"expected {check[1]}")
+        except (ValueError, TypeError) as e:
+            logging.warning(f"[Config] {YELLOW}Invalid value for {key} ({e}), using {getattr(base, key)!r}.{RESET}")
+            continue
+        values[key] = value
+
+    cfg = replace(base, **values)
+    if cfg.MAX_COOLDOWN_S < cfg.BASE_COOLDOWN_S:
+        logging.warning(f"[Config] {YELLOW}MAX_COOLDOWN_S is lower than BASE_COOLDOWN_S, using {cfg.BASE_COOLDOWN_S}.{RESET}")
+        cfg = replace(cfg, MAX_COOLDOWN_S=cfg.BASE_COOLDOWN_S)
+    return cfg
+
+
+def load_config(path: str, previous: ShockerConfig = None) -> ShockerConfig:
+    try:
+        with open(path, encoding="utf-8") as f:
+            raw = yaml.safe_load(f) or {}
+        if not isinstance(raw, dict):
+            raise ValueError("top level must be a mapping")
+    except FileNotFoundError:
+        logging.error(f"{RED}Could not find {path} file. Using {'previous' if previous else 'default'} config")
+        return previous or ShockerConfig()
+    except Exception:
+        logging.exception(f"{RED}Could not load {path} file. Using {'previous' if previous else 'default'} config")
+        return previous or ShockerConfig()
+    return parse_config(raw, previous)
+
+
+def changed_keys(old: ShockerConfig, new: ShockerConfig) -> set:
+    return {f.name for f in fields(ShockerConfig) if getattr(old, f.name) != getattr(new, f.name)}
+
+
+# Polls the config file's mtime and calls on_change(new_config, changed_keys) when it differs.
+# A stat every second is far cheaper than a filesystem watcher dependency.
+class ConfigWatcher:
+    def __init__(self, path: str, current: ShockerConfig, on_change, interval: float = 1.0):
+        self.path = path
+        self.current = current
+        self.on_change = on_change
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.signature = self._signature()
+        self.thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            signature = self._signature()
+            if signature is None or signature == self.signature:
+                continue
+            self.signature = signature
+
+            # Editors often write in several steps, give them a moment to finish
+            time.sleep(0.05)
+            new = load_config(self.path, self.current)
+            changed = changed_keys(self.current, new)
+            if not changed:
+                continue
+            # Diff against what's in the file, not what was applied, so restart-only keys warn once
+            self.current = new
+            try:
+                self.on_change(new, changed)
+            except Exception:
+                logging.exception(f"[Config] {RED}Failed to apply reloaded config{RESET}")
@@ -0,0 +1,187 @@
+from collections import deque
+import threading
+
+# Every policy works on monotonic seconds and has its own lock, so the two parameters and the shockers never wait on each other.
+# try_acquire(now) returns 0 when the shock may go ahead (and counts it), otherwise the seconds left.
+# ready_at and level are kept up to date on every call, so state() only reads them.
+
+
+# The original escalating cooldown: BASE_COOLDOWN_S + COOLDOWN_FACTOR_S * shocks in COOLDOWN_WINDOW_S, capped at MAX_COOLDOWN_S
+class LinearEscalation:
+    kind = "linear"
+
+    def __init__(self, base_s: float, factor_s: float, max_s: float, window_s: float):
+        self.lock = threading.Lock()
+        self.timestamps = deque()
+        self.last = float("-inf")
+        self.ready_at = float("-inf")
+        self.configure(base_s, factor_s, max_s, window_s)
+
+    def configure(self, base_s, factor_s, max_s, window_s):
+        with self.lock:
+            self.base_s, self.factor_s, self.max_s, self.window_s = base_s, factor_s, max_s, window_s
+
+    def _cooldown(self, count):
+        return min(self.base_s + self.factor_s * count, self.max_s)
+
+    def try_acquire(self, now: float) -> float:
+        with self.lock:
+            # Oldest first, so expiring is amortized O(1)
+            while self.timestamps and now - self.timestamps[0] > self.window_s:
+                self.timestamps.popleft()
+            cooldown = self._cooldown(len(self.timestamps))
+            if now - self.last <= cooldown:
+                return self.last + cooldown - now
+            self.last = now
+            self.timestamps.append(now)
+            self.ready_at = now + self._cooldown(len(self.timestamps))
+            return 0.0
+
+    @property
+    def level(self):
+        return len(self.timestamps)
+
+    def state(self, now: float) -> dict:
+        return {"kind": self.kind, "shocks_in_window": self.level, "ready_in_s": max(self.ready_at - now, 0.0)}
+
+
+# Allows bursts of `capacity` shocks, one token comes back every `refill_s` seconds
+class TokenBucket:
+    kind = "token_bucket"
+
+    def __init__(self, capacity: float, refill_s: float):
+        self.lock = threading.Lock()
+        self.tokens = float(capacity)
+        self.updated = None
+        self.ready_at = float("-inf")
+        self.configure(capacity, refill_s)
+
+    def configure(self, capacity, refill_s):
+        with self.lock:
+            self.capacity = float(capacity)
+            self.refill_s = refill_s
+            self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self, now):
+        if self.updated is not None and self.refill_s > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.refill_s)
+        elif self.refill_s <= 0:
+            self.tokens = self.capacity
+        self.updated = now
+
+    def try_acquire(self, now: float) -> float:
+        with self.lock:
+            self._refill(now)
+            if self.tokens < 1:
+                return (1 - self.tokens) * self.refill_s
+            self.tokens -= 1
+            self.ready_at = now + max(1 - self.tokens, 0.0) * self.refill_s
+            return 0.0
+
+    @property
+    def level(self):
+        return self.tokens
+
+    def state(self, now: float) -> dict:
+        tokens = self.tokens
+        if self.updated is not None and self.refill_s > 0:
+            tokens = min(self.capacity, tokens + (now - self.updated) / self.refill_s)
+        return {"kind": self.kind, "tokens": tokens, "capacity": self.capacity, "ready_in_s": max(self.ready_at - now, 0.0)}
+
+
+# At most `max_count` shocks in any `window_s` seconds
+class SlidingWindow:
+    kind = "sliding_window"
+
+    def __init__(self, max_count: int, window_s: float):
+        self.lock = threading.Lock()
+        self.timestamps = deque()
+        self.ready_at = float("-inf")
+        self.configure(max_count, window_s)
+
+    def configure(self, max_count, window_s):
+        with self.lock:
+            self.max_count, self.window_s = int(max_count), window_s
+
+    def try_acquire(self, now: float) -> float:
+        with self.lock:
+            while self.timestamps and now - self.timestamps[0] >= self.window_s:
+                self.timestamps.popleft()
+            if len(self.timestamps) >= self.max_count:
+                return self.timestamps[0] + self.window_s - now
+            self.timestamps.append(now)
+            full = len(self.timestamps) >= self.max_count
+            self.ready_at = self.timestamps[0] + self.window_s if full else now
+            return 0.0
+
+    @property
+    def level(self):
+        return len(self.timestamps)
+
+    def state(self, now: float) -> dict:
+        return {"kind": self.kind, "shocks_in_window": self.level, "max": self.max_count, "ready_in_s": max(self.ready_at - now, 0.0)}
+
+
+POLICIES = {policy.kind: policy for policy in (LinearEscalation, TokenBucket, SlidingWindow)}
+
+
+def policy_args(cfg):
+    if cfg.COOLDOWN_POLICY == "token_bucket":
+        return (cfg.TOKEN_BUCKET_SIZE, cfg.TOKEN_BUCKET_REFILL_S)
+    if cfg.COOLDOWN_POLICY == "sliding_window":
+        return (cfg.SLIDING_WINDOW_MAX, cfg.COOLDOWN_WINDOW_S)
+    return (cfg.BASE_COOLDOWN_S, cfg.COOLDOWN_FACTOR_S, cfg.MAX_COOLDOWN_S, cfg.COOLDOWN_WINDOW_S)
+
+
+# One policy per shock parameter and an optional minimum gap per shocker.
+# Policies are only replaced when their kind changes, so a config reload keeps the current cooldowns.
+class CooldownTable:
+    def __init__(self, cfg, parameters: int = 2):
+        self.parameters = {}
+        self.shockers = {}
+        self.shocker_gap_s = 0
+        self.configure(cfg, parameters)
+
+    def configure(self, cfg, parameters: int = 2):
+        args = policy_args(cfg)
+        policies = {}
+        for param_id in range(parameters):
+            policy = self.parameters.get(param_id)
+            if policy is not None and policy.kind == cfg.COOLDOWN_POLICY:
+                policy.configure(*args)
+            else:
+                policy = POLICIES[cfg.COOLDOWN_POLICY](*args)
+            policies[param_id] = policy
+        self.parameters = policies
+
+        # A capacity 1 bucket is a plain minimum gap between shocks
+        self.shocker_gap_s = cfg.SHOCKER_COOLDOWN_S
+        for policy in self.shockers.values():
+            policy.configure(1, self.shocker_gap_s)
+
+    def check_parameter(self, param_id: int, now: float) -> float:
+        return self.parameters[param_id].try_acquire(now)
+
+    def check_shocker(self, index: int, now: float) -> float:
+        if self.shocker_gap_s <= 0:
+            return 0.0
+        policy = self.shockers.get(index)
+        if policy is None:
+            policy = self.shockers.setdefault(index, TokenBucket(1, self.shocker_gap_s))
+        return policy.try_acquire(now)
+
+    def state(self, now: float) -> dict:
+        return {
+            "parameters": {param_id: policy.state(now) for param_id, policy in self.parameters.items()},
+            "shockers": {index: policy.state(now) for index, policy in self.shockers.items()},
+        }
+
+    # Short text for the GUI status line
+    def describe(self, param_id: int, now: float) -> str:
+        state = self.parameters[param_id].state(now)
+        if state["kind"] == "token_bucket":
+            tokens = f"{int(state['tokens'])}/{int(state['capacity'])} tokens"
+            return f"{tokens} ({state['ready_in_s']:.1f}s)" if state["tokens"] < 1 else tokens
+        if state["ready_in_s"] > 0:
+            return f"{state['ready_in_s']:.1f}s"
+        return "ready"
@@ -0,0 +1,238 @@
+from dataclasses import dataclass
+import tkinter as tk
+import numpy as np
+
+MIN_LINE_COLOR = "#5eead4"
+MAX_LINE_COLOR = "#fbbf24"
+GRID_COLOR = "#b0b0b0"          # Matplotlib's grid color, blended over the gradient at GRID_ALPHA
+GRID_ALPHA = 0.6
+RING_ALPHA = 0.45
+GRADIENT_BANDS = 200            # Bands across 0-100%, half a percent each
+MARGINS_PT = (42, 30, 12, 38)   # Left, top, right and bottom of the plot area (in points)
+FONT = "Segoe UI"
+
+# With CURVE_EDITOR: "canvas" the editor is drawn straight onto a tk.Canvas instead of a matplotlib figure.
+# Every part of the plot is a canvas item created once, a render only moves items (coords) and changes
+# texts, and Tk repaints just the area that changed. Nothing is clipped by Tk, the margins are drawn on top
+# of the plot items instead so whatever reaches past the plot area is hidden under them.
+
+
+# Mouse event with the fields the editor's handlers read from matplotlib's MouseEvent.
+# inaxes is None outside the plot area, button is None for motion.
+@dataclass(slots=True)
+class EditorEvent:
+    inaxes: object
+    xdata: float
+    ydata: float
+    button: int
+    dblclick: bool = False
+
+
+def _rgb(color):
+    color = color.lstrip("#")
+    return np.array([int(color[i:i + 2], 16) for i in (0, 2, 4)], dtype=float)
+
+def _hex(rgb):
+    return "#%02x%02x%02x" % tuple(int(round(c)) for c in rgb)
+
+# Tk has no alpha, what the color looks like at alpha over `under`
+def blend(color, under, alpha):
+    return _hex(_rgb(color) * alpha + _rgb(under) * (1 - alpha))
+
+
+class CurveCanvas:
+    def __init__(self, master, settings, view=(0, 100), width=500, height=400):
+        self.settings = settings
+        self.widget = tk.Canvas(master, width=width, height=height, bg=settings.OUTSIDE_CURVE_BG, highlightthickness=0)
+        self.pt = self.widget.winfo_fpixels("1p")   # Matplotlib sizes are in points
+        self.view = view
+        self.box = (0, 0, width, height)            # Plot area in pixels, x0, y0, x1, y1
+        self.last = None                            # Last render, drawn again after a resize
+        self.markers = []
+        # Right-click is button 2 on macOS, matplotlib reports it as 3 everywhere
+        self.swap_buttons = self.widget.tk.call("tk", "windowingsystem") == "aqua"
+        self._create_items()
+        self._layout(width, height)
+        self.widget.bind("<Configure>", lambda e: self._layout(e.width, e.height))
+
+    # ~~~      ITEMS      ~~~
+    # Created bottom to top, the same order as the matplotlib zorders
+    def _create_items(self):
+        s = self.settings
+        c = self.widget
+        pt = self.pt
+        left, right = _rgb(s.GRADIENT_LEFT_COLOR), _rgb(s.GRADIENT_RIGHT_COLOR)
+        middle = _hex((left + right) / 2)
+        grid = blend(GRID_COLOR, middle, GRID_ALPHA)
+        label_font = (FONT, 10)
+
+        self.inside = c.create_rectangle(0, 0, 0, 0, fill=s.INSIDE_CURVE_BG, outline="")
+        self.bands = [c.create_rectangle(0, 0, 0, 0, outline="", fill=_hex(left + (right - left) * (i + 0.5) / GRADIENT_BANDS))
+                      for i in range(GRADIENT_BANDS)]
+        self.vline_min = c.create_line(0, 0, 0, 0, fill=MIN_LINE_COLOR, dash=(5, 2), width=pt)
+        self.vline_max = c.create_line(0, 0, 0, 0, fill=MAX_LINE_COLOR, dash=(5, 2), width=pt)
+        self.y_grid = [c.create_line(0, 0, 0, 0, fill=grid, width=0.9 * pt) for _ in range(11)]
+        self.x_grid = [c.create_line(0, 0, 0, 0, fill=grid, width=0.9 * pt, state=tk.HIDDEN) for _ in range(21)]
+        self.line = c.create_line(0, 0, 0, 0, fill=s.CURVE_LINE_COLOR, width=s.LINE_WIDTH * pt, capstyle=tk.ROUND, joinstyle=tk.ROUND)
+        self.ring = c.create_oval(0, 0, 0, 0, outline=blend("#ffffff", middle, RING_ALPHA), width=1.4 * pt, state=tk.HIDDEN)
+
+        self.masks = [c.create_rectangle(0, 0, 0, 0, fill=s.OUTSIDE_CURVE_BG, outline="") for _ in range(4)]
+        self.frame = c.create_rectangle(0, 0, 0, 0, outline="black", width=0.8 * pt)
+        self.y_labels = [(c.create_line(0, 0, 0, 0, fill=s.LABEL_COLOR, width=0.8 * pt),
+                          c.create_text(0, 0, text=f"{v / 10:.1f}", fill=s.LABEL_COLOR, font=label_font, anchor=tk.E))
+                         for v in range(11)]
+        self.x_labels = [(c.create_line(0, 0, 0, 0, fill=s.LABEL_COLOR, width=0.8 * pt, state=tk.HIDDEN),
+                          c.create_text(0, 0, fill=s.LABEL_COLOR, font=label_font, anchor=tk.N, state=tk.HIDDEN))
+                         for _ in range(21)]
+        self.title = c.create_text(0, 0, text="Intensity Probability Curve", fill=s.LABEL_COLOR, font=(FONT, 14), anchor=tk.S)
+        self.xlabel = c.create_text(0, 0, text="Intensity (%)", fill=s.LABEL_COLOR, font=(FONT, 12), anchor=tk.S)
+        self.ylabel = c.create_text(0, 0, text="Weight", fill=s.LABEL_COLOR, font=(FONT, 12), angle=90)
+
+        # Legend, upper right inside the plot area
+        self.legend_frame = c.create_rectangle(0, 0, 0, 0, fill=s.OUTSIDE_CURVE_BG, outline="#222")
+        self.legend = [(c.create_line(0, 0, 0, 0, fill=color, dash=(5, 2), width=pt),
+                        c.create_text(0, 0, fill=s.LABEL_COLOR, font=label_font, anchor=tk.W))
+                       for color in (MIN_LINE_COLOR, MAX_LINE_COLOR)]
+
+    # ~~~      LAYOUT      ~~~
+    # Everything that only moves with the window size, then the view dependent items and the last render
+    def _layout(self, width, height):
+        c = self.widget
+        pt = self.pt
+        left, top, right, bottom = (m * pt for m in MARGINS_PT)
+        x0, y0, x1, y1 = self.box = (left, top, max(left + 1, width - right), max(top + 1, height - bottom))
+        tick = 3.5 * pt
+
+        c.coords(self.inside, x0, y0, x1, y1)
+        c.coords(self.frame, x0, y0, x1, y1)
+        for mask, coords in zip(self.masks, ((0, 0, x0, height), (0, 0, width, y0), (x1, 0, width, height), (0, y1, width, height))):
+            c.coords(mask, *coords)
+        for v, line in enumerate(self.y_grid):
+            y = self.to_y(v / 10)
+            c.coords(line, x0, y, x1, y)
+        for v, (mark, text) in enumerate(self.y_labels):
+            y = self.to_y(v / 10)
+            c.coords(mark, x0 - tick, y, x0, y)
+            c.coords(text, x0 - tick - 2 * pt, y)
+        c.coords(self.title, (x0 + x1) / 2, y0 - 8 * pt)
+        c.coords(self.xlabel, (x0 + x1) / 2, height - 3 * pt)
+        c.coords(self.ylabel, 9 * pt, (y0 + y1) / 2)
+        self._place_view()
+
+    # Gradient, x grid and x ticks follow the view range. Ticks every 5%, or just the view's ends if none fit.
+    def _place_view(self):
+        c = self.widget
+        x0, y0, x1, y1 = self.box
+        tick = 3.5 * self.pt
+        for i, band in enumerate(self.bands):
+            # One pixel of overlap so the bands don't leave seams
+            c.coords(band, self.to_x(i * 100 / GRADIENT_BANDS), y0, self.to_x((i + 1) * 100 / GRADIENT_BANDS) + 1, y1)
+
+        vmin, vmax = self.view
+        ticks = [v for v in range(0, 101, 5) if vmin <= v <= vmax] or [vmin, vmax]
+        for i, (line, (mark, text)) in enumerate(zip(self.x_grid, self.x_labels)):
+            if i >= len(ticks):
+                for item in (line, mark, text):
+                    c.itemconfigure(item, state=tk.HIDDEN)
+                continue
+            x = self.to_x(ticks[i])
+            c.coords(line, x, y0, x, y1)
+            c.coords(mark, x, y1, x, y1 + tick)
+            c.coords(text, x, y1 + tick + 2 * self.pt)
+            c.itemconfigure(text, text=f"{ticks[i]:g}")
+            for item in (line, mark, text):
+                c.itemconfigure(item, state=tk.NORMAL)
+
+        if self.last is not None:
+            self.render(*self.last, view=self.view)
+
+    # ~~~      DATA <-> PIXELS      ~~~
+    def to_x(self, x):
+        x0, _, x1, _ = self.box
+        vmin, vmax = self.view
+        return x0 + (x - vmin) * (x1 - x0) / (vmax - vmin)
+
+    def to_y(self, y):
+        _, y0, _, y1 = self.box
+        return y1 - y * (y1 - y0)
+
+    # ~~~      RENDER      ~~~
+    # curve is the compiled (steps, 2) polyline, points the sorted control points, active the ringed point or None
+    def render(self, curve, points, active, view):
+        c = self.widget
+        if view != self.view:
+            self.view = view
+            self.last = None
+            self._place_view()
+        self.last = (curve, points, active)
+        x0, y0, x1, y1 = self.box
+
+        xs = self.to_x(curve[:, 0])
+        ys = self.to_y(curve[:, 1])
+        c.coords(self.line, np.column_stack([xs, ys]).ravel().tolist())
+
+        # Points can be added and removed, markers are only created or deleted when the count changes
+        radius = np.sqrt(self.settings.TOUCH_MARKER_SIZE) * self.pt / 2
+        while len(self.markers) < len(points):
+            marker = c.create_oval(0, 0, 0, 0, fill=self.settings.MARKER_COLOR, outline="black", width=0.6 * self.pt)
+            c.tag_lower(marker, self.ring)
+            self.markers.append(marker)
+        while len(self.markers) > len(points):
+            c.delete(self.markers.pop())
+        for marker, (x, y) in zip(self.markers, points):
+            px, py = self.to_x(x), self.to_y(y)
+            c.coords(marker, px - radius, py - radius, px + radius, py + radius)
+
+        if active is not None:
+            ring = radius * np.sqrt(1.8)
+            px, py = self.to_x(active[0]), self.to_y(active[1])
+            c.coords(self.ring, px - ring, py - ring, px + ring, py + ring)
+            c.itemconfigure(self.ring, state=tk.NORMAL)
+        else:
+            c.itemconfigure(self.ring, state=tk.HIDDEN)
+
+        (min_x, min_y), (max_x, max_y) = points[0], points[-1]
+        for vline, x in ((self.vline_min, min_x), (self.vline_max, max_x)):
+            px = self.to_x(x)
+            c.coords(vline, px, y0, px, y1)
+        self._place_legend(f"Min {int(min_x)}% with {min_y*10:.1f} weight", f"Max {int(max_x)}% with {max_y*10:.1f} weight")
+
+    # Sized to its texts, so it is laid out again whenever they change
+    def _place_legend(self, *texts):
+        c = self.widget
+        pt = self.pt
+        _, y0, x1, _ = self.box
+        for (_, text), value in zip(self.legend, texts):
+            c.itemconfigure(text, text=value)
+        text_width = max(c.bbox(text)[2] - c.bbox(text)[0] for _, text in self.legend)
+        row = 14 * pt
+        pad = 4 * pt
+        sample = 20 * pt
+        right = x1 - pad
+        left = right - (pad + sample + pad + text_width + pad)
+        c.coords(self.legend_frame, left, y0 + pad, right, y0 + pad + 2 * row + pad)
+        for i, (line, text) in enumerate(self.legend):
+            y = y0 + pad + pad / 2 + row * (i + 0.5)
+            c.coords(line, left + pad, y, left + pad + sample, y)
+            c.coords(text, left + pad + sample + pad, y)
+
+    # ~~~      EVENTS      ~~~
+    # The editor's matplotlib handlers take these events as they are
+    def connect(self, on_press, on_release, on_motion):
+        c = self.widget
+        c.bind("<ButtonPress>", lambda e: on_press(self._event(e)))
+        c.bind("<Double-ButtonPress-1>", lambda e: on_press(self._event(e, dblclick=True)))
+        c.bind("<ButtonRelease>", lambda e: on_release(self._event(e)))
+        c.bind("<Motion>", lambda e: on_motion(self._event(e)))
+
+    def _event(self, e, dblclick=False):
+        button = e.num if isinstance(e.num, int) else None
+        if self.swap_buttons and button in (2, 3):
+            button = 5 - button
+        x0, y0, x1, y1 = self.box
+        if not (x0 <= e.x <= x1 and y0 <= e.y <= y1):
+            return EditorEvent(None, None, None, button, dblclick)
+        vmin, vmax = self.view
+        xdata = vmin + (e.x - x0) * (vmax - vmin) / (x1 - x0)
+        ydata = (y1 - e.y) / (y1 - y0)
+        return EditorEvent(self, xdata, ydata, button, dblclick)
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+import numpy as np
+import threading
+
+STEPS_PER_SEGMENT = 100
+AREA_STEPS_PER_SEGMENT = 512        # Samples per segment for the area integration, within 1e-5 of the exact bin weights
+MIN_POINTS = 3
+INTENSITIES = np.arange(1, 101)     # Every intensity the shocker accepts, one weight per percent
+BIN_EDGES = np.arange(0.5, 101, 1.0)  # Intensity k gets the curve between k - 0.5 and k + 0.5
+
+
+# ~~~      CURVE      ~~~
+# Composite quadratic Bezier (a clamped quadratic B-spline): the first and last points are hit exactly,
+# the points in between pull the curve like the middle point of a single quadratic Bezier.
+# With 3 points this is exactly the old single curve.
+def bezier_segments(points):
+    pts = np.asarray(sorted(points, key=lambda p: p[0]), dtype=float)
+    if len(pts) == 2:
+        return pts[None, 0], (pts[None, 0] + pts[None, 1]) / 2, pts[None, 1]
+
+    controls = pts[1:-1]
+    joins = (controls[:-1] + controls[1:]) / 2
+    starts = np.vstack([pts[:1], joins])
+    ends = np.vstack([joins, pts[-1:]])
+    return starts, controls, ends
+
+
+def bezier_interpolate(points, steps=None):
+    starts, controls, ends = bezier_segments(points)
+    segments = len(starts)
+    steps = steps or STEPS_PER_SEGMENT * segments
+
+    # One global parameter over all segments, each sample picks its segment and local t
+    u = np.linspace(0, segments, steps)
+    index = np.minimum(u.astype(int), segments - 1)
+    t = (u - index)[:, None]
+    return (1-t)**2 * starts[index] + 2*(1-t)*t * controls[index] + t**2 * ends[index]
+
+
+# ~~~      COMPILED MODEL      ~~~
+@dataclass(frozen=True, slots=True)
+class CompiledCurve:
+    points: tuple               # Sorted control points the curve was built from
+    curve: np.ndarray           # (steps, 2) polyline for drawing
+    weights: np.ndarray         # Area under the curve per intensity 1..100
+    cdf: np.ndarray             # Normalized cumulative weights for the full curve
+    upper_cdf: np.ndarray       # Same for the second parameter, only the upper half of the curve
+
+
+def _normalized_cdf(weights):
+    cdf = np.cumsum(weights)
+    if cdf[-1] <= 0:
+        cdf = np.arange(1, len(weights) + 1, dtype=float)
+    return cdf / cdf[-1]
+
+
+# Area under the curve from its start up to each x, as (xs, cumulative area).
+# The control points are sorted by x, so x only grows along the curve and y is a function of x.
+def cumulative_area(points):
+    dense = bezier_interpolate(points, AREA_STEPS_PER_SEGMENT * len(bezier_segments(points)[0]))
+    xs = np.maximum.accumulate(dense[:, 0])
+    ys = np.clip(dense[:, 1], 0, 1)
+    area = np.concatenate([[0.0], np.cumsum(np.diff(xs) * (ys[1:] + ys[:-1]) / 2)])
+    return xs, area
+
+
+# Integrates the curve over every intensity bin, returns (weights, upper_weights)
+def weight_table(points):
+    xs, area = cumulative_area(points)
+    if area[-1] <= 1e-9:
+        # No area (flat at 0 or all points on one x), every intensity the curve covers is equally likely
+        lo, hi = xs[0], xs[-1]
+        if hi - lo < 1e-9:
+            lo, hi = lo - 0.5, lo + 0.5
+        xs = np.array([lo, hi])
+        area = xs - lo
+
+    edges = BIN_EDGES.copy()
+    edges[0] = min(edges[0], xs[0])
+    edges[-1] = max(edges[-1], xs[-1])
+    at_edges = np.interp(edges, xs, area)
+    weights = np.diff(at_edges)
+
+    # Second parameter only uses the upper half of the curve's intensity range
+    split_area = np.interp((xs[0] + xs[-1]) / 2, xs, area)
+    upper = np.diff(np.maximum(at_edges, split_area))
+    return weights, upper
+
+
+def compile_curve(points) -> CompiledCurve:
+    pts = tuple(sorted(((float(x), float(y)) for x, y in points), key=lambda p: p[0]))
+    curve = bezier_interpolate(pts)
+    weights, upper = weight_table(pts)
+
+    # No area in the upper half (the curve drops to 0 before its midpoint): the second parameter draws from
+    # the whole curve, never from a uniform 1-100 the curve doesn't allow
+    if upper.sum() <= 0:
+        upper = weights
+
+    for array in (curve, weights):
+        array.flags.writeable = False
+    return CompiledCurve(pts, curve, weights, _normalized_cdf(weights), _normalized_cdf(upper))
+
+
+# Compiles once per edit, every reader (plot, sampler) shares the same compiled curve
+class CurveModel:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.compiled = None
+
+    def get(self, points) -> CompiledCurve:
+        compiled = self.compiled
+        key = tuple(sorted(((float(x), float(y)) for x, y in points), key=lambda p: p[0]))
+        if compiled is not None and compiled.points == key:
+            return compiled
+        with self.lock:
+            if self.compiled is None or self.compiled.points != key:
+                self.compiled = compile_curve(key)
+            return self.compiled
+
+    def invalidate(self):
+        self.compiled = None
@@ -0,0 +1,137 @@
+from BenchCommon import RED, CYAN, RESET, bench_parser, report_header, write_report
+from dataclasses import replace
+import numpy as np
+import subprocess
+import argparse
+import logging
+import json
+import time
+import sys
+import os
+
+EDITORS = ("matplotlib", "canvas")
+STATE = {"curve_points": [(36, 0.5), (45, 0.4), (59, 0.25)], "min_duration": 0.5, "max_duration": 2.0, "cooldown_enabled": True, "presets": []}
+
+
+# ~~~      MEMORY      ~~~
+# Resident memory of this process in MB, None where it can't be read (macOS)
+def rss_mb():
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                                                     "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = Counters(cb=ctypes.sizeof(Counters))
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize / 2**20
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return None
+
+
+# ~~~      ONE EDITOR      ~~~
+# Runs in a fresh interpreter per editor, so the matplotlib one can't leave its imports behind for the other.
+# Builds the real window with the link's own build_ui and build_editor, then drags the middle point.
+def measure_editor(kind: str, frames: int) -> dict:
+    import VRChatShockerLink as link
+
+    link.settings = replace(link.settings, CURVE_EDITOR=kind)
+    link.CURVE_EDITOR = kind
+    link.build_ui()
+    link.apply_editor_state(STATE)
+    link.root.update()
+
+    # Everything the editor adds on top of the window: imports, construction and the first frame
+    before = rss_mb()
+    start = time.perf_counter()
+    link.build_editor()
+    link.root.update()
+    startup_ms = (time.perf_counter() - start) * 1000
+    after = rss_mb()
+
+    link.dragging_index = 1
+    frame_ms = []
+    for i in range(frames):
+        link.UI_CONTROL_POINTS[1] = (40 + (i % 40) * 0.4, 0.2 + (i % 7) * 0.1)
+        start = time.perf_counter()
+        link.render_curve()
+        link.root.update_idletasks()
+        frame_ms.append((time.perf_counter() - start) * 1000)
+    link.dragging_index = None
+    link.root.destroy()
+
+    return {
+        "editor": kind,
+        "startup_ms": round(startup_ms, 1),
+        "editor_mb": round(after - before, 1) if before is not None else None,
+        "process_mb": round(after, 1) if after is not None else None,
+        "frame_p50_ms": round(float(np.percentile(frame_ms, 50)), 2),
+        "frame_p99_ms": round(float(np.percentile(frame_ms, 99)), 2),
+    }
+
+
+def run_child(kind: str, frames: int) -> dict:
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, os.path.join(here, "EditorBench.py"), "--child", kind, "--frames", str(frames)],
+                            cwd=here, capture_output=True, text=True)
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode or not lines:
+        raise RuntimeError(f"{kind} editor run failed: {(result.stderr or result.stdout).strip().splitlines()[-1:]}")
+    return json.loads(lines[-1])
+
+
+# Median of every number over the runs
+def median_run(runs: list) -> dict:
+    merged = dict(runs[0])
+    for key, value in runs[0].items():
+        if isinstance(value, (int, float)):
+            merged[key] = round(float(np.median([r[key] for r in runs])), 2)
+    return merged
+
+
+def run(runs: int = 3, frames: int = 300) -> dict:
+    results = {kind: median_run([run_child(kind, frames) for _ in range(runs)]) for kind in EDITORS}
+    mpl, tk_canvas = results["matplotlib"], results["canvas"]
+    savings = {
+        "startup_ms": round(mpl["startup_ms"] - tk_canvas["startup_ms"], 1),
+        "startup_x": round(mpl["startup_ms"] / max(tk_canvas["startup_ms"], 1e-3), 1),
+        "frame_p50_x": round(mpl["frame_p50_ms"] / max(tk_canvas["frame_p50_ms"], 1e-3), 1),
+    }
+    if mpl["editor_mb"] is not None:
+        savings["memory_mb"] = round(mpl["editor_mb"] - tk_canvas["editor_mb"], 1)
+    return report_header(runs=runs, frames=frames, editors=results, savings=savings)
+
+
+def render(report) -> str:
+    keys = ["startup_ms", "editor_mb", "process_mb", "frame_p50_ms", "frame_p99_ms"]
+    lines = [f"[Editor] {CYAN}Curve editor, median of {report['runs']} runs, {report['frames']} drag frames each{RESET}",
+             f"{'editor':>10} | " + " | ".join(f"{k:>12}" for k in keys)]
+    for kind, r in report["editors"].items():
+        lines.append(f"{kind:>10} | " + " | ".join(f"{'-' if r[k] is None else r[k]:>12}" for k in keys))
+    lines.append(f"[Editor] {CYAN}Canvas saves{RESET} " + ", ".join(f"{k} {v}" for k, v in report["savings"].items()))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = bench_parser("Startup time, memory and frame time of the matplotlib and the Tk canvas curve editor.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per editor, the median is reported (default: 3)")
+    parser.add_argument("--frames", type=int, default=300, help="Drag frames drawn per run (default: 300)")
+    parser.add_argument("--child", choices=EDITORS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_editor(args.child, args.frames)))
+        sys.exit(0)
+
+    try:
+        report = run(args.runs, args.frames)
+    except RuntimeError as e:
+        logging.error(f"[Editor] {RED}{e}, the editors need a display to be measured{RESET}")
+        sys.exit(1)
+    write_report("Editor", report, args.json, render)
@@ -0,0 +1,152 @@
+from EngineProcess import EngineClient, configure_engine, serve_triggers, get_affinity
+from ConfigModel import load_config
+from BenchCommon import RED, YELLOW, CYAN, RESET, bench_parser, report_header, write_report, finish
+from threading import Event, Thread
+import numpy as np
+import logging
+import random
+import socket
+import os
+import time
+
+# Every trigger fires: mock shocker, no cooldowns, no merging, quiet trigger logs
+OVERRIDES = {"SHOCKER_BACKEND": "mock", "MERGE_WINDOW_S": 0.0, "SHOCKER_COOLDOWN_S": 0.0, "LOG_LEVELS": ("shocker=WARNING", "chatbox=WARNING")}
+STATE = {"curve_points": [(36, 0.5), (45, 0.4), (59, 0.25)], "min_duration": 0.5, "max_duration": 2.0, "cooldown_enabled": False, "presets": []}
+
+
+# ~~~      LOAD      ~~~
+# What dragging a point does to the GUI process: compile the curve and redraw the plot, as fast as it can
+def busy_gui(stop: Event, frames: list):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from CurveModel import compile_curve
+
+    fig = Figure(figsize=(5, 4))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    line, = ax.plot([], [])
+    rng = random.Random(0)
+    while not stop.is_set():
+        compiled = compile_curve([(36, rng.random()), (45 + rng.random() * 5, rng.random()), (59, rng.random())])
+        line.set_data(compiled.curve[:, 0], compiled.curve[:, 1])
+        ax.relim()
+        ax.autoscale_view()
+        canvas.draw()
+        frames.append(time.perf_counter())
+
+
+def trigger_datagram(address: str) -> bytes:
+    from pythonosc.osc_message_builder import OscMessageBuilder
+    builder = OscMessageBuilder(address=address)
+    builder.add_arg(1)
+    return builder.build().dgram
+
+
+# ~~~      TRIAL      ~~~
+# Sends count triggers every interval_s and matches them to the fired shocks in order.
+# Latency is from the send to the shocker backend call, both on the monotonic clock, so it includes
+# the time the packet waited for the engine's OSC thread.
+def run_trial(port: int, fired: list, address: str, busy: bool, count: int, interval_s: float) -> dict:
+    stop = Event()
+    frames = []
+    gui = Thread(target=busy_gui, args=(stop, frames), daemon=True) if busy else None
+    if gui:
+        gui.start()
+        time.sleep(0.5)     # Let matplotlib import and warm up
+
+    fired.clear()
+    datagram = trigger_datagram(address)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sent = []
+    start = time.perf_counter()
+    next_at = time.monotonic()
+    for _ in range(count):
+        sent.append(time.monotonic_ns())
+        sock.sendto(datagram, ("127.0.0.1", port))
+        next_at += interval_s
+        time.sleep(max(0.0, next_at - time.monotonic()))
+    deadline = time.monotonic() + 5
+    while len(fired) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if gui:
+        gui.join()
+    sock.close()
+
+    latency_us = np.array([(f[4] - s) / 1000 for s, f in zip(sent, fired)])
+    result = {"busy_gui": busy, "sent": count, "fired": len(fired)}
+    if latency_us.size:
+        result.update({
+            "p50_us": round(float(np.percentile(latency_us, 50)), 1),
+            "p99_us": round(float(np.percentile(latency_us, 99)), 1),
+            "max_us": round(float(latency_us.max()), 1),
+            "jitter_us": round(float(latency_us.std()), 1),
+        })
+    result["gui_fps"] = round(len(frames) / elapsed, 1)
+    return result
+
+
+# Engine threads in this process, next to the busy GUI thread
+def bench_in_process(address: str, count: int, interval_s: float) -> list:
+    import VRChatShockerLink as link
+
+    configure_engine(link, OVERRIDES)
+    link.apply_editor_state(STATE)
+    fired = []
+    link.shock_listeners.append(lambda *shock: fired.append(shock))
+    port = serve_triggers(link)
+    results = [run_trial(port, fired, address, busy, count, interval_s) for busy in (False, True)]
+    link.shocker_stop.set()
+    return results
+
+
+# Engine in its own process, the busy GUI thread stays here
+def bench_engine_process(address: str, count: int, interval_s: float) -> list:
+    fired = []
+    engine = EngineClient()
+    engine.listeners.append(lambda *shock: fired.append(shock))
+    engine.start(STATE, overrides=OVERRIDES, bench=True)
+    if not engine.ready.wait(30):
+        engine.stop()
+        raise RuntimeError("Engine process didn't come up")
+    results = [run_trial(engine.osc_port, fired, address, busy, count, interval_s) for busy in (False, True)]
+    engine.stop()
+    return results
+
+
+def run(count: int = 400, interval_s: float = 0.01) -> dict:
+    settings = load_config("config.yml")
+    if not settings.shock_address:
+        raise SystemExit(f"{RED}Set SHOCK_PARAMETER in config.yml, the benchmark sends to it{RESET}")
+    modes = {
+        # Engine process first, the in-process run leaves its threads behind
+        "engine_process": bench_engine_process(settings.shock_address, count, interval_s),
+        "in_process": bench_in_process(settings.shock_address, count, interval_s),
+    }
+    cores = len(get_affinity() or range(os.cpu_count()))
+    passed = all(r["fired"] == r["sent"] for results in modes.values() for r in results)
+    return report_header(cores=cores, triggers=count, interval_ms=interval_s * 1000, passed=passed, modes=modes)
+
+
+def render(report) -> str:
+    keys = ["fired", "p50_us", "p99_us", "max_us", "jitter_us", "gui_fps"]
+    lines = [f"[Engine] {CYAN}Trigger to shock latency, {report['triggers']} triggers every {report['interval_ms']:g}ms, {report['cores']} cores{RESET}",
+             f"{'mode':>15} | {'gui':>5} | " + " | ".join(f"{k:>9}" for k in keys)]
+    for mode, results in report["modes"].items():
+        for r in results:
+            lines.append(f"{mode:>15} | {'busy' if r['busy_gui'] else 'idle':>5} | " + " | ".join(f"{r.get(k, '-'):>9}" for k in keys))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = bench_parser("Trigger-to-shock latency with and without a busy GUI, engine in this process or its own.")
+    parser.add_argument("--count", type=int, default=400, help="Triggers per run (default: 400)")
+    parser.add_argument("--interval-ms", type=float, default=10, help="Time between triggers (default: 10)")
+    args = parser.parse_args()
+
+    report = run(args.count, args.interval_ms / 1000)
+    write_report("Engine", report, args.json, render)
+    if report["cores"] == 1:
+        logging.warning(f"[Engine] {YELLOW}Only one core, the engine process shares it with the GUI and can't be isolated from it{RESET}")
+    finish("Engine", report["passed"], "Not every trigger fired, the latencies above are incomplete")
@@ -0,0 +1,276 @@
+from multiprocessing.connection import Listener, Client
+from queue import Queue, Empty
+from collections import deque
+import subprocess
+import threading
+import argparse
+import logging
+import secrets
+import sys
+import os
+
+RED = "\033[31m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+STATUS_INTERVAL_S = 0.25
+KEY_ENV = "SHOCKER_ENGINE_KEY"
+
+# With ENGINE_PROCESS the OSC servers, sample pools, cooldowns and the shocker worker run in a second
+# Python process, so the editor's rendering never holds the GIL the trigger path needs.
+# The two sides talk over a multiprocessing connection (a named pipe on Windows, a unix socket elsewhere),
+# every message is (kind, payload):
+#   GUI -> engine   ("start", {state, overrides, bench})  first message
+#                   ("state", editor_state)               after every published profile
+#                   ("trigger", address)                  test buttons, handled like an OSC packet with value 1
+#                   ("stop", None)
+#   engine -> GUI   ("status", (service_status, cooldown_text))
+#                   ("shock", (session, intensity, duration_s, received_ns, fired_ns))
+#                   ("ready", osc_port)                   bench engines only
+
+
+# kernel32 with the types the affinity calls need, so the 64-bit handle and masks aren't cut to an int
+def _kernel32():
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.GetProcessAffinityMask.argtypes = [wintypes.HANDLE, ctypes.POINTER(ctypes.c_size_t), ctypes.POINTER(ctypes.c_size_t)]
+    kernel32.SetProcessAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
+    return kernel32
+
+
+# Cores this process may run on, None where they can't be read or set (macOS).
+# Linux has os.sched_*affinity, Windows the process affinity mask from kernel32.
+def get_affinity():
+    if hasattr(os, "sched_getaffinity"):
+        return set(os.sched_getaffinity(0))
+    if sys.platform == "win32":
+        import ctypes
+        process_mask, system_mask = ctypes.c_size_t(), ctypes.c_size_t()
+        kernel32 = _kernel32()
+        if kernel32.GetProcessAffinityMask(kernel32.GetCurrentProcess(), ctypes.byref(process_mask), ctypes.byref(system_mask)):
+            return {core for core in range(process_mask.value.bit_length()) if process_mask.value >> core & 1}
+    return None
+
+
+def set_affinity(cores):
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    elif sys.platform == "win32":
+        kernel32 = _kernel32()
+        if not kernel32.SetProcessAffinityMask(kernel32.GetCurrentProcess(), sum(1 << core for core in cores)):
+            logging.warning(f"[Engine] {YELLOW}Couldn't set the process affinity, the engine shares its cores{RESET}")
+
+
+# Last core for the engine, if there is more than one and the OS lets us pick (Linux and Windows)
+def engine_core():
+    cores = get_affinity()
+    if cores is None:
+        return None
+    cores = sorted(cores)
+    return cores[-1] if len(cores) > 1 else None
+
+
+# ~~~      ENGINE SIDE      ~~~
+# Config overrides (the benchmark's mock backend) applied before anything starts
+def configure_engine(link, overrides):
+    from ShockerBackends import make_backend
+    from dataclasses import replace
+
+    if not overrides:
+        return
+    link.settings = replace(link.settings, **overrides)
+    link.LogPipeline.set_levels(link.settings.LOG_LEVELS)
+    kind = link.settings.SHOCKER_BACKEND or ("pishock_serial" if link.settings.USE_PISHOCK else "openshock_serial")
+    link.backend = make_backend(kind, link.settings, reconnect=lambda: link.connect_serial())
+
+
+# Just the trigger path on a plain OSC server, no OSCQuery, journal or config watcher. Returns the OSC port.
+def serve_triggers(link):
+    from pythonosc.osc_server import BlockingOSCUDPServer
+    from VRC_OSCQuery import dict_to_dispatcher, vrc_client
+
+    link.main_session.chatbox.client = vrc_client(link.VRCHAT_HOST)
+    link.start_sample_pools(link.settings.sampler_seed)
+    link.backend.start()
+    link.connect_serial()
+    link.shocker_thread.start()
+    server = BlockingOSCUDPServer(("127.0.0.1", 0), dict_to_dispatcher(link.osc_routes(link.settings)))
+    threading.Thread(target=server.serve_forever, name="osc", daemon=True).start()
+    return server.server_address[1]
+
+
+# Shocks as they fire, and the service status whenever it changed
+def forward_events(link, conn, events):
+    last = None
+    while True:
+        try:
+            event = events.get(timeout=STATUS_INTERVAL_S)
+        except Empty:
+            event = None
+        try:
+            if event is not None:
+                conn.send(event)
+            status = (dict(link.service_status), link.cooldown_status_text())
+            if status != last:
+                conn.send(("status", status))
+                last = status
+        except (OSError, EOFError):
+            return
+
+
+def run_engine(address, core=None):
+    key = os.environ.pop(KEY_ENV, None)
+    if key is None:
+        logging.error(f"[Engine] {RED}{KEY_ENV} isn't set. The engine process is started by VRChatShockerLink.py with ENGINE_PROCESS: True, not on its own{RESET}")
+        sys.exit(1)
+    conn = Client(address, authkey=bytes.fromhex(key))
+    if core is not None:
+        # Before anything is imported, every thread started from here on inherits it
+        set_affinity({core})
+
+    import VRChatShockerLink as link
+    _, start = conn.recv()
+    configure_engine(link, start["overrides"])
+    link.apply_editor_state(start["state"])
+
+    events = Queue()
+    link.shock_listeners.append(lambda *shock: events.put(("shock", shock)))
+    if start["bench"]:
+        conn.send(("ready", serve_triggers(link)))
+    else:
+        link.start_services()
+    threading.Thread(target=forward_events, args=(link, conn, events), name="engine-events", daemon=True).start()
+    logging.info(f"[Engine] {CYAN}Engine process running{' on core ' + str(core) if core is not None else ''}{RESET}")
+
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except (EOFError, OSError):
+            logging.warning(f"[Engine] {YELLOW}Lost the GUI, shutting down{RESET}")
+            break
+        if kind == "state":
+            link.apply_editor_state(payload)
+        elif kind == "trigger":
+            link.handle_osc_packet(payload, 1)
+        elif kind == "stop":
+            break
+
+    if not start["bench"]:
+        link.stop_services()
+    link.LogPipeline.stop_logging()
+    os._exit(0)
+
+
+# ~~~      GUI SIDE      ~~~
+# Starts the engine process and keeps service_status and the cooldown text in sync with it.
+# send_state() can be called right away, the latest state is held until the engine has connected.
+class EngineClient:
+    def __init__(self, service_status: dict = None):
+        self.service_status = service_status if service_status is not None else {}
+        self.cooldown_text = "Cooldown: -"
+        self.shocks = deque(maxlen=256)     # Last shock events
+        self.listeners = []                 # Called with every shock event
+        self.osc_port = None
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pending = None
+        self.stopping = False
+        self.process = None
+        self.listener = None
+
+    def start(self, state: dict, overrides: dict = None, bench: bool = False):
+        key = secrets.token_bytes(16)
+        self.listener = Listener(authkey=key)
+        core = engine_core()
+        here = os.path.dirname(os.path.abspath(__file__))
+        args = [sys.executable, os.path.join(here, "EngineProcess.py"), "--engine", str(self.listener.address)]
+        if core is not None:
+            args += ["--core", str(core)]
+        # --capture-osc and --profile-startup are read by the engine
+        args += [arg for arg in sys.argv[1:] if arg.startswith("--")]
+        self.process = subprocess.Popen(args, cwd=here, env=dict(os.environ, **{KEY_ENV: key.hex()}))
+        if core is not None:
+            set_affinity(get_affinity() - {core})
+
+        self.start_message = ("start", {"state": state, "overrides": overrides or {}, "bench": bench})
+        threading.Thread(target=self._run, name="engine-link", daemon=True).start()
+        logging.info(f"[Engine] {RESET}Started engine process {CYAN}{self.process.pid}{RESET}")
+        return self
+
+    def _run(self):
+        conn = self.listener.accept()
+        with self.lock:
+            conn.send(self.start_message)
+            if self.pending is not None:
+                conn.send(("state", self.pending))
+                self.pending = None
+            self.conn = conn
+
+        while True:
+            try:
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                if not self.stopping:
+                    logging.error(f"[Engine] {RED}Engine process exited, shocks are disabled until restart{RESET}")
+                    self.service_status.update({name: "failed" for name in self.service_status})
+                return
+            if kind == "status":
+                status, self.cooldown_text = payload
+                self.service_status.update(status)
+            elif kind == "shock":
+                self.shocks.append(payload)
+                for listener in self.listeners:
+                    listener(*payload)
+            elif kind == "ready":
+                self.osc_port = payload
+                self.ready.set()
+
+    def send_state(self, state: dict):
+        with self.lock:
+            if self.conn is None:
+                self.pending = state
+                return
+            try:
+                self.conn.send(("state", state))
+            except OSError:
+                pass
+
+    # Test button press, dropped while the engine hasn't connected yet like an OSC packet would be
+    def send_trigger(self, address: str):
+        with self.lock:
+            if self.conn is None:
+                logging.warning(f"[Engine] {YELLOW}Engine process not connected yet, test shock dropped{RESET}")
+                return
+            try:
+                self.conn.send(("trigger", address))
+            except OSError:
+                pass
+
+    def stop(self, timeout_s: float = 3):
+        self.stopping = True
+        with self.lock:
+            try:
+                if self.conn is not None:
+                    self.conn.send(("stop", None))
+            except OSError:
+                pass
+        if self.process is not None:
+            try:
+                self.process.wait(timeout_s)
+            except subprocess.TimeoutExpired:
+                logging.warning(f"[Engine] {YELLOW}Engine process didn't stop in time, killing it{RESET}")
+                self.process.kill()
+        if self.listener is not None:
+            self.listener.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shocker engine process, started by VRChatShockerLink.py with ENGINE_PROCESS: True.")
+    parser.add_argument("--engine", required=True, metavar="ADDRESS", help="Connection address of the GUI")
+    parser.add_argument("--core", type=int, help="Pin the engine to this core")
+    args, _ = parser.parse_known_args()
+    run_engine(args.engine, args.core)
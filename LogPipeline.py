@@ -0,0 +1,112 @@
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+import threading
+import logging
+import atexit
+import time
+
+YELLOW = "\033[33m"
+RESET = "\033[0m"
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+RATE_LIMIT_S = 2.0      # Same rate limited line at most once per this many seconds
+RATE_LIMITED = {"rate_limit": True}     # Pass as extra= to opt a repetitive line into the rate limit
+
+listener = None
+
+
+# Hands the record to the listener as is, the message is only formatted on the listener thread.
+# Records with an exception are prepared the normal way so the traceback isn't kept alive.
+class LazyQueueHandler(QueueHandler):
+    def prepare(self, record):
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+
+# Lets a repeated line through once per interval, keyed by logger and message template. Only lines logged with
+# extra=RATE_LIMITED are limited (reconnect spam, "Selected shocker"), everything else, shock and cooldown outcomes
+# included, passes straight through without a lock. How many were skipped goes out as its own line before the next one.
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval_s: float = RATE_LIMIT_S):
+        super().__init__()
+        self.interval_s = interval_s
+        self.last = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, "rate_limit", False):
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            last, skipped = self.last.get(key, (float("-inf"), 0))
+            if now - last < self.interval_s:
+                self.last[key] = (last, skipped + 1)
+                return False
+            self.last[key] = (now, 0)
+        if skipped:
+            logging.getLogger(record.name).log(record.levelno, f"{YELLOW}(%d similar lines skipped){RESET}", skipped)
+        return True
+
+
+# Moves the root logger's handlers (from basicConfig) behind a queue, so logging on the trigger path
+# is only a level check and an enqueue. Safe to call more than once.
+def start_logging():
+    global listener
+    if listener is not None:
+        return listener
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    if not handlers:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+        handlers = root.handlers[:]
+
+    # Nothing prints the caller, process or thread, skip collecting them for every record (see "Optimization" in the logging docs)
+    logging._srcfile = None
+    logging.logProcesses = logging.logMultiprocessing = False
+
+    log_queue = SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_logging)
+    return listener
+
+
+# Writes out whatever is still queued
+def stop_logging():
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
+
+
+# Parses "name=LEVEL" entries, returns {logger name: level}. Unknown levels are skipped with a warning.
+def parse_levels(entries) -> dict:
+    levels = {}
+    for entry in entries:
+        name, _, level = entry.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if not name or level not in LEVELS:
+            logging.warning(f"[Logging] {YELLOW}Ignoring log level {entry!r}, expected name={'/'.join(LEVELS)}{RESET}")
+            continue
+        levels[name] = level
+    return levels
+
+
+# Per-subsystem levels, "root" sets the default for everything else. Subsystems left out go back to inheriting.
+applied_levels = {}
+def set_levels(entries):
+    global applied_levels
+    levels = parse_levels(entries)
+    for name in applied_levels.keys() - levels.keys():
+        logging.getLogger(None if name == "root" else name).setLevel(logging.INFO if name == "root" else logging.NOTSET)
+    for name, level in levels.items():
+        logging.getLogger(None if name == "root" else name).setLevel(level)
+    applied_levels = levels
@@ -0,0 +1,155 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import logging
+
+RED = "\033[31m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+PREFIX = "shocker_link_"
+MAX_SHOCKERS = 256
+
+# (name, help) of every counter, all of them exist from the start so the hot path only does `metrics.inc(name)`.
+# Several threads count the same thing (one OSC server per session, the Tk test buttons, chatbox timers).
+# Each thread counts into its own shard, so an increment is a plain dict update with no lock and no lost updates.
+# The scrape sums the shards, the lock is only taken there and the first time a thread counts something.
+COUNTERS = [
+    ("osc_triggers_received", "Shock parameter packets with a trigger value"),
+    ("osc_triggers_accepted", "Shock triggers that passed the cooldown and were queued"),
+    ("cooldown_rejections", "Shock triggers rejected by a parameter cooldown"),
+    ("early_trigger_drops", "Shock triggers dropped because the device wasn't ready"),
+    ("serial_write_errors", "Failed writes to the serial port"),
+    ("serial_reconnects", "Serial reconnect attempts"),
+    ("chatbox_sent", "Chatbox messages sent to VRChat"),
+    ("chatbox_suppressed", "Chatbox messages skipped by the message cooldown"),
+]
+
+
+def new_shard() -> dict:
+    shard = dict.fromkeys((name for name, _ in COUNTERS), 0)
+    shard.update(shocks_fired=[0] * MAX_SHOCKERS, render_seconds_sum=0.0, render_frames=0)
+    return shard
+
+
+class Metrics:
+    __slots__ = ["local", "shards", "retired", "collectors", "lock"]
+
+    def __init__(self):
+        self.local = threading.local()
+        self.shards = []                # (thread, shard) of every thread that counted something
+        self.retired = new_shard()      # Sums of the threads that have exited
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = new_shard()
+            with self.lock:
+                self.shards.append((threading.current_thread(), shard))
+            return shard
+
+    def inc(self, name: str, amount: int = 1):
+        self._shard()[name] += amount
+
+    def shock_fired(self, index: int):
+        self._shard()["shocks_fired"][index] += 1
+
+    def observe_render(self, seconds: float):
+        shard = self._shard()
+        shard["render_seconds_sum"] += seconds
+        shard["render_frames"] += 1
+
+    # Sum of every shard. Shards of exited threads are folded into `retired`, so short-lived threads
+    # (chatbox timers) don't pile up.
+    def totals(self) -> dict:
+        with self.lock:
+            alive = []
+            for thread, shard in self.shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._add(self.retired, shard)
+            self.shards = alive
+            total = new_shard()
+            self._add(total, self.retired)
+            for _, shard in alive:
+                self._add(total, shard)
+        return total
+
+    @staticmethod
+    def _add(total, shard):
+        for key, value in shard.items():
+            if key == "shocks_fired":
+                total[key] = [a + b for a, b in zip(total[key], value)]
+            else:
+                total[key] += value
+
+    # Values that already live somewhere else (queue depths, pool rebuilds) are read when scraped.
+    # fn returns a number, or a dict of {label value: number} for one labelled series per entry.
+    def register(self, name: str, kind: str, help_text: str, fn, label: str = None):
+        self.collectors.append((name, kind, help_text, fn, label))
+
+    # Prometheus text exposition format
+    def render(self) -> str:
+        lines = []
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        total = self.totals()
+        for name, help_text in COUNTERS:
+            family(f"{name}_total", "counter", help_text)
+            lines.append(f"{PREFIX}{name}_total {total[name]}")
+
+        family("shocks_fired_total", "counter", "Shocks sent to a shocker")
+        for index, count in enumerate(total["shocks_fired"]):
+            if count:
+                lines.append(f'{PREFIX}shocks_fired_total{{shocker="{index}"}} {count}')
+
+        family("render_frame_seconds", "summary", "Time from a curve edit until the plot was drawn")
+        lines.append(f"{PREFIX}render_frame_seconds_sum {total['render_seconds_sum']:.6f}")
+        lines.append(f"{PREFIX}render_frame_seconds_count {total['render_frames']}")
+
+        for name, kind, help_text, fn, label in self.collectors:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            family(name, kind, help_text)
+            if isinstance(value, dict):
+                lines += [f'{PREFIX}{name}{{{label}="{key}"}} {v}' for key, v in value.items()]
+            else:
+                lines.append(f"{PREFIX}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# Serves /metrics on 127.0.0.1 only, returns the server or None if the port couldn't be opened
+def start_metrics_server(port: int, source: Metrics = metrics):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = source.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *a): pass
+
+    try:
+        httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    except OSError as e:
+        logging.error(f"[Metrics] {RED}Failed to open the metrics port {port}: {e}{RESET}")
+        return None
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"[Metrics] {CYAN}Serving metrics on http://127.0.0.1:{httpd.server_address[1]}/metrics{RESET}")
+    return httpd
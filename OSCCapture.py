@@ -0,0 +1,218 @@
+from pathlib import Path
+import threading
+import argparse
+import logging
+import struct
+import time
+import sys
+
+RED = "\033[31m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+# ~~~      FORMAT      ~~~
+# File header: magic, version, wall clock and monotonic time when the capture started
+HEADER = struct.Struct("<4sHdQ")
+MAGIC = b"OSCC"
+VERSION = 1
+
+# Per datagram: nanoseconds since the capture started and the datagram length, followed by the raw bytes
+RECORD = struct.Struct("<QH")
+
+CAPTURE_DIR = "captures"
+
+
+def capture_requested() -> bool:
+    return any(arg == "--capture-osc" or arg.startswith("--capture-osc=") for arg in sys.argv)
+
+
+def capture_output_path() -> Path:
+    for arg in sys.argv:
+        if arg.startswith("--capture-osc=") and arg.split("=", 1)[1]:
+            return Path(arg.split("=", 1)[1])
+    return Path(CAPTURE_DIR) / time.strftime("osc-%Y%m%d-%H%M%S.osccap")
+
+
+# ~~~      CAPTURE      ~~~
+# Set as `capture` on a RouteDispatcher, gets every datagram before it is dispatched
+class CaptureWriter:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.count = 0
+        self.start_ns = time.monotonic_ns()
+        self.file = open(self.path, "wb", buffering=64 * 1024)
+        self.file.write(HEADER.pack(MAGIC, VERSION, time.time(), self.start_ns))
+
+    def write(self, received_ns: int, data: bytes) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(RECORD.pack(received_ns - self.start_ns, len(data)))
+            self.file.write(data)
+            self.count += 1
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.close()
+            self.file = None
+        logging.info(f"[OSC Capture] {CYAN}Wrote {self.count} datagrams to {self.path}{RESET}")
+
+
+# Yields (nanoseconds since capture start, datagram)
+def read_capture(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} is not an OSC capture")
+        magic, version, _, _ = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an OSC capture (version {version})")
+
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return
+            t_ns, length = RECORD.unpack(head)
+            data = f.read(length)
+            if len(data) < length:
+                return  # Capture was cut off mid-write
+            yield t_ns, data
+
+
+# ~~~      REPLAY      ~~~
+# Feeds a capture through `dispatcher` at `speed` times the recorded pace, speed 0 means as fast as possible.
+# on_packet(t_ns) is called before each datagram with its capture time, so callers can drive a virtual clock.
+def replay(path, dispatcher, speed: float = 1.0, on_packet=None) -> dict:
+    packets = list(read_capture(path))
+    dispatch_ns = []
+    lateness_ns = []
+    client = ("127.0.0.1", 0)
+
+    start = time.perf_counter_ns()
+    for t_ns, data in packets:
+        if speed > 0:
+            due = start + int(t_ns / speed)
+            remaining = due - time.perf_counter_ns()
+            # Sleep most of the wait, spin the last millisecond so the pace stays accurate
+            if remaining > 1_000_000:
+                time.sleep((remaining - 1_000_000) / 1e9)
+            while time.perf_counter_ns() < due:
+                pass
+            lateness_ns.append(time.perf_counter_ns() - due)
+
+        if on_packet is not None:
+            on_packet(t_ns)
+        before = time.perf_counter_ns()
+        dispatcher.call_handlers_for_packet(data, client)
+        dispatch_ns.append(time.perf_counter_ns() - before)
+    elapsed = (time.perf_counter_ns() - start) / 1e9
+
+    stats = {
+        "packets": len(packets),
+        "recorded_s": round(packets[-1][0] / 1e9, 3) if packets else 0.0,
+        "replayed_s": round(elapsed, 3),
+        "packets_per_s": round(len(packets) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    if dispatch_ns:
+        dispatch_ns.sort()
+        stats["dispatch_p50_us"] = round(dispatch_ns[len(dispatch_ns) // 2] / 1000, 1)
+        stats["dispatch_p99_us"] = round(dispatch_ns[int(len(dispatch_ns) * 0.99)] / 1000, 1)
+        stats["dispatch_max_us"] = round(dispatch_ns[-1] / 1000, 1)
+    if lateness_ns:
+        lateness_ns.sort()
+        stats["lateness_p99_us"] = round(lateness_ns[int(len(lateness_ns) * 0.99)] / 1000, 1)
+    return stats
+
+
+# Stands in for the VRChat chatbox during a replay
+class NullOSCClient:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, address, value):
+        self.messages.append((address, value))
+
+
+# Replays a capture through the real trigger path (cooldown, sampling, shocker worker) against a MockBackend
+def replay_trigger_path(path, speed: float = 1.0, seed: int = None) -> dict:
+    import VRChatShockerLink as link
+    from ShockerBackends import MockBackend
+    from VRC_OSCQuery import dict_to_dispatcher
+
+    fake = MockBackend()
+    link.load_config_from_file()
+    link.main_session.chatbox.client = NullOSCClient()
+    link.backend = fake
+    link.connect_serial()
+    seed = link.settings.sampler_seed if seed is None else seed
+    if seed is not None:
+        link.random.seed(seed)
+    link.start_sample_pools(seed)
+
+    # Cooldowns run on capture time, so they behave like the recording at any replay speed
+    first = time.monotonic()
+    link.trigger_clock = lambda: virtual_now
+    def on_packet(t_ns):
+        nonlocal virtual_now
+        virtual_now = first + t_ns / 1e9
+    virtual_now = first
+
+    routes = link.osc_routes(link.settings)
+    triggers = 0
+    def counting(handler):
+        def wrapped(address, *args):
+            nonlocal triggers
+            if args and args[0] == 1:
+                triggers += 1
+            handler(address, *args)
+        return wrapped
+    dispatcher = dict_to_dispatcher({route: counting(handler) for route, handler in routes.items()})
+
+    link.shocker_thread.start()
+    stats = replay(path, dispatcher, speed, on_packet)
+
+    # Let the worker drain what's still queued
+    deadline = time.monotonic() + 5
+    while not link.shock_q.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    link.shocker_stop.set()
+    link.main_session.chatbox.cancel()
+
+    stats["triggers"] = triggers
+    stats["fired"] = len(fake.shocks)
+    stats["suppressed"] = triggers - len(fake.shocks)  # Cooldowns and merges
+    stats["intensity_sum"] = sum(intensity for _, intensity, _, _ in fake.shocks)
+    queue = link.shock_q.stats()
+    stats["strong_jumped_ahead"] = queue["jumped_ahead"]
+    stats["merged_triggers"] = queue["merged_triggers"]
+    stats.update(fake.timings())
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Replay an OSC capture made with --capture-osc through the trigger path against a fake shocker.")
+    parser.add_argument("capture", help="Path to a .osccap file")
+    parser.add_argument("--speed", default="1", help='Replay speed, 1 for real time, N for N times faster or "max" (default: 1)')
+    parser.add_argument("--seed", type=int, default=None, help="Sampler seed, defaults to SAMPLER_SEED from config.yml")
+    args = parser.parse_args()
+
+    speed = 0.0 if args.speed == "max" else float(args.speed)
+    if speed < 0:
+        parser.error("--speed must be a positive number or max")
+
+    # The trigger path logs every shock, keep the output to the summary
+    logging.getLogger().setLevel(logging.WARNING)
+    stats = replay_trigger_path(args.capture, speed, args.seed)
+    logging.getLogger().setLevel(logging.INFO)
+
+    width = max(len(k) for k in stats)
+    lines = [f"[OSC Replay] {CYAN}{args.capture} at {'max' if speed == 0 else f'{speed:g}x'} speed{RESET}"]
+    lines += [f"{key:<{width}} | {value}" for key, value in stats.items()]
+    logging.info("\n".join(lines))
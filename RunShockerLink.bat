@@ -28,7 +28,7 @@ echo [%~n0] Installing requirements (Requires python 3.11+ ideally)
 python -m pip install -r Requirements.txt -q
 
 echo [%~n0] Running Shocker Link...
-python VRChatShockerLink.py
+python VRChatShockerLink.py %*
 goto :EOF
 
 :END
@@ -0,0 +1,112 @@
+from collections import deque
+import numpy as np
+import threading
+import logging
+
+RED = "\033[31m"
+RESET = "\033[0m"
+
+FULL, UPPER = 0, 1
+
+
+# Pre-drawn (intensity, duration) pairs for one curve/duration setup.
+# Each stream has its own Generator seeded from (seed, version, stream), so the values it hands out
+# are the same for a given seed no matter when the refill thread runs.
+class _PoolState:
+    def __init__(self, intensities, cdf, upper_cdf, min_duration, max_duration, batch_size, seed, version):
+        self.intensities = np.asarray(intensities)
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.cdfs = [np.asarray(cdf), np.asarray(upper_cdf)]
+        self.rngs = [np.random.default_rng(None if seed is None else (seed, version, stream)) for stream in (FULL, UPPER)]
+        self.streams = [deque(), deque()]
+
+    def top_up(self, stream):
+        with self.lock:
+            if len(self.streams[stream]) >= self.batch_size // 4:
+                return
+            rng = self.rngs[stream]
+            picks = np.searchsorted(self.cdfs[stream], rng.random(self.batch_size), side="right")
+            picks = np.minimum(picks, len(self.cdfs[stream]) - 1)
+            intensities = self.intensities[picks].astype(int)
+            durations = np.round(rng.uniform(self.min_duration, self.max_duration, self.batch_size), 1)
+            self.streams[stream].extend(zip(intensities.tolist(), durations.tolist()))
+
+
+# Hands out (intensity_percent, duration_s) pairs in O(1), a background thread keeps the batches topped up.
+# source() returns (intensities, cdf, upper_cdf, min_duration, max_duration) and is read again after invalidate().
+# The cdfs are normalized cumulative weights over intensities, upper_cdf is used for the second parameter.
+class SamplePool:
+    def __init__(self, source, batch_size: int = 4096, seed: int = None):
+        self.source = source
+        self.batch_size = batch_size
+        self.seed = seed
+        self.version = 0
+        self.rebuilds = 0
+        self.state = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="sample-pool", daemon=True)
+
+    def start(self):
+        self._rebuild()
+        self.thread.start()
+        self.wake.set()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake.set()
+
+    # Curve, durations or preset changed. Builds the new batches on the caller's thread and swaps them in
+    # with one assignment, so draw() switches to the new curve at once and never has to rebuild itself.
+    def invalidate(self):
+        with self.lock:
+            self.version += 1
+            self.state = self._build()
+            self.rebuilds += 1
+        self.wake.set()
+
+    def draw(self, upper: bool = False):
+        state = self.state or self._rebuild()
+        stream = UPPER if upper else FULL
+        values = state.streams[stream]
+        try:
+            value = values.popleft()
+        except IndexError:
+            # Refill thread fell behind, draw the next batch here
+            state.top_up(stream)
+            value = values.popleft()
+        if len(values) < self.batch_size // 4:
+            self.wake.set()
+        return value
+
+    def _build(self):
+        state = _PoolState(*self.source(), self.batch_size, self.seed, self.version)
+        for stream in (FULL, UPPER):
+            state.top_up(stream)
+        return state
+
+    # Only before the first invalidate() or start()
+    def _rebuild(self):
+        with self.lock:
+            if self.state is None:
+                self.state = self._build()
+                self.rebuilds += 1
+            return self.state
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.wake.wait()
+            self.wake.clear()
+            if self.stop_event.is_set():
+                return
+            try:
+                state = self.state or self._rebuild()
+                for stream in (FULL, UPPER):
+                    state.top_up(stream)
+            except Exception:
+                logging.exception(f"[Sampler] {RED}Failed to refill the sample pool{RESET}")
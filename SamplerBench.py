@@ -0,0 +1,197 @@
+from CurveModel import CurveModel, compile_curve, bezier_interpolate, INTENSITIES, BIN_EDGES
+from SamplePool import SamplePool
+from BenchCommon import CYAN, RESET, bench_parser, report_header, check_line, write_report, finish
+import numpy as np
+import random
+import math
+import time
+
+# Curve shapes the checks run on, (name, points)
+SHAPES = [
+    ("default", [(36, 0.5), (45, 0.4), (59, 0.25)]),
+    ("steep", [(10, 0.05), (12, 1.0), (90, 0.02)]),
+    ("flat", [(20, 0.5), (50, 0.5), (80, 0.5)]),
+    ("bimodal", [(20, 0.1), (30, 0.9), (50, 0.05), (70, 0.9), (90, 0.1)]),
+    ("narrow", [(48.6, 0.3), (50.2, 1.0), (51.9, 0.3)]),
+]
+
+P_VALUE_THRESHOLD = 1e-3
+POINT_COUNTS = [3, 5, 9, 17, 33]    # Curve sizes the timings run on
+
+
+# ~~~      REFERENCE      ~~~
+# Area under the drawn curve per intensity, computed independently of CurveModel.weight_table:
+# a very fine midpoint sum over the Bezier, binned with np.histogram
+# upper=True keeps only the upper half of the curve's intensity range, like the second parameter
+def reference_weights(points, resolution: int = 400_000, upper: bool = False):
+    curve = bezier_interpolate(points, resolution)
+    dx = np.diff(curve[:, 0])
+    mid_x = (curve[1:, 0] + curve[:-1, 0]) / 2
+    mid_y = np.clip((curve[1:, 1] + curve[:-1, 1]) / 2, 0, 1)
+    if upper:
+        mid_y = np.where(mid_x >= (curve[0, 0] + curve[-1, 0]) / 2, mid_y, 0.0)
+    edges = BIN_EDGES.copy()
+    edges[0] = min(edges[0], mid_x.min())
+    edges[-1] = max(edges[-1], mid_x.max())
+    weights, _ = np.histogram(mid_x, bins=edges, weights=mid_y * dx)
+    return weights
+
+
+# Upper tail of the chi-square distribution, Wilson-Hilferty approximation (no scipy needed)
+def chi_square_pvalue(stat: float, dof: int) -> float:
+    if dof <= 0:
+        return 1.0
+    z = ((stat / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+# Pearson chi-square of observed counts against expected probabilities, small bins are merged so each expects >= 5
+def chi_square(counts, probabilities):
+    total = counts.sum()
+    expected = probabilities * total
+    keep = expected > 0
+    counts, expected = counts[keep], expected[keep]
+
+    merged_obs, merged_exp, obs, exp = [], [], 0.0, 0.0
+    for o, e in zip(counts, expected):
+        obs += o
+        exp += e
+        if exp >= 5:
+            merged_obs.append(obs)
+            merged_exp.append(exp)
+            obs = exp = 0.0
+    if exp > 0 and merged_exp:
+        merged_obs[-1] += obs
+        merged_exp[-1] += exp
+
+    merged_obs, merged_exp = np.array(merged_obs), np.array(merged_exp)
+    stat = float(((merged_obs - merged_exp) ** 2 / merged_exp).sum())
+    dof = len(merged_exp) - 1
+    return stat, dof, chi_square_pvalue(stat, dof)
+
+
+# Kolmogorov-Smirnov distance between the empirical and target CDF over the intensities.
+# The asymptotic p-value is conservative for a discrete distribution, a pass here is a real pass.
+def ks_test(counts, probabilities):
+    n = counts.sum()
+    distance = float(np.abs(np.cumsum(counts) / n - np.cumsum(probabilities)).max())
+    lam = (math.sqrt(n) + 0.12 + 0.11 / math.sqrt(n)) * distance
+    if lam < 1e-3:
+        return distance, 1.0
+    p_value = 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam) for k in range(1, 101))
+    return distance, min(max(p_value, 0.0), 1.0)
+
+
+def draw_counts(compiled, draws: int, upper: bool = False, seed: int = 0):
+    pool = SamplePool(lambda: (INTENSITIES, compiled.cdf, compiled.upper_cdf, 1.0, 1.0), seed=seed)
+    counts = np.zeros(len(INTENSITIES), dtype=np.int64)
+    for _ in range(draws):
+        counts[pool.draw(upper)[0] - 1] += 1
+    return counts
+
+
+# ~~~      CHECKS      ~~~
+# Weight table against the reference integral, then the sampler's draws against the drawn curve.
+# upper=True checks the second parameter's half of the curve.
+def check_weight_table(name, points, draws: int = 200_000, seed: int = 0, upper: bool = False) -> dict:
+    compiled = compile_curve(points)
+    reference = reference_weights(points, upper=upper)
+    target = reference / reference.sum()
+    table = np.diff(compiled.upper_cdf if upper else compiled.cdf, prepend=0.0)
+
+    counts = draw_counts(compiled, draws, upper=upper, seed=seed)
+    stat, dof, p_value = chi_square(counts, target)
+    ks_distance, ks_p_value = ks_test(counts, target)
+    result = {
+        "shape": name,
+        "selection": "upper_half" if upper else "full_curve",
+        "points": len(points),
+        "draws": draws,
+        "table_max_abs_error": float(np.abs(table - target).max()),
+        "chi_square": round(stat, 2),
+        "dof": dof,
+        "chi_square_p": round(p_value, 6),
+        "ks_distance": round(ks_distance, 6),
+        "ks_p": round(ks_p_value, 6),
+    }
+    result["passed"] = (result["table_max_abs_error"] < 1e-4
+                        and p_value > P_VALUE_THRESHOLD and ks_p_value > P_VALUE_THRESHOLD)
+    return result
+
+
+# ~~~      TIMINGS      ~~~
+# Evenly spread points with random weights, the same seed gives the same curves
+def random_points(n: int, rng) -> list:
+    xs = np.linspace(10, 90, n)
+    ys = rng.uniform(0.05, 1.0, n)
+    return [(float(x), float(y)) for x, y in zip(xs, ys)]
+
+
+# Best of `repeat` runs, in calls per second
+def calls_per_second(fn, number: int, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return number / best
+
+
+def time_point_count(n: int, seed: int = 0, draws: int = 100_000) -> dict:
+    rng = np.random.default_rng(seed)
+    points = random_points(n, rng)
+    compiled = compile_curve(points)
+    model = CurveModel()
+
+    def recompile():
+        model.invalidate()
+        model.get(points)
+
+    pool = SamplePool(lambda: (INTENSITIES, compiled.cdf, compiled.upper_cdf, 0.5, 2.0), seed=seed)
+    pool.draw()
+
+    # What handle_osc_packet did before the sample pool, kept as the baseline
+    curve = bezier_interpolate(points, 100)
+    legacy_x, legacy_y = curve[:, 0].astype(int), curve[:, 1]
+    def legacy_draw():
+        int(random.choices(legacy_x, weights=legacy_y, k=1)[0])
+        round(random.uniform(0.5, 2.0), 1)
+
+    return {
+        "points": n,
+        "bezier_interpolate_per_s": round(calls_per_second(lambda: bezier_interpolate(points), 2_000)),
+        "compute_curve_distribution_per_s": round(calls_per_second(recompile, 200)),
+        "draws_per_s": round(calls_per_second(pool.draw, draws)),
+        "upper_draws_per_s": round(calls_per_second(lambda: pool.draw(True), draws)),
+        "legacy_draws_per_s": round(calls_per_second(legacy_draw, draws // 10)),
+    }
+
+
+def run(draws: int = 200_000, seed: int = 0) -> dict:
+    checks = [check_weight_table(name, points, draws, seed, upper)
+              for name, points in SHAPES for upper in (False, True)]
+    timings = [time_point_count(n, seed) for n in POINT_COUNTS]
+    return report_header(numpy=np.__version__, seed=seed, passed=all(c["passed"] for c in checks), checks=checks, timings=timings)
+
+
+def render(report) -> str:
+    lines = [check_line("Sampler", r["passed"], f"{r['shape']:<8} {r['selection']:<10} | table error {r['table_max_abs_error']:.2e} | "
+                                                f"chi2 {r['chi_square']:>8} (dof {r['dof']:>3}) p={r['chi_square_p']:.4f} | "
+                                                f"KS {r['ks_distance']:.4f} p={r['ks_p']:.4f}")
+             for r in report["checks"]]
+    keys = [k for k in report["timings"][0] if k != "points"]
+    lines += [f"[Sampler] {CYAN}Calls per second{RESET}", f"{'points':>6} | " + " | ".join(f"{k.removesuffix('_per_s'):>26}" for k in keys)]
+    lines += [f"{t['points']:>6} | " + " | ".join(f"{t[k]:>26,}" for k in keys) for t in report["timings"]]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = bench_parser("Checks the sampler against the curve and times it.")
+    parser.add_argument("--draws", type=int, default=200_000, help="Draws per accuracy check (default: 200000)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the draws and the generated curves (default: 0)")
+    args = parser.parse_args()
+
+    report = run(args.draws, args.seed)
+    write_report("Sampler", report, args.json, render)
+    finish("Sampler", report["passed"], "Sampler doesn't match the curve")
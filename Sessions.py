@@ -0,0 +1,161 @@
+from VRC_OSCQuery import vrc_client, dict_to_dispatcher, start_osc_servers, OSCQueryAdvertiser
+from Metrics import metrics
+from CurveModel import CurveModel
+from collections import deque
+import numpy as np
+import threading
+import logging
+import time
+
+RED = "\033[31m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+MESSAGE_COOLDOWN = 1.2          # VRC Message Cooldown
+chat_log = logging.getLogger("chatbox")
+
+
+# Chatbox of one VRChat instance, with the message cooldown and auto-clear
+class Chatbox:
+    def __init__(self, client=None):
+        self.client = client
+        self.clear_timer = None                 # Timer for clearing messages
+        self.last_send_time = 0                 # Time of last message
+        self.lock = threading.Lock()            # Prevent multiple threads trying to send messages at once
+
+    def send(self, message_text, clear_after=True):
+        with self.lock:
+            now = time.perf_counter()
+            # Always allow shock messages to bypass message cooldown
+            bypass = "⚡" in message_text
+
+            # If cooldown is active and bypass is false, skip sending
+            if not bypass and now - self.last_send_time < MESSAGE_COOLDOWN:
+                metrics.inc("chatbox_suppressed")
+                return
+
+            self.last_send_time = now
+
+            try:
+                self.client.send_message("/chatbox/input", (message_text, True, False))
+                metrics.inc("chatbox_sent")
+
+                # Schedule a clear message
+                if clear_after:
+                    if self.clear_timer is not None:
+                        self.clear_timer.cancel()
+
+                    self.clear_timer = threading.Timer(4, self.send, args=("", False))
+                    self.clear_timer.start()
+
+            except Exception as e:
+                chat_log.exception(f"{RED}OSC send failed: %s", e)
+                return
+            chat_log.info(f"{RESET}Sent message: %s", message_text)
+
+    def cancel(self):
+        if self.clear_timer is not None:
+            self.clear_timer.cancel()
+
+
+# Per-session counts and trigger-to-device latency of the last fired shocks.
+# The OSC thread writes the trigger counts, the shocker worker writes fired and latency.
+class SessionStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.triggers = 0
+        self.accepted = 0
+        self.cooldown = 0
+        self.fired = 0
+        self.latency_us = deque(maxlen=2048)
+
+    def record_fired(self, latency_us: int):
+        self.fired += 1
+        self.latency_us.append(latency_us)
+
+    def report(self) -> dict:
+        minutes = max((time.monotonic() - self.started) / 60, 1e-9)
+        report = {
+            "triggers": self.triggers,
+            "accepted": self.accepted,
+            "cooldown": self.cooldown,
+            "fired": self.fired,
+            "fired_per_min": round(self.fired / minutes, 2),
+        }
+        latency = np.array(self.latency_us)
+        if latency.size:
+            report["latency_p50_us"] = int(np.percentile(latency, 50))
+            report["latency_p99_us"] = int(np.percentile(latency, 99))
+        return report
+
+
+# One VRChat instance: its shock parameters, chatbox target, cooldowns and sample pool.
+# Sessions share the shockers, the shock queue and the workers, index tags each queued shock with its session.
+class Session:
+    def __init__(self, index, name, chatbox, cooldowns, shock_address=None, second_shock_address=None, preset=None):
+        self.index = index
+        self.name = name
+        self.chatbox = chatbox
+        self.cooldowns = cooldowns
+        self.preset = preset            # Preset slot the curve comes from, None for the editor's curve
+        self.profile = None             # Published ShockProfile of that preset, None while it follows the editor
+        self.pool = None
+        self.curve_model = CurveModel()
+        self.stats = SessionStats()
+        self.advertiser = None
+        self.set_addresses(shock_address, second_shock_address)
+
+    def set_addresses(self, shock_address, second_shock_address):
+        # One dict, swapped whole, so the OSC thread never sees half of an update
+        self.params = {address: param_id for param_id, address in enumerate((shock_address, second_shock_address)) if address}
+
+    def routes(self, handler) -> dict:
+        return {address: (lambda address, *args: handler(self, address, *args)) for address in self.params}
+
+    # Own OSC server and OSCQuery announcement, for the sessions after the first
+    def start_osc(self, handler):
+        routes = self.routes(handler)
+        if not routes:
+            logging.warning(f"[Session {self.name}] {YELLOW}No shock parameters set, session disabled.{RESET}")
+            return
+        dispatcher = dict_to_dispatcher(routes)
+        http_port = start_osc_servers(dispatcher, params=dispatcher.params, on_query=self._on_query)
+        if http_port is None:
+            logging.error(f"[Session {self.name}] {RED}OSC server failed to start.{RESET}")
+            return
+        # Only once there is a port to announce, so a failed start leaves no mDNS thread behind
+        self.advertiser = OSCQueryAdvertiser()
+        self.advertiser.register(f"Shocker Link {self.name}", http_port)
+        logging.info(f"[Session {self.name}] {RESET}Started OSC server for: {YELLOW}{list(routes)}{RESET}")
+
+    def _on_query(self):
+        if self.advertiser is not None:
+            self.advertiser.mark_queried()
+
+    def close(self):
+        self.chatbox.cancel()
+        if self.pool is not None:
+            self.pool.stop()
+        if self.advertiser is not None:
+            self.advertiser.close()
+
+
+def parameter_address(name):
+    return f"/avatar/parameters/{name}" if name else None
+
+
+# Builds the extra sessions from SESSIONS in config.yml, entries are mappings like
+# {name: Alt, host: 127.0.0.1, port: 9002, shock: Shock, second: ShockStrong, preset: 2}
+def build_sessions(entries, first_index, make_cooldowns) -> list:
+    sessions = []
+    for offset, entry in enumerate(entries):
+        name = str(entry.get("name") or f"Session {first_index + offset + 1}")
+        client = vrc_client(str(entry.get("host", "127.0.0.1")), int(entry.get("port", 9000)))
+        preset = entry.get("preset")
+        sessions.append(Session(
+            first_index + offset, name, Chatbox(client), make_cooldowns(),
+            parameter_address(entry.get("shock")), parameter_address(entry.get("second")),
+            int(preset) - 1 if preset else None,
+        ))
+    return sessions
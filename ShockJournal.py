@@ -0,0 +1,245 @@
+from collections import deque
+from pathlib import Path
+import threading
+import logging
+import struct
+import time
+import json
+import sys
+import os
+
+RED = "\033[31m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+# ~~~      FORMAT      ~~~
+# File header: magic, version, record size, wall clock and monotonic time at creation.
+# The anchor pair turns the monotonic record timestamps back into wall clock time.
+# monotonic_ns() starts over with every boot, so whenever an existing file is opened again an ANCHOR record
+# with the new pair is appended first, and the records after it are converted with that one.
+HEADER = struct.Struct("<4sHHdQ8x")
+MAGIC = b"SHKJ"
+VERSION = 2                 # 2 added ANCHOR records
+
+# One fixed-size record per event, 32 bytes
+RECORD = struct.Struct("<QHBBBBHIIII")
+RECORD_FIELDS = [
+    ("t_ns", "<u8"),            # time.monotonic_ns() when the OSC packet arrived
+    ("param_id", "<u2"),        # 0 = SHOCK_PARAMETER, 1 = SECOND_SHOCK_PARAMETER
+    ("intensity", "u1"),        # Percent, 0 if none was drawn
+    ("shocker", "u1"),          # Index into the shocker list, NO_SHOCKER if none
+    ("outcome", "u1"),
+    ("reserved", "u1"),
+    ("duration_ms", "<u2"),
+    ("sample_us", "<u4"),       # Packet received -> shock queued (cooldown check and sampling)
+    ("queue_us", "<u4"),        # Time spent waiting in the shock queue
+    ("send_us", "<u4"),         # Time to hand the command to the device
+    ("reserved2", "<u4"),
+]
+
+FIRED, COOLDOWN, DROPPED, ERROR, MERGED = range(5)   # MERGED: folded into another shock
+OUTCOME_NAMES = ["fired", "cooldown", "dropped", "error", "merged"]
+NO_SHOCKER = 255
+ANCHOR = 255                # Outcome of an anchor record: t_ns is the monotonic time, sample_us | queue_us << 32 the wall clock in ns
+SLOT_NS = 900 * 10**9       # Every UTC offset in use is a multiple of 15 minutes, so a 15 minute slot lies in one local hour
+
+JOURNAL_NAME = "shocks.journal"
+
+
+# ~~~      WRITER      ~~~
+# The trigger path only appends a tuple to a deque (atomic in CPython), a background thread packs and writes
+class ShockJournal:
+    def __init__(self, directory: str = "journal", max_bytes: int = 8 * 1024 * 1024, keep: int = 5, flush_interval: float = 0.5):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.flush_interval = flush_interval
+        self.buffer = deque()
+        self.stop_event = threading.Event()
+        self.file = None
+        self.size = 0
+        self.thread = threading.Thread(target=self._run, name="shock-journal", daemon=True)
+
+    @property
+    def path(self) -> Path:
+        return self.directory / JOURNAL_NAME
+
+    def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._open()
+        self.thread.start()
+        return self
+
+    def record(self, t_ns, param_id, intensity, shocker, outcome, duration_s=0.0, sample_us=0, queue_us=0, send_us=0):
+        self.buffer.append((t_ns, param_id, intensity, shocker, outcome, duration_s, sample_us, queue_us, send_us))
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join(timeout=2)
+        self._flush()
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _open(self):
+        exists = self.path.exists() and self.path.stat().st_size >= HEADER.size
+        self.file = open(self.path, "ab")
+        if exists:
+            wall_ns = time.time_ns()
+            self.file.write(RECORD.pack(time.monotonic_ns(), 0, 0, NO_SHOCKER, ANCHOR, 0, 0, wall_ns & 0xFFFFFFFF, wall_ns >> 32, 0, 0))
+            self.size = self.file.tell()
+        else:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time.time(), time.monotonic_ns()))
+            self.size = HEADER.size
+
+    # journal -> journal.1 -> ... -> journal.<keep>, the oldest is removed
+    def _rotate(self):
+        self.file.close()
+        oldest = self.directory / f"{JOURNAL_NAME}.{self.keep}"
+        if oldest.exists():
+            oldest.unlink()
+        for i in range(self.keep - 1, 0, -1):
+            src = self.directory / f"{JOURNAL_NAME}.{i}"
+            if src.exists():
+                os.replace(src, self.directory / f"{JOURNAL_NAME}.{i + 1}")
+        os.replace(self.path, self.directory / f"{JOURNAL_NAME}.1")
+        self._open()
+
+    def _flush(self):
+        if self.file is None or not self.buffer:
+            return
+        chunk = bytearray()
+        pack = RECORD.pack
+        try:
+            while True:
+                t_ns, param_id, intensity, shocker, outcome, duration_s, sample_us, queue_us, send_us = self.buffer.popleft()
+                chunk += pack(
+                    t_ns, param_id, intensity, min(shocker, NO_SHOCKER), outcome, 0,
+                    min(int(duration_s * 1000), 0xFFFF),
+                    min(int(sample_us), 0xFFFFFFFF), min(int(queue_us), 0xFFFFFFFF), min(int(send_us), 0xFFFFFFFF), 0,
+                )
+        except IndexError:
+            pass
+
+        # Fill the current file up to max_bytes, rotate and carry on with the rest
+        view = memoryview(chunk)
+        while view:
+            room = (self.max_bytes - self.size) // RECORD.size * RECORD.size
+            if room <= 0:
+                self._rotate()
+                room = max((self.max_bytes - self.size) // RECORD.size, 1) * RECORD.size
+            part = view[:room]
+            self.file.write(part)
+            self.size += len(part)
+            view = view[room:]
+        self.file.flush()
+
+    def _run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            try:
+                self._flush()
+            except Exception:
+                logging.exception(f"[Journal] {RED}Failed to write shock journal{RESET}")
+
+
+# ~~~      READER      ~~~
+def record_dtype():
+    import numpy as np
+    return np.dtype(RECORD_FIELDS)
+
+
+# Memory-maps a journal file, returns (records, wall_anchor, monotonic_anchor_ns)
+def open_journal(path):
+    import numpy as np
+
+    with open(path, "rb") as f:
+        magic, version, record_size, wall_anchor, mono_anchor = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version not in (1, VERSION) or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a shock journal (version {version})")
+
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    if count == 0:
+        return np.zeros(0, dtype=record_dtype()), wall_anchor, mono_anchor
+    records = np.memmap(path, dtype=record_dtype(), mode="r", offset=HEADER.size, shape=(count,))
+    return records, wall_anchor, mono_anchor
+
+
+# Per-hour counts by outcome, intensity histogram of fired shocks and latency percentiles
+def summarize(paths) -> dict:
+    import numpy as np
+
+    hours = {}
+    intensity_hist = np.zeros(101, dtype=np.int64)
+    outcome_counts = np.zeros(len(OUTCOME_NAMES), dtype=np.int64)
+    latencies = []
+    total = 0
+
+    for path in paths:
+        records, wall_anchor, mono_anchor = open_journal(path)
+
+        # Wall clock minus monotonic time per anchor, the header's first. Every record uses the last anchor before it.
+        anchors = records["outcome"] == ANCHOR
+        anchor_records = records[anchors]
+        wall_ns = np.concatenate([[int(wall_anchor * 1e9)], anchor_records["sample_us"].astype(np.int64) | (anchor_records["queue_us"].astype(np.int64) << 32)])
+        offsets_ns = wall_ns - np.concatenate([[mono_anchor], anchor_records["t_ns"].astype(np.int64)])
+        segment = np.cumsum(anchors)[~anchors]
+        records = records[~anchors]
+        if len(records) == 0:
+            continue
+        total += len(records)
+
+        outcomes = records["outcome"]
+        outcome_counts += np.bincount(outcomes, minlength=len(OUTCOME_NAMES))[:len(OUTCOME_NAMES)]
+
+        # Counted per 15 minute slot of wall clock time (integer math and one bincount, so it stays a single pass),
+        # each slot then goes to its local hour. Dividing by whole UTC hours would put every count in the wrong
+        # local hour for offsets like +5:30, and a single offset would be wrong across a DST change.
+        n = len(OUTCOME_NAMES)
+        slot = (records["t_ns"].astype(np.int64) + offsets_ns[segment]) // SLOT_NS
+        low, high = int(slot.min()), int(slot.max())
+        counts = np.bincount((slot - low) * n + outcomes, minlength=(high - low + 1) * n).reshape(-1, n)
+        for h in np.flatnonzero(counts.sum(axis=1)).tolist():
+            label = time.strftime("%Y-%m-%d %H:00", time.localtime((low + h) * SLOT_NS // 10**9))
+            bucket = hours.setdefault(label, dict.fromkeys(OUTCOME_NAMES, 0))
+            for outcome, count in enumerate(counts[h].tolist()):
+                bucket[OUTCOME_NAMES[outcome]] += count
+
+        fired = records[outcomes == FIRED]
+        intensity_hist += np.bincount(np.minimum(fired["intensity"], 100), minlength=101)
+        latencies.append(fired["sample_us"].astype(np.int64) + fired["queue_us"] + fired["send_us"])
+
+    latency = np.concatenate(latencies) if latencies else np.zeros(0, dtype=np.int64)
+    percentiles = {}
+    if latency.size:
+        p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+        percentiles = {"p50_us": float(p50), "p95_us": float(p95), "p99_us": float(p99), "max_us": int(latency.max())}
+
+    return {
+        "events": int(total),
+        "outcomes": dict(zip(OUTCOME_NAMES, outcome_counts.tolist())),
+        "per_hour": dict(sorted(hours.items())),
+        "intensity_histogram": {i: int(c) for i, c in enumerate(intensity_hist.tolist()) if c},
+        "trigger_to_device_latency": percentiles,
+    }
+
+
+def journal_files(directory) -> list:
+    directory = Path(directory)
+    return sorted(directory.glob(f"{JOURNAL_NAME}*"), key=lambda p: p.stat().st_mtime)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("journal")
+    files = journal_files(target) if target.is_dir() else [target]
+    if not files:
+        logging.warning(f"[Journal] {YELLOW}No journal files found in {target}{RESET}")
+        sys.exit(1)
+
+    import numpy  # Keep the import out of the timing
+    start = time.perf_counter()
+    summary = summarize(files)
+    elapsed = time.perf_counter() - start
+    print(json.dumps(summary, indent=2))
+    logging.info(f"[Journal] {CYAN}Summarized {summary['events']} events from {len(files)} file(s) in {elapsed * 1000:.1f} ms{RESET}")
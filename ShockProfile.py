@@ -0,0 +1,31 @@
+from CurveModel import CompiledCurve, CurveModel, INTENSITIES
+from dataclasses import dataclass
+
+
+# Everything the trigger path needs from the editor, frozen. The Tk thread builds a new one for every
+# committed edit, preset load or undo and swaps the global reference, readers load that reference once
+# and keep using the same object, so they never see half of an edit.
+@dataclass(frozen=True, slots=True)
+class ShockProfile:
+    version: int
+    points: tuple               # Sorted control points
+    min_duration: float
+    max_duration: float
+    cooldown_enabled: bool
+    compiled: CompiledCurve     # Curve, weight table and CDFs for the points
+
+    # What a SamplePool draws from
+    def sample_source(self):
+        return INTENSITIES, self.compiled.cdf, self.compiled.upper_cdf, self.min_duration, self.max_duration
+
+
+def make_profile(points, min_duration, max_duration, cooldown_enabled, curve_model: CurveModel, previous: ShockProfile = None) -> ShockProfile:
+    compiled = curve_model.get(points)
+    return ShockProfile(
+        version=previous.version + 1 if previous else 0,
+        points=compiled.points,
+        min_duration=float(min_duration),
+        max_duration=float(max_duration),
+        cooldown_enabled=bool(cooldown_enabled),
+        compiled=compiled,
+    )
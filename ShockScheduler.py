@@ -0,0 +1,93 @@
+from queue import Empty
+import threading
+import itertools
+import heapq
+
+# Lower goes first. The second (strong) shock parameter goes ahead of normal shocks that are still waiting.
+STRONG, NORMAL = 0, 1
+
+
+def priority_of(param_id: int) -> int:
+    return STRONG if param_id == 1 else NORMAL
+
+
+# Combines shocks into one command: the highest intensity, running until the last of them would have ended.
+# Shocks are (intensity_percent, duration_s, param_id, received_ns, queued_ns, session), the result keeps the first one's timing and session.
+def merge_shocks(head, others, max_duration_s: float = 0):
+    start_ns = min(shock[3] for shock in (head, *others))
+    intensity = max(shock[0] for shock in (head, *others))
+    duration = max((shock[3] - start_ns) / 1e9 + shock[1] for shock in (head, *others))
+    if max_duration_s > 0:
+        duration = min(duration, max(max_duration_s, head[1]))
+    param_id = 1 if any(shock[2] == 1 for shock in (head, *others)) else head[2]
+    return (intensity, round(duration, 1), param_id, *head[3:])
+
+
+# Drop-in for the FIFO shock queue: put/get/empty/qsize like queue.Queue, but ordered by priority and then arrival.
+# take_mergeable() hands the worker every waiting shock close enough to the one it is about to send.
+class ShockScheduler:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.heap = []
+        self.counter = itertools.count()
+        self.waiting = [0, 0]   # Waiting shocks per priority
+        self.counts = {
+            "queued": 0,
+            "strong": 0,
+            "normal": 0,
+            "jumped_ahead": 0,      # Strong shocks sent before normal shocks that came in earlier
+            "merged_triggers": 0,   # Shocks folded into another command
+            "merged_commands": 0,   # Commands that carry more than one shock
+            "max_depth": 0,
+        }
+
+    def put(self, shock):
+        priority = priority_of(shock[2])
+        with self.lock:
+            heapq.heappush(self.heap, (priority, next(self.counter), shock))
+            self.waiting[priority] += 1
+            self.counts["queued"] += 1
+            self.counts["strong" if priority == STRONG else "normal"] += 1
+            if priority == STRONG and self.waiting[NORMAL]:
+                self.counts["jumped_ahead"] += 1
+            self.counts["max_depth"] = max(self.counts["max_depth"], len(self.heap))
+            self.not_empty.notify()
+
+    def get(self, timeout: float = None):
+        with self.not_empty:
+            if not self.not_empty.wait_for(lambda: self.heap, timeout):
+                raise Empty
+            priority, _, shock = heapq.heappop(self.heap)
+            self.waiting[priority] -= 1
+            return shock
+
+    # Removes and returns the waiting shocks of head's session that came in within window_s of `head`.
+    # Other sessions' shocks stay queued, the merged command is credited to head's session only.
+    def take_mergeable(self, head, window_s: float) -> list:
+        if window_s <= 0:
+            return []
+        window_ns = window_s * 1e9
+        def mergeable(shock):
+            return shock[5:6] == head[5:6] and abs(shock[3] - head[3]) <= window_ns
+        with self.lock:
+            taken = [entry for entry in self.heap if mergeable(entry[2])]
+            if not taken:
+                return []
+            self.heap = [entry for entry in self.heap if not mergeable(entry[2])]
+            heapq.heapify(self.heap)
+            for priority, _, _ in taken:
+                self.waiting[priority] -= 1
+            self.counts["merged_triggers"] += len(taken)
+            self.counts["merged_commands"] += 1
+            return [shock for _, _, shock in taken]
+
+    def empty(self) -> bool:
+        return not self.heap
+
+    def qsize(self) -> int:
+        return len(self.heap)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self.counts, depth=len(self.heap))
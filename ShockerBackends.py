@@ -0,0 +1,564 @@
+from Metrics import metrics
+from LogPipeline import RATE_LIMITED
+from abc import ABC, abstractmethod
+from collections import deque
+from queue import Queue, Empty
+import threading
+import logging
+import json
+import time
+
+RED = "\033[31m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+OPENSHOCK_SERIAL_BAUDRATE = 115200
+serial_log = logging.getLogger("serial")
+
+
+def list_serial_ports(port: str = "") -> list:
+    # Imported here so startup doesn't pay for pyserial before the window is up
+    from serial.tools import list_ports
+    # If no port specified, scan automatically
+    if port.strip():
+        return [port]
+    return [p.device for p in list_ports.comports()]
+
+
+# What the shocker worker talks to. A backend finds and connects to its device and sends shocks to
+# shockers by index. It also says how it wants to be driven:
+#   max_in_flight   how many commands can be outstanding at once, 1 means send() returns once the shock is out
+#   batch_size      how many commands send_batch() takes at a time, the worker drains that many from the queue
+class ShockerBackend(ABC):
+    name = "backend"
+    max_in_flight = 1
+    batch_size = 1
+
+    def __init__(self):
+        self.shockers = []          # Handles in shocker index order, only used for logging
+        self.sent = 0
+        self.errors = 0
+        self.last_error = None
+
+    # Starts whatever the backend runs in the background, returns itself
+    def start(self):
+        return self
+
+    def discover(self) -> list:
+        return []
+
+    @abstractmethod
+    def connect(self) -> bool:
+        ...
+
+    @abstractmethod
+    def connected(self) -> bool:
+        ...
+
+    @abstractmethod
+    def send(self, shocker: int, intensity: int, duration_s: float) -> None:
+        ...
+
+    # commands are (shocker, intensity, duration_s), raises if the batch couldn't be handed over
+    def send_batch(self, commands) -> None:
+        for shocker, intensity, duration_s in commands:
+            self.send(shocker, intensity, duration_s)
+
+    def health(self) -> dict:
+        return {"backend": self.name, "connected": self.connected(), "shockers": len(self.shockers),
+                "sent": self.sent, "errors": self.errors, "last_error": self.last_error}
+
+    def close(self) -> None:
+        pass
+
+
+# ~~~      OPENSHOCK SERIAL      ~~~
+# rftransmit lines over the hub's USB serial. send() only queues the line, a writer thread writes
+# whatever is waiting in one go, so commands pipeline and a slow write never holds up the worker.
+class OpenShockSerialBackend(ShockerBackend):
+    name = "openshock_serial"
+    max_in_flight = 64
+    batch_size = 8
+
+    def __init__(self, port: str, shocker_ids, reconnect=None):
+        super().__init__()
+        self.port = port
+        self.shocker_ids = list(shocker_ids)
+        self.connection = None
+        self.queue = Queue()
+        self.stop_event = threading.Event()
+        self.reconnect = reconnect or self.connect      # Called by the writer when the port is gone
+        self.thread = threading.Thread(target=self._writer, name="serial-writer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def discover(self) -> list:
+        return list_serial_ports(self.port)
+
+    def connected(self) -> bool:
+        return self.connection is not None and getattr(self.connection, "is_open", False)
+
+    def connect(self) -> bool:
+        from serial.serialutil import SerialException
+        import serial
+
+        if self.connected():
+            return True
+        ports = self.discover()
+        serial_log.info(f"{RESET}Available ports: %s", ports, extra=RATE_LIMITED)
+
+        for attempt in range(3):
+            for port in ports: # USB Path
+                try:
+                    ser = serial.Serial(port, OPENSHOCK_SERIAL_BAUDRATE, timeout=1)
+                    ser.write(b"domain\n")
+                    resp = ser.read(50)
+                    if b"openshock" in resp:
+                        ser.flush()
+                        serial_log.info(f"{RESET}Connected to serial port {CYAN}{port}")
+                        self.connection = ser
+                        self.shockers = list(self.shocker_ids)
+                        return True
+                    else:
+                        ser.close()
+                except SerialException as e:
+                    serial_log.warning(f"{RED} Couldn't open {port}. It's probably in use by another program.")
+                except Exception as e:
+                    serial_log.exception(f"{RED}Failed on {port}: {e}")
+                serial_log.warning(f"{YELLOW}Connection attempt {RESET}{attempt+1}/3 {YELLOW}for port {RESET}{port} {YELLOW}failed.")
+            if attempt < 2:
+                serial_log.warning(f"{YELLOW}Retrying in 3 seconds...")
+                time.sleep(3)
+
+        serial_log.error(f"{RED}Failed to open serial. Shocks disabled.")
+        self.connection = None
+        return False
+
+    @staticmethod
+    def encode(shocker_id, intensity: int, duration_s: float) -> bytes:
+        # Data for shock
+        payload = {
+            "model": "caixianlin",
+            "id": shocker_id,
+            "type": "shock",
+            "intensity": int(intensity),
+            "durationMs": int(round(float(duration_s) * 1000))
+        }
+        return ("rftransmit " + json.dumps(payload) + "\n").encode('ascii')
+
+    def send(self, shocker: int, intensity: int, duration_s: float) -> None:
+        self.queue.put(self.encode(self.shockers[shocker], intensity, duration_s))
+
+    def send_batch(self, commands) -> None:
+        self.queue.put(b"".join(self.encode(self.shockers[s], i, d) for s, i, d in commands))
+
+    def _writer(self):
+        while not self.stop_event.is_set():
+            try:
+                data = self.queue.get(timeout=0.5)
+            except Empty:
+                continue
+            # Everything already waiting goes out in the same write
+            while len(data) < 4096:
+                try:
+                    data += self.queue.get_nowait()
+                except Empty:
+                    break
+
+            max_retries = 3
+            for attempt in range(max_retries):
+                try:
+                    if not self.connected():
+                        self.reconnect()
+                    if self.connection and getattr(self.connection, "is_open", True):
+                        self.connection.write(data)
+                        self.connection.flush()
+                        self.sent += data.count(b"\n")
+                        break
+                except Exception as e:
+                    metrics.inc("serial_write_errors")
+                    self.errors += 1
+                    self.last_error = str(e)
+                    serial_log.exception(f"{RED}Failed to write to serial (Attempt {RESET}%d/%d{RED}): %s", attempt + 1, max_retries, e)
+                    self.connection = None
+                    time.sleep(0.5)
+            else:
+                serial_log.error(f"{RED}Failed to send shock after retries.")
+
+    def health(self) -> dict:
+        return dict(super().health(), queued=self.queue.qsize())
+
+    def close(self) -> None:
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=1)
+        try:
+            if self.connected():
+                self.connection.close()
+                serial_log.info(f"{YELLOW}Closed serial port")
+        except Exception as e:
+            serial_log.exception(f"{RED}Error closing serial: {e}")
+
+
+# ~~~      OPENSHOCK LAN      ~~~
+# True if the request failed before any of it reached the hub (no connection could be opened)
+def never_sent(error) -> bool:
+    from requests import ConnectTimeout
+    from urllib3.exceptions import NewConnectionError
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, ConnectTimeout) or isinstance(reason, NewConnectionError)
+
+
+# Experimental: OpenShock hubs don't document a local HTTP command endpoint, this talks to a bridge at
+# OPENSHOCK_LAN_URL that implements the contract in the README:
+#   GET  -> 200 with a JSON object containing "rftransmit": true, checked before the backend counts as connected
+#   POST -> a JSON list of rftransmit payloads, 2xx once they are handed to the radio, anything else is a refusal
+# Commands are posted over a keep-alive requests.Session, so there is no TCP or TLS setup per shock. max_in_flight
+# sender threads share the connection pool and post batches back to back without waiting on each other.
+# A lost hub is reconnected by a background thread with backoff, the worker only ever checks a flag.
+class OpenShockLanBackend(ShockerBackend):
+    name = "openshock_lan"
+    max_in_flight = 4
+    batch_size = 8
+    TIMEOUT_S = 2.0         # Per request
+    MAX_AGE_S = 2.0         # Commands still waiting after this long are dropped rather than fired late
+    MAX_BACKOFF_S = 5.0
+
+    def __init__(self, url: str, shocker_ids, token: str = "", on_connected=None, max_in_flight: int = None):
+        super().__init__()
+        self.url = url.strip()
+        self.token = token
+        self.shocker_ids = list(shocker_ids)
+        self.on_connected = on_connected    # Called after the background thread got the hub back
+        if max_in_flight:
+            self.max_in_flight = max_in_flight
+        self.session = None
+        self.queue = Queue()
+        self.stop_event = threading.Event()
+        self.lost = threading.Event()       # Wakes the reconnect thread
+        self.link_up = threading.Event()
+        self.probed = False
+        self.reconnects = 0
+        self.dropped = 0
+        self.latency_ns = deque(maxlen=2048)
+        self.threads = [threading.Thread(target=self._sender, name=f"lan-sender-{i}", daemon=True) for i in range(self.max_in_flight)]
+        self.threads.append(threading.Thread(target=self._reconnector, name="lan-reconnect", daemon=True))
+
+    def start(self):
+        # Imported here like pyserial, nothing pays for requests until a LAN hub is used.
+        # Before the senders start, so they don't race each other through the import.
+        from requests import ConnectionError, Timeout
+        self.link_errors = (ConnectionError, Timeout)
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def discover(self) -> list:
+        return [self.url] if self.url else []
+
+    def connected(self) -> bool:
+        return self.link_up.is_set()
+
+    def _make_session(self):
+        from requests.adapters import HTTPAdapter
+        import requests
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+        if self.token:
+            session.headers["OpenShockToken"] = self.token
+        return session
+
+    # Up only if the URL answers like a bridge, so a wrong address (the hub's web page, a router) never looks connected
+    def _probe(self) -> bool:
+        try:
+            response = self.session.get(self.url, timeout=self.TIMEOUT_S)
+            try:
+                answer = response.json() if response.status_code == 200 else None
+            except ValueError:
+                answer = None
+            finally:
+                response.close()
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+        if not isinstance(answer, dict) or answer.get("rftransmit") is not True:
+            self.last_error = f'answered HTTP {response.status_code}, but not {{"rftransmit": true}}, it is not an rftransmit bridge'
+            return False
+        return True
+
+    def connect(self) -> bool:
+        if self.connected():
+            return True
+        if not self.url:
+            serial_log.error(f"{RED}No OPENSHOCK_LAN_URL set. Shocks disabled.")
+            return False
+        # Only the first connect waits on the network, after that the reconnect thread takes over
+        if self.probed:
+            self.lost.set()
+            return False
+        self.probed = True
+        if self.session is None:
+            self.session = self._make_session()
+        if self._probe():
+            serial_log.info(f"{RESET}Connected to OpenShock hub at {CYAN}{self.url}")
+            self.shockers = list(self.shocker_ids)
+            self.link_up.set()
+            return True
+        serial_log.error(f"{RED}Couldn't connect to the OpenShock bridge at {self.url}: {self.last_error}")
+        self.lost.set()
+        return False
+
+    def send(self, shocker: int, intensity: int, duration_s: float) -> None:
+        self.send_batch([(shocker, intensity, duration_s)])
+
+    def send_batch(self, commands) -> None:
+        payloads = [{
+            "model": "caixianlin",
+            "id": self.shockers[shocker],
+            "type": "shock",
+            "intensity": int(intensity),
+            "durationMs": int(round(float(duration_s) * 1000))
+        } for shocker, intensity, duration_s in commands]
+        self.queue.put((time.monotonic_ns(), len(payloads), json.dumps(payloads).encode()))
+
+    def _post(self, body: bytes):
+        response = self.session.post(self.url, data=body, timeout=self.TIMEOUT_S)
+        response.close()
+        response.raise_for_status()
+
+    def _sender(self):
+        while not self.stop_event.is_set():
+            try:
+                queued_ns, count, body = self.queue.get(timeout=0.5)
+            except Empty:
+                continue
+            # Hold on while the hub is being reconnected, but never past MAX_AGE_S
+            remaining = self.MAX_AGE_S - (time.monotonic_ns() - queued_ns) / 1e9
+            if remaining <= 0 or not self.link_up.wait(remaining):
+                self.dropped += count
+                serial_log.warning(f"{YELLOW}OpenShock hub not reachable, dropped %d stale shock(s).", count)
+                continue
+
+            for attempt in range(2):
+                try:
+                    self._post(body)
+                    self.sent += count
+                    self.latency_ns.append(time.monotonic_ns() - queued_ns)
+                    break
+                except self.link_errors as e:
+                    # Only a post that never got a connection is tried again. After a read timeout or a dropped
+                    # answer the hub may already have fired, and a second post would shock twice.
+                    if attempt == 0 and never_sent(e) and not self.stop_event.is_set():
+                        continue
+                    self.errors += count
+                    self.last_error = str(e)
+                    serial_log.error(f"{RED}Lost the OpenShock hub: %s", e)
+                    self.link_up.clear()
+                    self.lost.set()
+                    break
+                except Exception as e:
+                    self.errors += count
+                    self.last_error = str(e)
+                    serial_log.error(f"{RED}OpenShock hub refused the shock: %s", e)
+                    break
+
+    def _reconnector(self):
+        while not self.stop_event.is_set():
+            if not self.lost.wait(0.5) or self.stop_event.is_set():
+                continue
+            backoff = 0.25
+            while not self.stop_event.is_set():
+                if self.session is not None and self._probe():
+                    break
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF_S)
+            else:
+                return
+            self.lost.clear()
+            self.reconnects += 1
+            self.shockers = list(self.shocker_ids)
+            self.link_up.set()
+            serial_log.info(f"{RESET}Reconnected to OpenShock hub at {CYAN}%s", self.url, extra=RATE_LIMITED)
+            if self.on_connected:
+                self.on_connected()
+
+    def health(self) -> dict:
+        report = dict(super().health(), queued=self.queue.qsize(), dropped=self.dropped, reconnects=self.reconnects)
+        if self.latency_ns:
+            ordered = sorted(self.latency_ns)
+            report["latency_p50_ms"] = round(ordered[len(ordered) // 2] / 1e6, 2)
+            report["latency_p99_ms"] = round(ordered[int(len(ordered) * 0.99)] / 1e6, 2)
+        return report
+
+    def close(self) -> None:
+        self.stop_event.set()
+        self.lost.set()
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join(timeout=1)
+        if self.session is not None:
+            self.session.close()
+
+
+# ~~~      PISHOCK SERIAL      ~~~
+# The pishock library's SerialAPI, one blocking call per shock
+class PiShockSerialBackend(ShockerBackend):
+    name = "pishock_serial"
+
+    def __init__(self, port: str, shocker_ids):
+        super().__init__()
+        self.port = port
+        self.shocker_ids = list(shocker_ids)
+        self.api = None
+
+    def discover(self) -> list:
+        return list_serial_ports(self.port)
+
+    def connected(self) -> bool:
+        return self.api is not None and bool(self.shockers)
+
+    # Asks every port for its terminal info, returns the PiShock hub's port or None
+    def _find_port(self, ports):
+        from serial.serialutil import SerialException
+        import serial
+
+        for port in ports:
+            try:
+                ser = serial.Serial(port, OPENSHOCK_SERIAL_BAUDRATE, timeout=1)
+                # Send info command to PiShock Hub
+                ser.write((json.dumps({"cmd": "info"}) + "\n").encode("utf-8"))
+                # Read info response and wait for up to 40 lines to find it
+                for _ in range(40):
+                    resp = ser.readline()
+                    if resp.startswith(b"TERMINALINFO: "):
+                        if b"pishock" in resp:
+                            ser.close()
+                            return port
+                    elif resp == b"":
+                        break
+                ser.close()
+            except SerialException as e:
+                serial_log.warning(f"{RED} Couldn't open {port}. It's probably in use by another program.")
+                break
+            except Exception as e:
+                serial_log.exception(f"{RED}Failed on {port}: {e}")
+                break
+        return None
+
+    def connect(self) -> bool:
+        from pishock.zap.serialapi import SerialAutodetectError, SerialAPI
+
+        if self.connected():
+            return True
+        self.api = None
+        try:
+            if self.port.strip():
+                # Port entered manually, skip all
+                self.api = SerialAPI(self.port)
+            else:
+                ports = self.discover()
+                serial_log.info(f"{RESET}Available ports: %s", ports, extra=RATE_LIMITED)
+                # Try to find the port manually first, then let the pishock library autodetect
+                port = self._find_port(ports) if len(ports) > 1 else None
+                self.api = SerialAPI(port)
+                serial_log.info(f"{RESET}Connected to {'serial port ' + CYAN + port if port else 'PiShock Hub'}")
+        except SerialAutodetectError:
+            serial_log.exception(f"{RED}Couldn't connect to the PiShock Device.\n" +
+                                 ("Wrong port setup in config." if self.port.strip() else "Try disconnecting other serial devices or changing port."))
+            return False
+        except Exception:
+            serial_log.exception(f"{RED} Unknown error while searching for PiShock hub.")
+            return False
+
+        # Shocker handles only, info() lists the hub's shockers as dicts
+        shocker_ids = self.shocker_ids
+        if not shocker_ids:
+            found = self.api.info().get("shockers", [])
+            shocker_ids = [found[0]["id"]] if found else []
+            if shocker_ids:
+                serial_log.info(f"{RESET}Found shocker with ID {shocker_ids[0]}")
+            else:
+                serial_log.warning(f"{YELLOW}No shockers found.")
+        shockers = []
+        for shocker_id in shocker_ids:
+            shockers.append(self.api.shocker(shocker_id))
+            serial_log.info(f"{RESET}Created shocker instance for ID {shocker_id}")
+        self.shockers = shockers
+        return self.connected()
+
+    def send(self, shocker: int, intensity: int, duration_s: float) -> None:
+        try:
+            self.shockers[shocker].shock(duration=round(float(duration_s), 1), intensity=int(intensity))
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            raise
+        self.sent += 1
+
+
+# ~~~      MOCK      ~~~
+# In-memory shockers for replays and benchmarks. Records every shock with its send time,
+# latency_s simulates how long the device takes to accept a command.
+class MockBackend(ShockerBackend):
+    name = "mock"
+
+    def __init__(self, shocker_count: int = 1, latency_s: float = 0.0, max_in_flight: int = 1, batch_size: int = 1):
+        super().__init__()
+        self.shocker_count = shocker_count
+        self.latency_s = latency_s
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.shocks = deque()       # (shocker, intensity, duration_s, sent_ns)
+        self.send_ns = deque(maxlen=100_000)
+        self.is_connected = False
+
+    def connect(self) -> bool:
+        self.shockers = [f"mock-{i}" for i in range(self.shocker_count)]
+        self.is_connected = True
+        return True
+
+    def connected(self) -> bool:
+        return self.is_connected
+
+    def send(self, shocker: int, intensity: int, duration_s: float) -> None:
+        self.send_batch([(shocker, intensity, duration_s)])
+
+    def send_batch(self, commands) -> None:
+        start = time.perf_counter_ns()
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        now = time.monotonic_ns()
+        for shocker, intensity, duration_s in commands:
+            self.shocks.append((shocker, intensity, duration_s, now))
+        self.sent += len(commands)
+        self.send_ns.append(time.perf_counter_ns() - start)
+
+    def timings(self) -> dict:
+        if not self.send_ns:
+            return {}
+        ordered = sorted(self.send_ns)
+        return {
+            "sends": len(ordered),
+            "send_p50_us": round(ordered[len(ordered) // 2] / 1000, 1),
+            "send_p99_us": round(ordered[int(len(ordered) * 0.99)] / 1000, 1),
+        }
+
+
+BACKENDS = ("openshock_serial", "openshock_lan", "pishock_serial", "mock")
+
+
+def make_backend(kind: str, cfg, reconnect=None) -> ShockerBackend:
+    if kind == "openshock_lan":
+        return OpenShockLanBackend(cfg.OPENSHOCK_LAN_URL, cfg.OPENSHOCK_SHOCKER_ID, cfg.OPENSHOCK_LAN_TOKEN, on_connected=reconnect)
+    if kind == "mock":
+        return MockBackend(max(len(cfg.OPENSHOCK_SHOCKER_ID), 1))
+    if kind == "pishock_serial":
+        return PiShockSerialBackend(cfg.SERIAL_PORT, cfg.PISHOCK_SHOCKER_ID)
+    return OpenShockSerialBackend(cfg.SERIAL_PORT, cfg.OPENSHOCK_SHOCKER_ID, reconnect)
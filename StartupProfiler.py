@@ -0,0 +1,156 @@
+import threading
+import builtins
+import logging
+import time
+import sys
+import os
+
+RED = "\033[31m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RESET = "\033[0m"
+
+# ~~~      IMPORT TIMER      ~~~
+# Built-in version of `python -X importtime`, records self and cumulative time per module
+import_times = []               # (module, self_us, cumulative_us, depth)
+_import_state = threading.local()
+_original_import = None
+
+
+def import_report_requested() -> bool:
+    return "--import-report" in sys.argv or os.environ.get("SHOCKER_LINK_IMPORT_REPORT") == "1"
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Already loaded or relative import, nothing to time
+    if level != 0 or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    stack = getattr(_import_state, "stack", None)
+    if stack is None:
+        stack = _import_state.stack = []
+
+    stack.append(0.0)  # Time spent in nested imports
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        import_times.append((name, (elapsed - nested) * 1e6, elapsed * 1e6, len(stack)))
+
+
+def install_import_timer() -> None:
+    global _original_import
+    if _original_import is not None:
+        return
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+
+
+def uninstall_import_timer() -> None:
+    global _original_import
+    if _original_import is None:
+        return
+    builtins.__import__ = _original_import
+    _original_import = None
+
+
+def print_import_report(limit: int = 25) -> None:
+    if not import_times:
+        return
+
+    top_level = [entry for entry in import_times if entry[3] == 0]
+    total_us = sum(entry[2] for entry in top_level)
+
+    lines = [
+        f"[Startup] {CYAN}Import report ({len(import_times)} modules, {total_us / 1000:.1f} ms in top-level imports){RESET}",
+        f"{'self [us]':>12} | {'cumulative':>12} | module",
+    ]
+    for name, self_us, cumulative_us, depth in sorted(import_times, key=lambda e: e[2], reverse=True)[:limit]:
+        lines.append(f"{self_us:>12.0f} | {cumulative_us:>12.0f} | {'  ' * depth}{name}")
+    logging.info("\n".join(lines))
+
+
+# ~~~      PHASE PROFILER      ~~~
+# Enabled with --profile-startup, or --profile-startup=<file.pstats> to also dump a cProfile
+process_start = time.perf_counter()
+phases = []                     # (name, start_s, duration_s, thread name)
+phases_lock = threading.Lock()
+_profiler = None
+
+
+def profile_requested() -> bool:
+    return any(arg == "--profile-startup" or arg.startswith("--profile-startup=") for arg in sys.argv)
+
+
+def profile_output_path():
+    for arg in sys.argv:
+        if arg.startswith("--profile-startup="):
+            return arg.split("=", 1)[1] or None
+    return None
+
+
+class phase:
+    """Context manager that records how long a startup phase took and on which thread."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        with phases_lock:
+            phases.append((self.name, self.start - process_start, duration, threading.current_thread().name))
+        return False
+
+
+def start_cprofile() -> None:
+    global _profiler
+    if profile_output_path() is None or _profiler is not None:
+        return
+    import cProfile
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def stop_cprofile() -> None:
+    global _profiler
+    if _profiler is None:
+        return
+    _profiler.disable()
+    path = profile_output_path()
+    try:
+        _profiler.dump_stats(path)
+        logging.info(f"[Startup] {CYAN}Wrote cProfile stats to {path}, main thread only, the startup threads are in the phase report "
+                     f"(view with: python -m pstats {path}){RESET}")
+    except Exception as e:
+        logging.warning(f"[Startup] {YELLOW}Failed to write cProfile stats: {e}{RESET}")
+    _profiler = None
+
+
+# still_running: startup tasks that hadn't finished when the report was printed, their phases are missing or cut short
+def print_phase_report(still_running=()) -> None:
+    with phases_lock:
+        rows = sorted(phases, key=lambda p: p[1])
+
+    total = time.perf_counter() - process_start
+    name_width = max([len(r[0]) for r in rows] + [5])
+    lines = [
+        f"[Startup] {CYAN}Startup phases ({total * 1000:.1f} ms since launch){RESET}",
+        f"{'phase':<{name_width}} | {'start [ms]':>10} | {'took [ms]':>10} | {'share':>6} | thread",
+    ]
+    for name, start, duration, thread in rows:
+        lines.append(f"{name:<{name_width}} | {start * 1000:>10.1f} | {duration * 1000:>10.1f} | {duration / total:>6.1%} | {thread}")
+    if still_running:
+        lines.append(f"{YELLOW}Still running, not in the totals above: {', '.join(still_running)}{RESET}")
+    logging.info("\n".join(lines))
+
+    stop_cprofile()
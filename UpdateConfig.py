@@ -1,6 +1,9 @@
 from pathlib import Path
+import argparse
+import difflib
 import logging
-import sys
+import time
+import yaml
 import re
 
 logging.basicConfig(
@@ -18,10 +21,16 @@ CANONICAL = [
     ("key", "SHOCK_PARAMETER", 'SHOCK_PARAMETER: "Shock" # Input the parameter name you want to use for the shock (for example for touches)'),
     ("key", "SECOND_SHOCK_PARAMETER", 'SECOND_SHOCK_PARAMETER: "" # Optional second parameter for stronger shocks, takes only the second half of the curve into account (for example for slaps)'),
     ("key", "USE_PISHOCK", "USE_PISHOCK: True # Set to True if using PiShock, False for OpenShock"),
+    ("key", "SHOCKER_BACKEND", 'SHOCKER_BACKEND: "" # Leave blank to follow USE_PISHOCK, "openshock_serial" // "openshock_lan" (experimental, hub on your network) // "pishock_serial" // "mock" (no device, for testing)'),
     ("key", "OPENSHOCK_SHOCKER_ID", "OPENSHOCK_SHOCKER_ID: 41838 # Default openshock ID, change if needed, if you have multiple, split by comma (eg.: 12345, 23456)"),
     ("key", "PISHOCK_SHOCKER_ID", "PISHOCK_SHOCKER_ID: # Change if needed // blank for auto detect (chooses first shocker found on the PiShock hub), if you have multiple, split by comma (eg.: 12345, 23456)"),
     ("key", "RANDOM_OR_SEQUENTIAL", "RANDOM_OR_SEQUENTIAL: False # If using multiple shockers, this option chooses between randomizing or using them sequentially, False for random // True for sequential"),
     ("key", "SERIAL_PORT", 'SERIAL_PORT: "" # Leave blank to auto-detect'),
+    ("key", "OPENSHOCK_LAN_URL", 'OPENSHOCK_LAN_URL: "" # Only for SHOCKER_BACKEND "openshock_lan", an HTTP address that takes rftransmit JSON for your hub (experimental, the stock firmware has no documented one)'),
+    ("key", "OPENSHOCK_LAN_TOKEN", 'OPENSHOCK_LAN_TOKEN: "" # Only for SHOCKER_BACKEND "openshock_lan", sent as the OpenShockToken header if the hub needs one'),
+    ("key", "EARLY_TRIGGER_POLICY", 'EARLY_TRIGGER_POLICY: "queue" # What to do with shocks triggered before the shocker is connected, "queue" holds them until it is ready // "drop" ignores them'),
+    ("key", "EARLY_TRIGGER_MAX_AGE_S", "EARLY_TRIGGER_MAX_AGE_S: 5 # Queued early shocks older than this (in seconds) are dropped instead of fired"),
+    ("key", "SAMPLER_SEED", 'SAMPLER_SEED: "" # Leave blank for random shocks, set a number to make every session draw the same intensities and durations (for testing)'),
     ("comment", None, "# Cooldown settings"),
     ("comment", None, "# Math explanation:"),
     ("comment", None, "# --- Base_cooldown + Cooldown_factor * Amount of boops in Cooldown_window = Cooldown (s) ---"),
@@ -30,8 +39,21 @@ CANONICAL = [
     ("key", "COOLDOWN_FACTOR_S", "COOLDOWN_FACTOR_S: 0.4 # How much cooldown to add per each shock within the window"),
     ("key", "COOLDOWN_WINDOW_S", "COOLDOWN_WINDOW_S: 30 # How big is the window for the factor (in seconds), will count all boops in this timeframe"),
     ("key", "COOLDOWN_ENABLED", "COOLDOWN_ENABLED: True # Changes default state of cooldown"),
+    ("key", "COOLDOWN_POLICY", 'COOLDOWN_POLICY: "linear" # Each parameter has its own cooldown. "linear" uses the math above // "token_bucket" allows bursts of TOKEN_BUCKET_SIZE shocks // "sliding_window" allows SLIDING_WINDOW_MAX shocks per COOLDOWN_WINDOW_S'),
+    ("key", "TOKEN_BUCKET_SIZE", "TOKEN_BUCKET_SIZE: 3 # token_bucket: how many shocks can go off back to back"),
+    ("key", "TOKEN_BUCKET_REFILL_S", "TOKEN_BUCKET_REFILL_S: 10 # token_bucket: seconds until one more shock is allowed again"),
+    ("key", "SLIDING_WINDOW_MAX", "SLIDING_WINDOW_MAX: 5 # sliding_window: most shocks allowed within COOLDOWN_WINDOW_S"),
+    ("key", "SHOCKER_COOLDOWN_S", "SHOCKER_COOLDOWN_S: 0 # Minimum time between two shocks on the same shocker (in seconds), other shockers are used meanwhile, 0 to disable"),
+    ("key", "MERGE_WINDOW_S", "MERGE_WINDOW_S: 0.5 # With one shocker, triggers that pile up within this many seconds of each other are sent as one shock (highest intensity, longer duration), 0 to disable"),
+    ("comment", None, "# Shock journal"),
+    ("key", "JOURNAL_ENABLED", "JOURNAL_ENABLED: True # Records every trigger (fired, cooldown, dropped, merged, error) to journal/shocks.journal, view with: python ShockJournal.py journal"),
+    ("key", "JOURNAL_MAX_MB", "JOURNAL_MAX_MB: 8 # Size of one journal file before it is rotated, the last 5 are kept"),
+    ("key", "METRICS_PORT", "METRICS_PORT: 0 # Serves counters for Prometheus on http://127.0.0.1:PORT/metrics (for example 9469), 0 to disable"),
+    ("key", "LOG_LEVELS", 'LOG_LEVELS: "" # Log level per part of the program, split by comma (eg.: shocker=WARNING, chatbox=WARNING). Parts are shocker, chatbox, serial and root for everything else'),
+    ("key", "ENGINE_PROCESS", "ENGINE_PROCESS: False # Runs OSC and the shocker in their own process, so dragging the curve never delays shocks. Pins it to its own core on Windows and Linux (not macOS). Needs a restart"),
     ("comment", None, "# Style config"),
     ("key", "PRESET_COUNT", "PRESET_COUNT: 3 # Amount of presets"),
+    ("key", "CURVE_EDITOR", 'CURVE_EDITOR: "matplotlib" # How the curve editor is drawn, "matplotlib" // "canvas" (plain Tk drawing, starts faster and uses less memory). Needs a restart'),
     ("key", "TOUCH_SELECT_THRESHOLD", "TOUCH_SELECT_THRESHOLD: 8 # Touch treshold of the points in the curve"),
     ("key", "TOUCH_MARKER_SIZE", "TOUCH_MARKER_SIZE: 140 # Actual size of points in the curve"),
     ("key", "LINE_WIDTH", "LINE_WIDTH: 3 # Width of the curve line"),
@@ -45,61 +67,151 @@ CANONICAL = [
     ("key", "GRADIENT_RIGHT_COLOR", 'GRADIENT_RIGHT_COLOR: "#6e173b" # Right background gradient color for the curve'),
     ("comment", None, "# Vrchat Config (usually don't need to change)"),
     ("key", "VRCHAT_HOST", 'VRCHAT_HOST: "127.0.0.1"'),
+    ("key", "SESSIONS", "SESSIONS: [] # Extra VRChat instances to serve, each with its own parameters, chatbox port and preset curve (eg.: [{name: Alt, port: 9002, shock: Shock, second: StrongShock, preset: 2}])"),
 ]
 
-KEY_RE = re.compile(r"^([A-Z_]+)\s*:")
+# Keys that were renamed, old -> new. The user's value and comment are kept.
+RENAMED_KEYS = {
+    "serial_port": "SERIAL_PORT",
+}
+
+# Keys that are no longer used and get removed from the user's config
+DEPRECATED_KEYS = set()
+
+# Top-level keys only, indented lines belong to a block mapping (like a SESSIONS entry)
+KEY_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)\s*:")
 
 
 def parse_keys_from_lines(lines: list[str]) -> dict[str, int]:
     result = {}
     for i, line in enumerate(lines):
-        m = KEY_RE.match(line.strip())
+        m = KEY_RE.match(line)
         if m:
             result[m.group(1)] = i
     return result
 
 
-def find_insert_position(file_lines: list[str], canonical_index: int, file_keys: dict[str, int]) -> int:
-    # Walk backwards through canonical entries before this one
-    for i in range(canonical_index - 1, -1, -1):
-        ctype, ckey, _ = CANONICAL[i]
-        if ctype == "key" and ckey in file_keys:
-            return file_keys[ckey] + 1  # Insert after that key's line
-    return len(file_lines)  # Fallback: append
+# True for a key line without a value, like SERIAL_PORT: "" # Leave blank to auto-detect
+def is_blank(line: str) -> bool:
+    try:
+        value = next(iter((yaml.safe_load(line) or {}).values()), None)
+    except (yaml.YAMLError, AttributeError):
+        return False
+    return value is None or value == ""
+
 
+# Single pass over the user's lines and one over CANONICAL, so it stays linear for big generated configs.
+# Returns the merged lines and a list of human readable changes.
+def merge_config(lines: list[str], canonical: list = CANONICAL) -> tuple[list[str], list[str]]:
+    changes = []
+    out = []
+    present = {}  # key -> index in out
+    renamed = {}  # new key -> old spelling, for keys whose line in out was renamed
 
-def update_config(path: Path) -> None:
+    # Pass 1: keep user lines as they are, apply renames and drop deprecated keys
+    for line in lines:
+        m = KEY_RE.match(line)
+        if m:
+            key = m.group(1)
+            old_key = key if key in RENAMED_KEYS else renamed.get(key)
+            if key in RENAMED_KEYS:
+                key = RENAMED_KEYS[key]
+                line = line.replace(old_key, key, 1)
+            if old_key and key in present:
+                # Both spellings are set (old configs only read the old one), one line is kept:
+                # the new spelling's value, or the old one's if the new one is blank
+                new_line, old_line = (out[present[key]], line) if m.group(1) in RENAMED_KEYS else (line, out[present[key]])
+                if is_blank(new_line) and not is_blank(old_line):
+                    out[present[key]] = old_line
+                    changes.append(f"Moved the {old_key} value to the blank {key}")
+                else:
+                    out[present[key]] = new_line
+                    changes.append(f"Removed {old_key} (already set as {key})")
+                renamed.pop(key, None)
+                continue
+            if key != m.group(1):
+                changes.append(f"Renamed {old_key} to {key}")
+                renamed[key] = old_key
+            if key in DEPRECATED_KEYS:
+                changes.append(f"Removed deprecated {key}")
+                continue
+            present.setdefault(key, len(out))
+        out.append(line)
+
+    # Pass 2: walk CANONICAL, missing keys go after the closest earlier canonical key the user has
+    inserts = {}
+    anchor = None  # None -> append at the end
+    for ctype, ckey, cline in canonical:
+        if ctype != "key":
+            continue
+        if ckey in present:
+            anchor = present[ckey]
+        else:
+            inserts.setdefault(anchor, []).append(cline)
+            changes.append(f"Added {ckey}")
+
+    merged = []
+    for i, line in enumerate(out):
+        merged.append(line)
+        merged.extend(inserts.get(i, ()))
+    merged.extend(inserts.get(None, ()))
+    return merged, changes
+
+
+def update_config(path: Path, dry_run: bool = False) -> None:
     if not path.exists():
         logging.warning(f"[ConfigSync] {YELLOW}Config not found at {path}, creating fresh.{RESET}")
+        if dry_run:
+            return
         text = "\n".join(line for _, _, line in CANONICAL) + "\n"
         path.write_text(text, encoding="utf-8")
         logging.info(f"[ConfigSync] {CYAN}Done.{RESET}")
         return
 
     lines = path.read_text(encoding="utf-8").splitlines()
-    file_keys = parse_keys_from_lines(lines)
-
-    missing = [key for t, key, _ in CANONICAL if t == "key" and key not in file_keys]
+    merged, changes = merge_config(lines)
 
-    if not missing:
+    if not changes:
         logging.info(f"[ConfigSync] {CYAN}Config is already at the latest version.{RESET}")
         return
 
-    logging.info(f"[ConfigSync] {YELLOW}Missing keys: {missing}{RESET}")
+    for change in changes:
+        logging.info(f"[ConfigSync]   {CYAN}{change}{RESET}")
 
-    for key in missing:
-        canon_idx = next(i for i, (t, k, _) in enumerate(CANONICAL) if t == "key" and k == key)
-        _, _, default_line = CANONICAL[canon_idx]
+    if dry_run:
+        diff = difflib.unified_diff(lines, merged, fromfile=str(path), tofile=f"{path} (updated)", lineterm="")
+        print("\n".join(diff))
+        return
 
-        file_keys = parse_keys_from_lines(lines)
-        insert_at = find_insert_position(lines, canon_idx, file_keys)
+    path.write_text("\n".join(merged) + "\n", encoding="utf-8")
+    logging.info(f"[ConfigSync] {CYAN}Updated {path}{RESET}")
 
-        lines.insert(insert_at, default_line)
-        logging.info(f"[ConfigSync]   {CYAN}Inserted {key} at line {insert_at + 1}{RESET}")
 
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    logging.info(f"[ConfigSync] {CYAN}Updated {path}{RESET}")
+# Times merge_config on generated configs with many parameter routes
+def benchmark(sizes=(1_000, 10_000, 100_000)) -> None:
+    for n in sizes:
+        canonical = list(CANONICAL) + [("key", f"ROUTE_{i}", f'ROUTE_{i}: "Param{i}" # Generated route') for i in range(n)]
+        # User file has every other key, with a comment above each
+        lines = []
+        for i, (ctype, ckey, cline) in enumerate(canonical):
+            if ctype == "key" and i % 2:
+                lines.append(f"# user comment {i}")
+                lines.append(cline)
+
+        start = time.perf_counter()
+        merged, changes = merge_config(lines, canonical)
+        elapsed = time.perf_counter() - start
+        logging.info(f"[ConfigSync] {CYAN}{n:>7} routes: {len(lines):>7} lines -> {len(merged):>7} lines, {len(changes)} changes in {elapsed * 1000:.1f} ms{RESET}")
+
     
 if __name__ == "__main__":
-    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("config.yml")
-    update_config(target)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bring config.yml up to date with the latest keys")
+    parser.add_argument("path", nargs="?", default="config.yml")
+    parser.add_argument("--dry-run", action="store_true", help="Print a diff instead of writing the file")
+    parser.add_argument("--benchmark", action="store_true", help="Time the merge on large generated configs")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        update_config(Path(args.path), dry_run=args.dry_run)
@@ -1,33 +1,169 @@
-import requests, os, json, zipfile, io, glob, shutil
+import requests, os, json, zipfile, shutil, hashlib
 from pathlib import Path
 import subprocess
+import time
 import sys
 
 config_path = Path("config.yml")
 
-API_BASE = "https://api.github.com"
+# Can point at a local stand-in server for testing
+API_BASE = os.environ.get("SHOCKER_LINK_UPDATE_API", "https://api.github.com")
 REPO_OWNER = "poprox24"
 REPO_NAME = "VRChat-Shocker-Link"
 REPO_BRANCH = "master"
 
+CHECK_TTL_S = float(os.environ.get("SHOCKER_LINK_UPDATE_TTL_S", 6 * 60 * 60)) # Skip the check if the last one is newer than this
+REQUEST_TIMEOUT_S = 3                                                           # Don't hold up the launch on a slow network
+
+UPDATE_DIR = "update"
+MANIFEST_PATH = "update_manifest.json"  # sha256 of every file the updater installed
+SKIP_FILES = {"config.yml"}             # Never overwrite the user's files
+
 RED = "\033[31m"
 YELLOW = "\033[33m"
 CYAN = "\033[36m"
 RESET = "\033[0m"
 
-def fetch_last_commit_info():
-    r = requests.get(f"{API_BASE}/repos/{REPO_OWNER}/{REPO_NAME}/commits/{REPO_BRANCH}")
+# Conditional request, returns None when the server says nothing changed (304)
+def fetch_last_commit_info(etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    r = requests.get(f"{API_BASE}/repos/{REPO_OWNER}/{REPO_NAME}/commits/{REPO_BRANCH}", headers=headers, timeout=REQUEST_TIMEOUT_S)
+    if r.status_code == 304:
+        return None
+    r.raise_for_status()
     js = r.json()
-    return js['sha'], js['commit']['author']['name'], js['commit']['message']
+    return js['sha'], js['commit']['author']['name'], js['commit']['message'], r.headers.get("ETag")
+
+# Streams the zipball to disk instead of holding it in memory
+def fetch_latest_repo_zip(dest: Path) -> Path:
+    print(f"[Updatecheck] {CYAN}Downloading update...{RESET}")
+    with requests.get(f"{API_BASE}/repos/{REPO_OWNER}/{REPO_NAME}/zipball/{REPO_BRANCH}", stream=True, timeout=REQUEST_TIMEOUT_S) as r:
+        r.raise_for_status()
+        total = int(r.headers.get("Content-Length") or 0)
+        done = 0
+        with open(dest, "wb") as f:
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+                done += len(chunk)
+                if total:
+                    print(f"\r[Updatecheck] {CYAN}{done / 1024:.0f} / {total / 1024:.0f} KiB ({done / total:.0%}){RESET}", end="", flush=True)
+                else:
+                    print(f"\r[Updatecheck] {CYAN}{done / 1024:.0f} KiB{RESET}", end="", flush=True)
+    print()
+    return dest
+
+def sha256_stream(f) -> str:
+    h = hashlib.sha256()
+    for chunk in iter(lambda: f.read(64 * 1024), b""):
+        h.update(chunk)
+    return h.hexdigest()
+
+def sha256_file(path: Path) -> str:
+    with open(path, "rb") as f:
+        return sha256_stream(f)
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST_PATH, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_manifest(manifest: dict):
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+
+# Hashes every archive member and stages only the ones that differ from what is installed.
+# Returns {relative path: sha256} for all members and the list of staged paths.
+def stage_changed_files(zip_path: Path, install_dir: Path, staging: Path, manifest: dict):
+    hashes = {}
+    changed = []
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        for info in zf.infolist():
+            # Zipball members are "<owner>-<repo>-<sha>/<path>"
+            parts = info.filename.split("/", 1)
+            if info.is_dir() or len(parts) < 2 or not parts[1]:
+                continue
+            rel = parts[1]
+            if Path(rel).name in SKIP_FILES or ".." in Path(rel).parts:
+                continue
+
+            with zf.open(info) as member:
+                digest = sha256_stream(member)
+            hashes[rel] = digest
+
+            # No manifest entry yet (first incremental update), compare against the file on disk
+            installed = manifest.get(rel)
+            target = install_dir / rel
+            if installed is None and target.is_file():
+                installed = sha256_file(target)
+            if installed == digest and target.is_file():
+                continue
+
+            staged = staging / rel
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(info) as member, open(staged, "wb") as out:
+                shutil.copyfileobj(member, out, 64 * 1024)
+            changed.append(rel)
+    return hashes, changed
+
+# Moves staged files over the install one by one, backing up the old ones.
+# If anything fails every file that was already swapped is put back.
+def swap_in(changed: list, install_dir: Path, staging: Path, backup: Path):
+    swapped = []  # (rel, had_previous)
+    try:
+        for rel in changed:
+            target = install_dir / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            had_previous = target.exists()
+            if had_previous:
+                (backup / rel).parent.mkdir(parents=True, exist_ok=True)
+                os.replace(target, backup / rel)
+            swapped.append((rel, had_previous))
+            os.replace(staging / rel, target)
+    except Exception:
+        print(f"[Updatecheck] {RED}Update failed, rolling back {len(swapped)} file(s).{RESET}")
+        for rel, had_previous in reversed(swapped):
+            target = install_dir / rel
+            try:
+                if had_previous:
+                    os.replace(backup / rel, target)
+                elif target.exists():
+                    target.unlink()
+            except Exception as e:
+                print(f"[Updatecheck] {RED}Couldn't restore {rel}: {e}{RESET}")
+        raise
 
-def fetch_latest_repo_zip():
-    print(f"[Updatecheck] {CYAN}Updating zip...{RESET}")
-    r = requests.get(f"{API_BASE}/repos/{REPO_OWNER}/{REPO_NAME}/zipball/{REPO_BRANCH}")
-    return r.content
+def apply_update(zip_path: Path, install_dir: Path) -> int:
+    staging = Path(UPDATE_DIR) / "staging"
+    backup = Path(UPDATE_DIR) / "backup"
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(backup, ignore_errors=True)
 
-def save_json(hash, author, message):
+    try:
+        manifest = load_manifest()
+        hashes, changed = stage_changed_files(zip_path, install_dir, staging, manifest)
+        if not hashes:
+            raise RuntimeError("Update archive is empty")
+
+        swap_in(changed, install_dir, staging, backup)
+        save_manifest(hashes)
+        for rel in changed:
+            print(f"[Updatecheck]   {CYAN}Updated {rel}{RESET}")
+        return len(changed)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(backup, ignore_errors=True)
+
+def save_json(hash, author, message, etag=None, checked_at=None):
     with open("version.json", 'w') as f:
-        f.write(json.dumps({'hash': hash, 'author': author, 'message': message}))
+        f.write(json.dumps({'hash': hash, 'author': author, 'message': message, 'etag': etag,
+                            'checked_at': time.time() if checked_at is None else checked_at}))
+
+def touch_json(info):
+    save_json(info['hash'], info['author'], info['message'], info.get('etag'))
 
 def load_json():
     js = None
@@ -36,39 +172,64 @@ def load_json():
     return js
 
 if __name__ == "__main__":
+    check_start = time.perf_counter()
+    force = "--force" in sys.argv
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+
+    last_info = None
+    if os.path.exists("version.json"):
+        try:
+            last_info = load_json()
+        except Exception:
+            print(f"[Updatecheck] {YELLOW}version.json is unreadable, checking again.{RESET}")
+
+    # Checked recently, skip the network round-trip entirely
+    if last_info and not force and time.time() - last_info.get('checked_at', 0) < CHECK_TTL_S:
+        print(f"[Updatecheck] {CYAN}Checked recently, skipping. (use --force to check now){RESET}")
+        exit(0)
+
+    try:
+        latest = fetch_last_commit_info(last_info.get('etag') if last_info else None)
+    except Exception as e:
+        print(f"[Updatecheck] {YELLOW}Update check failed, starting anyway: {e}{RESET}")
+        exit(0)
+
+    # 304, nothing new since the stored ETag
+    if latest is None:
+        touch_json(last_info)
+        print(f"[Updatecheck] {CYAN}Scripts up to date! (not modified, checked in {(time.perf_counter() - check_start) * 1000:.0f} ms){RESET}")
+        exit(0)
 
-    hash, author, message = fetch_last_commit_info()
-    if not os.path.exists("version.json"):
-        save_json("0", author, message)
+    hash, author, message, etag = latest
+    if last_info is None:
+        # Not checked yet as far as the TTL goes, a failed first update is retried on the next start
+        save_json("0", author, message, checked_at=0)
+        last_info = load_json()
     
-    last_info = load_json()
     if last_info['hash'] == hash:
-        print(f"[Updatecheck] {CYAN}Scripts up to date!{RESET}")
+        save_json(hash, author, message, etag)
+        print(f"[Updatecheck] {CYAN}Scripts up to date! (checked in {(time.perf_counter() - check_start) * 1000:.0f} ms){RESET}")
         exit(0)
     
     print(f"[Updatecheck] {CYAN}Updating to version {hash}{RESET}!")
     print(f"[Updatecheck] {CYAN}Commit: {message} - {author}{RESET}")
 
-    update_zip = fetch_latest_repo_zip()
-    with zipfile.ZipFile(io.BytesIO(update_zip), 'r') as zf:
-        for file in zf.filelist:
-            if 'config.yml' in file.filename:
-                continue
-            zf.extract(file, "update")
-    
-    update_folder = glob.glob(f"./update/{REPO_OWNER}-{REPO_NAME}-*", recursive=True)
-    if len(update_folder) < 0.1:
-        print(f"[Updatecheck] {RED}Can't find extracted zip?{RESET}")
+    os.makedirs(UPDATE_DIR, exist_ok=True)
+    zip_path = Path(UPDATE_DIR) / "update.zip"
+    try:
+        fetch_latest_repo_zip(zip_path)
+        changed_count = apply_update(zip_path, Path(os.getcwd()))
+    except Exception as e:
+        print(f"[Updatecheck] {RED}Update failed, keeping the current version: {e}{RESET}")
         exit(1)
-
-    update_folder = update_folder[0]
-    shutil.copytree(update_folder, os.getcwd(), dirs_exist_ok=True)
-    
-    shutil.rmtree(update_folder, ignore_errors=True)
+    finally:
+        if zip_path.exists():
+            zip_path.unlink()
+    print(f"[Updatecheck] {CYAN}{changed_count} file(s) changed.{RESET}")
     
-    target = Path(sys.argv[1]) if len(sys.argv) > 1 else config_path
+    target = Path(args[0]) if args else config_path
     subprocess.run([sys.executable, "UpdateConfig.py", str(target)], check=True)
 
-    save_json(hash, author, message)
+    save_json(hash, author, message, etag)
     print(f"[Updatecheck] {CYAN}Update complete!{RESET}")
     
\ No newline at end of file
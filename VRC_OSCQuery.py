@@ -1,9 +1,8 @@
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pythonosc.osc_server import BlockingOSCUDPServer
-from pythonosc.udp_client import SimpleUDPClient
-from pythonosc.dispatcher import Dispatcher
-from zeroconf import Zeroconf, ServiceInfo
-import socket, threading, json
+from pythonosc.dispatcher import Dispatcher, Handler
+import socket, struct, threading, json, time
+import asyncio
 from typing import Callable
 import logging
 
@@ -17,20 +16,111 @@ logging.basicConfig(
     )
 
 # Used for sending messages to VRChat
-def vrc_client(vrchat_host) -> SimpleUDPClient:
-    return SimpleUDPClient(vrchat_host, 9000)
+def vrc_client(vrchat_host, port: int = 9000) -> "OSCSender":
+    return OSCSender(vrchat_host, port)
+
+
+def _osc_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return data + b"\0" * (4 - len(data) % 4)
+
+
+# Sends OSC messages from one non-blocking UDP socket, with a send_message like SimpleUDPClient.
+# The address and type tags are encoded once per message shape, whole datagrams are cached for repeated
+# messages (the clear message, the same cooldown text), so a new text only encodes its own string.
+class OSCSender:
+    CACHE_SIZE = 256
+
+    def __init__(self, host: str, port: int):
+        self.target = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.prefixes = {}
+        self.datagrams = {}
+        self.stats = {"sent": 0, "cache_hits": 0, "dropped": 0, "encode_ns": 0, "encoded": 0}
+
+    def encode(self, address: str, value) -> bytes:
+        args = value if isinstance(value, (tuple, list)) else (value,)
+        # True == 1 and 1 == 1.0 hash the same but encode differently, so the types are part of the key
+        key = (address, *map(type, args), *args)
+        datagram = self.datagrams.get(key)
+        if datagram is not None:
+            self.stats["cache_hits"] += 1
+            return datagram
+
+        start = time.perf_counter_ns()
+        tags = "".join(("T" if a else "F") if isinstance(a, bool) else "i" if isinstance(a, int)
+                       else "f" if isinstance(a, float) else "s" for a in args)
+        prefix = self.prefixes.get((address, tags))
+        if prefix is None:
+            prefix = self.prefixes[(address, tags)] = _osc_string(address) + _osc_string("," + tags)
+        parts = [prefix]
+        for tag, a in zip(tags, args):
+            if tag == "s":
+                parts.append(_osc_string(str(a)))
+            elif tag == "i":
+                parts.append(struct.pack(">i", a))
+            elif tag == "f":
+                parts.append(struct.pack(">f", a))
+        datagram = b"".join(parts)
+
+        if len(self.datagrams) >= self.CACHE_SIZE:
+            self.datagrams.clear()
+        self.datagrams[key] = datagram
+        self.stats["encode_ns"] += time.perf_counter_ns() - start
+        self.stats["encoded"] += 1
+        return datagram
+
+    def send_message(self, address: str, value) -> None:
+        datagram = self.encode(address, value)
+        try:
+            self.sock.sendto(datagram, self.target)
+        except BlockingIOError:
+            # Socket buffer full, a chatbox line isn't worth waiting for
+            self.stats["dropped"] += 1
+            return
+        self.stats["sent"] += 1
+
+
+# Dispatcher with exact address routes that can be swapped while the server is running.
+# set_routes replaces the whole table with one assignment, so the server thread never sees a half update.
+# capture can be set to an OSCCapture.CaptureWriter to record every datagram before it is dispatched.
+# received counts every datagram, routed or not, it is only written from the OSC server thread.
+class RouteDispatcher(Dispatcher):
+    def __init__(self, routes: dict[str, Callable] = None):
+        super().__init__()
+        self.routes = {}
+        self.capture = None
+        self.received = 0
+        self.set_routes(routes or {})
+
+    def set_routes(self, routes: dict[str, Callable]) -> None:
+        self.routes = {route: Handler(handler, []) for route, handler in routes.items()}
+
+    def params(self) -> set[str]:
+        return {route.split("/")[-1] for route in self.routes}
+
+    def handlers_for_address(self, address_pattern: str):
+        handler = self.routes.get(address_pattern)
+        if handler is not None:
+            yield handler
+
+    def call_handlers_for_packet(self, data: bytes, client_address):
+        self.received += 1
+        capture = self.capture
+        if capture is not None:
+            capture.write(time.monotonic_ns(), data)
+        return super().call_handlers_for_packet(data, client_address)
 
 
 # Simple function that turns a dictionary to a dispatcher
-def dict_to_dispatcher(routes: dict[str, Callable]) -> Dispatcher:
-    d = Dispatcher()
-    for route, handler in routes.items():
-        d.map(route, handler)
-    return d
+def dict_to_dispatcher(routes: dict[str, Callable]) -> RouteDispatcher:
+    return RouteDispatcher(routes)
 
 
-# Starts the OSC and HTTP discovery server
-def start_osc(name: str, dispatcher: Dispatcher, params: set[str] = None) -> Zeroconf:
+# Starts the OSC and HTTP discovery server, returns the HTTP port to advertise
+# params can be a set or a callable returning the currently advertised parameters
+def start_osc_servers(dispatcher: Dispatcher, params: set[str] | Callable = None, on_query: Callable = None) -> int:
     try:
         osc_server = BlockingOSCUDPServer(("127.0.0.1", 0), dispatcher)
     except Exception as e:
@@ -48,6 +138,8 @@ def start_osc(name: str, dispatcher: Dispatcher, params: set[str] = None) -> Zer
             self.end_headers()
             if "HOST_INFO" in self.path:
                 self.wfile.write(json.dumps({"OSC_PORT": osc_port}).encode())
+                if on_query:
+                    on_query()
                 # host_done = True
             else:
                 self.wfile.write(json.dumps({"CONTENTS": {
@@ -58,7 +150,7 @@ def start_osc(name: str, dispatcher: Dispatcher, params: set[str] = None) -> Zer
                                 "FULL_PATH": "/avatar/parameters",
                                 "CONTENTS": {
                                     p: {"FULL_PATH": f"/avatar/parameters/{p}"}
-                                    for p in (params or set())
+                                    for p in ((params() if callable(params) else params) or set())
                                 }
                             }
                         }
@@ -80,15 +172,99 @@ def start_osc(name: str, dispatcher: Dispatcher, params: set[str] = None) -> Zer
     
     http_port = httpd.server_address[1]
 
-    zc = Zeroconf()
-    zc.register_service(ServiceInfo(
-        "_oscjson._tcp.local.",
-        f"{name}._oscjson._tcp.local.",
-        addresses=[socket.inet_aton("127.0.0.1")],
-        port=http_port
-    ))
-
     threading.Thread(target=osc_server.serve_forever, daemon=True).start()
     threading.Thread(target=httpd.serve_forever, daemon=True).start()
     
-    return zc
+    return http_port
+
+
+# Announces the OSCQuery HTTP server over mDNS using AsyncZeroconf on its own event loop,
+# so registration never blocks the caller and can be repeated without a new instance
+class OSCQueryAdvertiser:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.aiozc = None
+        self.browser = None
+        self.info = None
+        self.announced_at = None
+        self.thread = threading.Thread(target=self.loop.run_forever, name="oscquery-mdns", daemon=True)
+        self.thread.start()
+        # Zeroconf is only imported once something is actually announced
+        self.ready = asyncio.run_coroutine_threadsafe(self._create(), self.loop)
+
+    async def _create(self):
+        from zeroconf.asyncio import AsyncZeroconf
+        start = time.perf_counter()
+        self.aiozc = AsyncZeroconf()
+        logging.info(f"[VRC OSC] {CYAN}Zeroconf ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    async def _register(self, name: str, http_port: int):
+        from zeroconf.asyncio import AsyncServiceBrowser
+        from zeroconf import ServiceInfo
+
+        self.info = ServiceInfo(
+            "_oscjson._tcp.local.",
+            f"{name}._oscjson._tcp.local.",
+            addresses=[socket.inet_aton("127.0.0.1")],
+            port=http_port
+        )
+        start = time.perf_counter()
+        await (await self.aiozc.async_register_service(self.info))
+        self.announced_at = time.perf_counter()
+        logging.info(f"[VRC OSC] {CYAN}Registered {name} in {(self.announced_at - start) * 1000:.0f} ms")
+
+        # VRChat advertises its own OSCQuery service, re-announce as soon as a new client shows up
+        if self.browser is None:
+            self.browser = AsyncServiceBrowser(self.aiozc.zeroconf, "_oscjson._tcp.local.", handlers=[self._on_service_change])
+
+    async def _reannounce(self):
+        if self.info is None:
+            return
+        start = time.perf_counter()
+        await (await self.aiozc.async_update_service(self.info))
+        self.announced_at = time.perf_counter()
+        logging.info(f"[VRC OSC] {CYAN}Re-announced {self.info.name.split('.')[0]} in {(self.announced_at - start) * 1000:.0f} ms")
+
+    async def _close(self):
+        start = time.perf_counter()
+        if self.browser is not None:
+            await self.browser.async_cancel()
+        if self.info is not None:
+            await self.aiozc.async_unregister_all_services()
+        await self.aiozc.async_close()
+        logging.info(f"[VRC OSC] {CYAN}Unregistered in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _on_service_change(self, zeroconf, service_type, name, state_change):
+        from zeroconf import ServiceStateChange
+        if state_change is ServiceStateChange.Added and name.startswith("VRChat-Client"):
+            logging.info(f"[VRC OSC] {CYAN}VRChat client {name.split('.')[0]} appeared, re-announcing.")
+            self.reannounce().add_done_callback(self._on_reannounced)
+
+    # Done-callback of the automatic re-announce, nobody else waits on that future
+    def _on_reannounced(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.warning(f"[VRC OSC] {YELLOW}Re-announce failed: {future.exception()}")
+
+    # Returns a concurrent future, resolved once probing and announcing are done
+    def register(self, name: str, http_port: int):
+        async def run():
+            await asyncio.wrap_future(self.ready)
+            await self._register(name, http_port)
+        return asyncio.run_coroutine_threadsafe(run(), self.loop)
+
+    def reannounce(self):
+        return asyncio.run_coroutine_threadsafe(self._reannounce(), self.loop)
+
+    # Called when VRChat queries the HTTP server, tells how long discovery took
+    def mark_queried(self):
+        if self.announced_at is not None:
+            logging.info(f"[VRC OSC] {CYAN}Discovered by VRChat {(time.perf_counter() - self.announced_at) * 1000:.0f} ms after announcement")
+            self.announced_at = None
+
+    def close(self, timeout: float = 3):
+        try:
+            if self.ready.result(timeout=timeout) is None and self.aiozc is not None:
+                asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(timeout=timeout)
+        except Exception as e:
+            logging.warning(f"[VRC OSC] {YELLOW}Failed to unregister cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -1,21 +1,35 @@
-from VRC_OSCQuery import vrc_client, dict_to_dispatcher, start_osc
-from pishock.zap.serialapi import SerialAutodetectError, SerialAPI
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from serial.serialutil import SerialException
-from serial.tools import list_ports
-import matplotlib.pyplot as plt
-from queue import Queue, Empty
+import StartupProfiler
+if StartupProfiler.import_report_requested():
+    StartupProfiler.install_import_timer()
+if StartupProfiler.profile_requested():
+    StartupProfiler.start_cprofile()
+
+from VRC_OSCQuery import vrc_client, dict_to_dispatcher, start_osc_servers, OSCQueryAdvertiser
+from ConfigModel import load_config, ConfigWatcher, RUNTIME_SAFE_KEYS, COOLDOWN_KEYS
+from CooldownPolicy import CooldownTable
+from ShockJournal import ShockJournal, FIRED, COOLDOWN, DROPPED, ERROR, MERGED, NO_SHOCKER
+from ShockScheduler import ShockScheduler, merge_shocks
+from ShockerBackends import make_backend
+from CurveModel import CurveModel, MIN_POINTS
+from SamplePool import SamplePool
+from ShockProfile import make_profile
+from Sessions import Session, Chatbox, build_sessions
+from Metrics import metrics, start_metrics_server
+import OSCCapture
+import EngineProcess
+import LogPipeline
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty
 from tkinter import ttk
 import tkinter as tk
 import numpy as np
 import threading
 import logging
 import random
-import serial
 import shutil
 import time
 import json
-import yaml
 import os
 
 # Load config
@@ -30,62 +44,23 @@ YELLOW = "\033[33m"
 CYAN = "\033[36m"
 RESET = "\033[0m"
 
-try:
-    config = yaml.safe_load(open(config_path)) or {}
-except FileNotFoundError:
-    logging.exception(f"{RED}Could not find config.yml file. Using default config")
-    config = {}
-except Exception as e:
-    logging.exception(f"{RED}Could not load config.yml file. Using default config")
-    config = {}
+# Console output goes through a queue, so the trigger path never waits on a slow terminal.
+# Hot path lines pass their values as arguments and are only formatted on the log thread.
+LogPipeline.start_logging()
+shocker_log = logging.getLogger("shocker")
 
-# Cleanup
-to_be_deleted = {
-    "vrchat_oscquery"
-}
-for item in to_be_deleted:
-    if os.path.isdir(item):
-        try:
-            shutil.rmtree(os.path.abspath(item))
-            logging.info(f"[Janitor] {CYAN}Deleted a no longer needed directory {item}.")
-        except Exception as e:
-            logging.warning(f"[Janitor] {YELLOW}Failed to delete a no longer needed directory {item}, please delete this folder manually.")
-
-
-def return_list(x):
-    if x is None:
-        return []
-
-    if isinstance(x, str):
-        parts = [p.strip() for p in x.split(",")]
-        return [p for p in parts if p]
-
-    if isinstance(x, (list, tuple)):
-        return list(x)
-
-    return [x]
+# Typed config, the runtime-safe keys are read through `settings` so a reload swaps them in one go
+with StartupProfiler.phase("load config.yml"):
+    settings = load_config(config_path)
+LogPipeline.set_levels(settings.LOG_LEVELS)
     
 # --- NETWORK / Serial Config
-USE_PISHOCK = config.get("USE_PISHOCK", False) # Use PiShock if True, else OpenShock
-OPENSHOCK_SHOCKER_IDS = return_list(config.get("OPENSHOCK_SHOCKER_ID", [None])) # ID for OpenShock shockers
+USE_PISHOCK = settings.USE_PISHOCK # Use PiShock if True, else OpenShock
 
-PISHOCK_SHOCKER_IDS = return_list(config.get("PISHOCK_SHOCKER_ID", []))
-RANDOM_OR_SEQUENTIAL = config.get("RANDOM_OR_SEQUENTIAL", False)
-
-OPENSHOCK_SERIAL_BAUDRATE = 115200
-SERIAL_PORT = config.get("serial_port", "")
-SHOCK_PARAM = f"/avatar/parameters/{config.get('SHOCK_PARAMETER', None)}" # OSC parameter to listen for shock trigger
-SECOND_SHOCK_PARAM = f"/avatar/parameters/{config.get('SECOND_SHOCK_PARAMETER', None)}" # Seccond parameter for stronger shocks
-
-
-VRCHAT_HOST = config.get("VRCHAT_HOST", "127.0.0.1")
+VRCHAT_HOST = settings.VRCHAT_HOST
 
 # Base config
-BASE_COOLDOWN_S = config.get("BASE_COOLDOWN_S", 2)
-MAX_COOLDOWN_S = config.get("MAX_COOLDOWN_S", 6)
-COOLDOWN_FACTOR_S = config.get("COOLDOWN_FACTOR_S", 0.4)
-COOLDOWN_WINDOW_S = config.get("COOLDOWN_WINDOW_S", 30)
-COOLDOWN_ENABLED = config.get("COOLDOWN_ENABLED", True)
+COOLDOWN_ENABLED = settings.COOLDOWN_ENABLED
 
 UI_VIEW_MIN_PERCENT = 30
 UI_VIEW_MAX_PERCENT = 68
@@ -94,20 +69,21 @@ UI_CONTROL_POINTS = [(36, 0.5), (45, 0.4), (59, 0.25)]
 CONFIG_FILE_PATH = "curve_config.json"
 
 # Style config
-TOUCH_SELECT_THRESHOLD = config.get("TOUCH_SELECT_THRESHOLD", 8)
-TOUCH_MARKER_SIZE = config.get("TOUCH_MARKER_SIZE", 120)
-LINE_WIDTH = config.get("LINE_WIDTH", 3)
-OUTSIDE_CURVE_BG = config.get("OUTSIDE_CURVE_BG", "#2A313D")
-INSIDE_CURVE_BG = config.get("INSIDE_CURVE_BG", "#2C3749")
-BACKGROUND_COLOR = config.get("BACKGROUND_COLOR", "#202630")
-CURVE_LINE_COLOR = config.get("CURVE_LINE_COLOR", "#00C2FF")
-MARKER_COLOR = config.get("MARKER_COLOR", "#D88A91")
-LABEL_COLOR = config.get("LABEL_COLOR", "#E6EEF6")
-PRESET_NORMAL_BG = config.get("PRESET_NORMAL_BG", "#202630")
-PRESET_DEFAULT_BG = config.get("PRESET_DEFAULT_BG", "#2E8A57")
-GRADIENT_LEFT_COLOR = config.get("GRADIENT_LEFT_COLOR", "#42953b")
-GRADIENT_RIGHT_COLOR = config.get("GRADIENT_RIGHT_COLOR", "#6e173b")
-PRESET_COUNT = config.get("PRESET_COUNT", 3)
+TOUCH_SELECT_THRESHOLD = settings.TOUCH_SELECT_THRESHOLD
+TOUCH_MARKER_SIZE = settings.TOUCH_MARKER_SIZE
+LINE_WIDTH = settings.LINE_WIDTH
+OUTSIDE_CURVE_BG = settings.OUTSIDE_CURVE_BG
+INSIDE_CURVE_BG = settings.INSIDE_CURVE_BG
+BACKGROUND_COLOR = settings.BACKGROUND_COLOR
+CURVE_LINE_COLOR = settings.CURVE_LINE_COLOR
+MARKER_COLOR = settings.MARKER_COLOR
+LABEL_COLOR = settings.LABEL_COLOR
+PRESET_NORMAL_BG = settings.PRESET_NORMAL_BG
+PRESET_DEFAULT_BG = settings.PRESET_DEFAULT_BG
+GRADIENT_LEFT_COLOR = settings.GRADIENT_LEFT_COLOR
+GRADIENT_RIGHT_COLOR = settings.GRADIENT_RIGHT_COLOR
+PRESET_COUNT = settings.PRESET_COUNT
+CURVE_EDITOR = settings.CURVE_EDITOR
 
 # ~~~      VARIABLES      ~~~
 # Drag/Edit state
@@ -120,9 +96,9 @@ drag_context = {}
 undo_history = []
 redo_history = []
 
-# Timestamps for trigger cooldown
-trigger_timestamps = []
-last_trigger_time = 0
+# Cooldown policies, one per shock parameter plus the per-shocker gap
+cooldowns = CooldownTable(settings)
+trigger_clock = time.monotonic  # Swapped for the capture's clock during an OSC replay
     
 # Presets
 presets = [None] * PRESET_COUNT
@@ -130,39 +106,41 @@ preset_names = [f"Preset {i+1}" for i in range(PRESET_COUNT)]
 default_preset_index = None
 preset_buttons = []
 preset_save_buttons = []
+status_labels = {}
 
-# Serial
-pishock_api = None
-serial_connection = None        # Shocker Serial Connection
-shockers = []                   # Shocker List
-serial_q = Queue()              # Serial Queue
-serial_stop = threading.Event() # Serial stop for shutdown logic
+# Shocker device, SHOCKER_BACKEND picks it, blank follows USE_PISHOCK
+backend = make_backend(settings.SHOCKER_BACKEND or ("pishock_serial" if USE_PISHOCK else "openshock_serial"),
+                       settings, reconnect=lambda: connect_serial())
+shockers = []                   # Shocker List, the backend's shockers once connected
 
 # Shocker
 last_shocker_index = -1         # Last shocker used for sequential firing
-shock_q = Queue()               # Shocker queue
+shock_q = ShockScheduler()      # Shocker queue, strong shocks first and piled up triggers merged
 shocker_stop = threading.Event()# Shocker stop for shutdown logic
 
 MIN_SHOCK_DURATION = -1
 MAX_SHOCK_DURATION = -1
-MESSAGE_COOLDOWN = 1.2          # VRC Message Cooldown
 
-# Config for chat message sending
-clear_timer = None              # Timer for clearing messages
-last_send_time = 0              # Time of last message
-send_lock = threading.Lock()    # Prevent multiple threads trying to send messages at once
+# Sessions, one per VRChat instance. The first one is the editor's curve and the main config,
+# SESSIONS in config.yml adds more that share the shockers and workers.
+main_session = Session(0, "main", Chatbox(), cooldowns, settings.shock_address, settings.second_shock_address)
+sessions = [main_session]
 
-curve_cache = None              # Caches the curve distribution
-bezier_cache = None
+curve_model = CurveModel()      # Compiled curve, weight table and CDF, rebuilt once per edit
+profile = None                  # Published ShockProfile, the trigger path's only view of the editor
+published_state = None          # editor_state() it was published from
 
-state_lock = threading.Lock()   # State lock
-curve_lock = threading.Lock()
 
 # Render throttling
 last_render = 0                 # Time of last render
 RENDER_INTERVAL = 0.016          # Interval - 16ms/60fps
 
 # UI
+root = None
+fig = None
+ax = None
+canvas = None                   # FigureCanvasTkAgg, or the CurveCanvas with CURVE_EDITOR: "canvas"
+editor_widget = None            # Tk widget the editor draws on
 line_artist = None
 marker_artist = None
 ring_artist = None
@@ -171,12 +149,35 @@ vline_max = None
 legend = None
 
 # OSC
-zeroconf_instance = None
+oscquery_advertiser = None
+osc_dispatcher = None
+config_watcher = None
+shock_journal = None            # Binary event journal, None if disabled
+metrics_server = None           # Local Prometheus endpoint, None if METRICS_PORT is 0
+render_started = None           # perf_counter of the last render_curve, for the frame time metric
+osc_capture = None              # Set with --capture-osc
+engine = None                   # EngineClient when ENGINE_PROCESS runs OSC and the shocker in their own process
+shock_listeners = []            # Called from the shocker worker with (session, intensity, duration, received_ns, fired_ns)
+
+# Service bring-up, written by the startup threads and polled by the UI
+service_status = {"Serial": "starting", "OSC": "starting", "OSCQuery": "starting"}
+STATUS_COLORS = {
+    "starting": "#9ca3af",
+    "connecting": "#fbbf24",
+    "ready": "#4ade80",
+    "failed": "#f87171",
+    "disabled": "#6b7280",
+}
+device_ready = threading.Event()    # Set once the shocker device is connected
+connect_lock = threading.Lock()     # Only one serial discovery at a time
+startup_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup")
+startup_tasks = {}                  # Name -> future of the bring-up work on startup_pool
+STARTUP_REPORT_WAIT_S = 30          # The phase report waits this long for startup_tasks
 
 # ~~~      UNDO / REDO LOGIC      ~~~
 # Apply a snapshot
 def apply_snapshot(snapshot):
-    global MIN_SHOCK_DURATION, MAX_SHOCK_DURATION, UI_VIEW_MIN_PERCENT, UI_VIEW_MAX_PERCENT, curve_cache
+    global MIN_SHOCK_DURATION, MAX_SHOCK_DURATION, UI_VIEW_MIN_PERCENT, UI_VIEW_MAX_PERCENT
     
     UI_CONTROL_POINTS.clear()
     UI_CONTROL_POINTS.extend(snapshot["curve_points"])
@@ -185,7 +186,7 @@ def apply_snapshot(snapshot):
     UI_VIEW_MIN_PERCENT = snapshot["ui_min_x"]
     UI_VIEW_MAX_PERCENT = snapshot["ui_max_x"]
     
-    invalidate_curve_cache()
+    publish_profile()
 
     # Update UI elements
     try:
@@ -308,6 +309,7 @@ def load_config_from_file():
                 apply_snapshot(presets[default_preset_index])
         except Exception as e:
             logging.exception(f"{RED}Config load failed: {e}")
+    publish_profile()
 
 # Save new config to file
 def save_config():
@@ -341,6 +343,7 @@ def save_preset(index):
     if not (0 <= index < PRESET_COUNT):
         return
     presets[index] = make_snapshot()
+    publish_profile()
     save_config()
     update_preset_buttons_appearance()
     logging.info(f"{RESET}Saved preset {index+1}")
@@ -380,316 +383,362 @@ def update_preset_buttons_appearance():
         pass
 
 # ~~~      OSC / SERIAL SETUP      ~~~
-def osc_server():
-    global zeroconf_instance
-    
+def set_service_status(name, state):
+    service_status[name] = state
+
+def osc_routes(cfg):
+    main_session.set_addresses(cfg.shock_address, cfg.second_shock_address)
     dispatch = {}
-    if (config.get('SHOCK_PARAMETER')):
-        dispatch[SHOCK_PARAM] = handle_osc_packet
-    if (config.get('SECOND_SHOCK_PARAMETER')):
-        dispatch[SECOND_SHOCK_PARAM] = handle_osc_packet
+    if cfg.shock_address:
+        dispatch[cfg.shock_address] = handle_osc_packet
+    if cfg.second_shock_address:
+        dispatch[cfg.second_shock_address] = handle_osc_packet
+    return dispatch
+
+def bring_up_osc():
+    global oscquery_advertiser, osc_dispatcher, osc_capture
     
+    dispatch = osc_routes(settings)
     if not dispatch:
         logging.warning(f"{YELLOW}No OSC parameters setup, please set them up in the config file.")
+        set_service_status("OSC", "disabled")
+        set_service_status("OSCQuery", "disabled")
         return
     
-    used_params = {param.split("/")[-1] for param in dispatch.keys()}
-    zeroconf_instance = start_osc("Shocker Link", dict_to_dispatcher(dispatch), params=used_params)
-    if zeroconf_instance is None:
+    # Zeroconf starts up on its own loop while the servers are starting
+    oscquery_advertiser = OSCQueryAdvertiser()
+
+    osc_dispatcher = dict_to_dispatcher(dispatch)
+    if OSCCapture.capture_requested():
+        osc_capture = OSCCapture.CaptureWriter(OSCCapture.capture_output_path())
+        osc_dispatcher.capture = osc_capture
+        logging.info(f"{RESET}Capturing OSC traffic to {CYAN}{osc_capture.path}")
+    with StartupProfiler.phase("start_osc_servers"):
+        http_port = start_osc_servers(osc_dispatcher, params=osc_dispatcher.params, on_query=oscquery_advertiser.mark_queried)
+    if http_port is None:
         logging.error(f"{RED}OSC server failed to start. VRChat integration disabled.")
+        set_service_status("OSC", "failed")
+        set_service_status("OSCQuery", "disabled")
         return
+    set_service_status("OSC", "ready")
     logging.info(f"{RESET}Started OSC server for: {YELLOW}{list(dispatch.keys())}")
 
-# Send chat message via OSC with cooldown and auto-clear
-def send_chat_message(message_text, clear_after=True):
-    global clear_timer, last_send_time
-
-    with send_lock:
-        now = time.perf_counter()
-        # Always allow shock messages to bypass message cooldown
-        bypass = "⚡" in message_text
+    # Announcement runs on the advertiser's loop, status is updated once it finishes
+    set_service_status("OSCQuery", "connecting")
+    oscquery_advertiser.register("Shocker Link", http_port).add_done_callback(on_oscquery_registered)
 
-        # If cooldown is active and bypass is false, skip sending
-        if not bypass and now - last_send_time < MESSAGE_COOLDOWN:
-            return
-        
-        last_send_time = now
+def on_oscquery_registered(future):
+    try:
+        future.result()
+        set_service_status("OSCQuery", "ready")
+    except Exception as e:
+        logging.error(f"{RED}OSCQuery announcement failed, VRChat won't discover the server: {e}")
+        set_service_status("OSCQuery", "failed")
 
-        try:
-            vrc_udp_client.send_message("/chatbox/input", (message_text, True, False))
+# Manual re-announce, for when VRChat was restarted and didn't pick us up
+def reannounce_oscquery():
+    if oscquery_advertiser is None:
+        return
+    set_service_status("OSCQuery", "connecting")
+    oscquery_advertiser.reannounce().add_done_callback(on_oscquery_registered)
 
-            # Schedule a clear message
-            if clear_after:
+def bring_up_serial():
+    try:
+        with StartupProfiler.phase("connect_serial"):
+            connect_serial()
+    except Exception as e:
+        logging.exception(f"{RED}Serial bring-up failed: {e}")
+        set_service_status("Serial", "failed")
+
+# Called from the config watcher thread. Only runtime-safe keys are applied, the rest need a restart.
+def apply_config_reload(new, changed):
+    global settings
+
+    safe = changed & RUNTIME_SAFE_KEYS
+    unsafe = changed - RUNTIME_SAFE_KEYS
+    if unsafe:
+        logging.warning(f"{YELLOW}Changed {sorted(unsafe)} in {config_path}, restart to apply.")
+    if not safe:
+        return
 
-                if clear_timer is not None:
-                    clear_timer.cancel()
-                
-                clear_timer = threading.Timer(4, send_chat_message, args=("", False))
-                clear_timer.start()
+    # Build the whole new config first, then publish it with a single assignment
+    applied = replace(settings, **{key: getattr(new, key) for key in safe})
+    settings = applied
+
+    if "LOG_LEVELS" in safe:
+        LogPipeline.set_levels(applied.LOG_LEVELS)
+    if COOLDOWN_KEYS & safe:
+        for session in sessions:
+            session.cooldowns.configure(applied)
+    if {"SHOCK_PARAMETER", "SECOND_SHOCK_PARAMETER"} & safe and osc_dispatcher is not None:
+        osc_dispatcher.set_routes(osc_routes(applied))
+        reannounce_oscquery()
+    logging.info(f"{RESET}Reloaded {CYAN}{sorted(safe)}{RESET} from {config_path}")
+
+# Send chat message via OSC with cooldown and auto-clear, to the main VRChat instance
+def send_chat_message(message_text, clear_after=True):
+    main_session.chatbox.send(message_text, clear_after)
 
-        except Exception as e:
-            logging.exception(f"{RED}OSC send failed: {e}")
-            return
-        logging.info(f"{RESET}Sent message: {message_text}")
+# Never blocks, the journal thread does the packing and writing
+def journal_event(received_ns, param_id, outcome, intensity=0, shocker=NO_SHOCKER, duration_s=0.0, sample_us=0, queue_us=0, send_us=0):
+    if shock_journal is not None:
+        shock_journal.record(received_ns, param_id, intensity, shocker, outcome, duration_s, sample_us, queue_us, send_us)
 
 def handle_osc_packet(address, *args):
-    global last_trigger_time, trigger_timestamps, state_lock, shock_q
+    handle_trigger(main_session, address, *args)
+
+# Test buttons, with ENGINE_PROCESS the trigger path (pools, shocker worker) only runs in the engine
+def test_trigger(address):
+    if engine is not None:
+        engine.send_trigger(address)
+    else:
+        handle_osc_packet(address, 1)
+
+def handle_trigger(session, address, *args):
     if not args or args[0] != 1: # Only continue if an OSC packet is received
         return
+    received_ns = time.monotonic_ns()
+
+    # One reference for the whole trigger, a config reload swaps it atomically
+    cfg = settings
 
     # Only accept valid shock parameter
-    if (address == SHOCK_PARAM or address == SECOND_SHOCK_PARAM):
-        
-        now = time.time()
-        with state_lock:
-            trigger_timestamps[:] = [t for t in trigger_timestamps if now - t <= COOLDOWN_WINDOW_S]
-            trigger_count = len(trigger_timestamps)
-            dynamic_cooldown = min(BASE_COOLDOWN_S + COOLDOWN_FACTOR_S * trigger_count, MAX_COOLDOWN_S)
-
-            # Check cooldown
-            if COOLDOWN_ENABLED and now - last_trigger_time <= dynamic_cooldown:
-                cooldown_msg = f"On cooldown: {round(last_trigger_time - now + dynamic_cooldown, 1)}s"
-            else:
-                cooldown_msg = None
-                last_trigger_time = now
-                trigger_timestamps.append(now)
+    param_id = session.params.get(address)
+    if param_id is not None:
+        metrics.inc("osc_triggers_received")
+        session.stats.triggers += 1
+
+        # Device still coming up and configured to drop, don't use up the cooldown
+        if cfg.EARLY_TRIGGER_POLICY == "drop" and not device_ready.is_set() and service_status["Serial"] in ("starting", "connecting"):
+            metrics.inc("early_trigger_drops")
+            journal_event(received_ns, param_id, DROPPED)
+            session.chatbox.send("Shocker not ready yet")
+            return
         
-        if cooldown_msg:
-            send_chat_message(cooldown_msg)
+        # Check cooldown, each parameter has its own policy
+        wait_s = session.cooldowns.check_parameter(param_id, trigger_clock()) if profile.cooldown_enabled else 0.0
+        if wait_s > 0:
+            metrics.inc("cooldown_rejections")
+            session.stats.cooldown += 1
+            journal_event(received_ns, param_id, COOLDOWN)
+            session.chatbox.send(f"On cooldown: {round(wait_s, 1)}s")
             return
 
-        # Determine shock intensity and duration
-        intensities, weights = compute_curve_distribution()
-
-        if address == SHOCK_PARAM:
-            # For main shock param, use full curve
-            intensity_percent = int(random.choices(intensities, weights=weights, k=1)[0])
-        else:
-            # For second shock param, use only the upper half of the curve
-            sorted_indices = np.argsort(intensities)
-            upper_half_indices = sorted_indices[len(sorted_indices)//2:]
-            intensity_percent = int(random.choices(intensities[upper_half_indices], weights=weights[upper_half_indices], k=1)[0])
-
-        duration_s = round(random.uniform(MIN_SHOCK_DURATION, MAX_SHOCK_DURATION), 1)
+        # Determine shock intensity and duration, the second param only uses the upper half of the curve
+        intensity_percent, duration_s = session.pool.draw(upper=param_id == 1)
 
         # Send shock and chat message
-        shock_q.put((intensity_percent, duration_s))
-        send_chat_message(f"⚡ {intensity_percent}% | {duration_s}s")
+        shock_q.put((intensity_percent, duration_s, param_id, received_ns, time.monotonic_ns(), session.index))
+        metrics.inc("osc_triggers_accepted")
+        session.stats.accepted += 1
+        session.chatbox.send(f"⚡ {intensity_percent}% | {duration_s}s")
+
+def device_connected():
+    return backend.connected()
 
 def connect_serial():
-    global serial_connection, pishock_api, shockers, PISHOCK_SHOCKER_IDS
-    
-    # If no port specified, scan automatically
-    ports = []
-    if SERIAL_PORT.strip():
-        ports = [SERIAL_PORT]
-    else:
-        ports = [p for p in list_ports.comports()]
-
-    if not USE_PISHOCK:
-        if serial_connection is None or not getattr(serial_connection, "is_open", False):
-            logging.info(f"{RESET}Available ports: {[p.device for p in ports]}")
-
-            for attempt in range(3):
-                for port in ports: # USB Path
-                    try:
-                        ser = serial.Serial(port.device, OPENSHOCK_SERIAL_BAUDRATE, timeout=1)
-                        ser.write(b"domain\n")
-                        resp = ser.read(50)
-                        if b"openshock" in resp:
-                            ser.flush()
-                            logging.info(f"{RESET}Connected to serial port {CYAN}{port.device}")
-                            serial_connection = ser
-                            shockers = list(OPENSHOCK_SHOCKER_IDS)
-                            return ser
-                        else:
-                            ser.close()
-                    except SerialException as e:
-                        logging.warning(f"{RED} Couldn't open {port.device}. It's probably in use by another program.")
-                    except Exception as e:
-                        logging.exception(f"{RED}Failed on {port.device}: {e}")
-                    logging.warning(f"{YELLOW}Connection attempt {RESET}{attempt+1}/3 {YELLOW}for port {RESET}{port} {YELLOW}failed.")
-                if attempt < 3:
-                    logging.warning(f"{YELLOW}Retrying in 3 seconds...")
-                    time.sleep(3)
-
-            logging.error(f"{RED}Failed to open serial. Shocks disabled.")
-            serial_connection = None
-            return None
-    else:
-        if not SERIAL_PORT or SERIAL_PORT == "":
-            logging.info(f"{RESET}Available ports: {[p.device for p in ports]}")
-            found = False
-            # Try to find the port manually first
-            if len(ports) > 1:
-                for port in ports:
-                    try:
-                        ser = serial.Serial(port.device, OPENSHOCK_SERIAL_BAUDRATE, timeout=1)
-                        
-                        # Send info command to PiShock Hub
-                        data = json.dumps({"cmd": "info"}) + "\n"
-                        ser.write(data.encode("utf-8"))
-                        count = 0
-                        
-                        while count < 40:
-                            resp = ser.readline()
-                            count += 1
-                            # Read info response and wait for up to 40 lines to find it
-                            if resp.startswith(b"TERMINALINFO: "):
-                                if b"pishock" in resp:
-                                    ser.close()
-                                    try:
-                                        pishock_api = SerialAPI(port.device)
-                                        logging.info(f"{RESET}Connected to serial port {CYAN}{port.device}")
-                                        found = True
-                                        break
-                                    except Exception as e:
-                                        logging.exception(f"{RED} Unknown error while searching for PiShock hub.")
-                                        break
-                            elif resp == b"":
-                                break
-                        if found:
-                            break
-                                    
-                    except SerialException as e:
-                        logging.warning(f"{RED} Couldn't open {port}. It's probably in use by another program.")
-                        break
-                    except Exception as e:
-                        logging.exception(f"{RED}Failed on {port}: {e}")
-                        break
-            # If we don't find a port, try finding automatically using pishock_api
-            if not found:
-                try:
-                    pishock_api = SerialAPI(None)
-                    logging.info(f"{RESET}Connected to PiShock Hub")
-                except SerialAutodetectError as e:
-                    logging.exception(f"{RED}Couldn't connect to the PiShock Device.\nTry disconnecting other serial devices or changing port.")
-                    pishock_api = None
-        # Port entered manually, skip all
-        else:
-            try:
-                pishock_api = SerialAPI(SERIAL_PORT)
-            except SerialAutodetectError as e:
-                logging.exception(f"{RED}Couldn't connect to the PiShock Device.\nWrong port setup in config.")
-                pishock_api = None
-        
-        if pishock_api:
-            if not PISHOCK_SHOCKER_IDS:
-                # Find pishock shocker
-                info = pishock_api.info()
-                shockers = info.get("shockers", [])
-                first_shocker_id = shockers[0]["id"] if shockers else None
-                if first_shocker_id is not None:
-                    logging.info(f"{RESET}Found shocker with ID {first_shocker_id}")
-                    shocker = pishock_api.shocker(first_shocker_id)
-                    shockers.append(shocker)
-                else:
-                    logging.warning(f"{YELLOW}No shockers found.")
-            else:
-                for shocker_id in PISHOCK_SHOCKER_IDS:
-                    shocker_instance = pishock_api.shocker(shocker_id)
-                    shockers.append(shocker_instance)
-                    logging.info(f"{RESET}Created shocker instance for ID {shocker_id}")
-
-def serial_worker():
-    global serial_connection
-    while not serial_stop.is_set():
-        try:
-            cmd = serial_q.get(timeout=0.5)
-        except Empty:
-            continue
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                if serial_connection is None or not getattr(serial_connection, "is_open", False):
-                    connect_serial()
-                if serial_connection and getattr(serial_connection, "is_open", True):
-                    serial_connection.write(cmd)
-                    serial_connection.flush()
-                    break
-            except Exception as e:
-                logging.exception(f"{RED}Failed to write to serial (Attempt {RESET}{attempt+1}/{max_retries}){RED}: {e}")
-                serial_connection = None
-                time.sleep(0.5)
+    global shockers
+    # Startup and the workers can both ask for a connection, only discover once
+    with connect_lock:
+        if device_connected():
+            # Backends that reconnect in the background land here once they are back
+            if service_status["Serial"] != "ready":
+                shockers = list(backend.shockers)
+                set_service_status("Serial", "ready")
+                device_ready.set()
+            return True
+        if service_status["Serial"] != "starting":
+            metrics.inc("serial_reconnects")
+        set_service_status("Serial", "connecting")
+        backend.connect()
+        shockers = list(backend.shockers)
+        if device_connected():
+            set_service_status("Serial", "ready")
+            device_ready.set()
         else:
-            print("Failed to send shock after retries.")
+            set_service_status("Serial", "failed")
+            device_ready.clear()
+        return device_connected()
 
 #~~~      SHOCKER LOGIC      ~~~
+# Hold an early trigger until the device is up, False if it should be dropped
+def wait_for_device(queued_ns):
+    while not device_ready.is_set():
+        if shocker_stop.is_set():
+            return False
+        # Bring-up finished without a device, let the normal reconnect logic handle it
+        if service_status["Serial"] == "failed":
+            return True
+        if (time.monotonic_ns() - queued_ns) / 1e9 > settings.EARLY_TRIGGER_MAX_AGE_S:
+            return False
+        device_ready.wait(0.2)
+    return True
+
+# Random or sequential shocker, skipping shockers still within SHOCKER_COOLDOWN_S. None if all of them are.
+def pick_shocker():
+    global last_shocker_index
+    count = len(shockers)
+    if not settings.RANDOM_OR_SEQUENTIAL:
+        # Random
+        order = random.sample(range(count), count) if cooldowns.shocker_gap_s > 0 else [random.randrange(count)]
+    else:
+        # Sequential
+        order = [(last_shocker_index + 1 + i) % count for i in range(count)]
+
+    now = trigger_clock()
+    for index in order:
+        if not profile.cooldown_enabled or cooldowns.check_shocker(index, now) == 0:
+            if settings.RANDOM_OR_SEQUENTIAL:
+                last_shocker_index = index
+            return index
+    return None
+
+# Picks the shocker for a queued shock and folds in the triggers that piled up behind it.
+# Returns the shock with its shocker index, or None if it was dropped or skipped.
+def prepare_shock(shock):
+    intensity_percent, duration_s, param_id, received_ns, queued_ns, session_index = shock
+    sample_us = (queued_ns - received_ns) // 1000
+
+    if not wait_for_device(queued_ns):
+        shocker_log.warning(f"{YELLOW}Device not ready in time, dropping early shock.")
+        journal_event(received_ns, param_id, DROPPED, intensity_percent, duration_s=duration_s, sample_us=sample_us)
+        return None
+
+    if not shockers:
+        shocker_log.warning(f"{YELLOW}No shockers configured, dropping shock.")
+        journal_event(received_ns, param_id, DROPPED, intensity_percent, duration_s=duration_s, sample_us=sample_us)
+        return None
+
+    # Reconnect before a shocker (and its cooldown) is used up
+    if not device_connected():
+        shocker_log.warning(f"{YELLOW}Shocker device not available. Cannot send shock. Attempting to reconnect...")
+        if connect_serial():
+            shock_q.put(shock) # Re-queue shock
+        else:
+            shocker_log.error(f"{RED}Reconnect failed, dropping shock.")
+            journal_event(received_ns, param_id, DROPPED, intensity_percent, duration_s=duration_s, sample_us=sample_us)
+        return None
+
+    shocker_index = pick_shocker()
+    if shocker_index is None:
+        shocker_log.info(f"{RESET}All shockers on cooldown, skipping shock.")
+        journal_event(received_ns, param_id, COOLDOWN, intensity_percent, duration_s=duration_s, sample_us=sample_us)
+        return None
+    shocker_log.info(f"{RESET}Selected shocker: %s", shockers[shocker_index], extra=LogPipeline.RATE_LIMITED)
+
+    # Triggers that piled up for this shocker while the device was busy go out as one command
+    merged = shock_q.take_mergeable(shock, settings.MERGE_WINDOW_S) if len(shockers) == 1 else []
+    if merged:
+        # Capped by the max duration of the shock's own session, a preset can allow less than the editor's curve
+        max_duration = session_profile(sessions[session_index]).max_duration
+        intensity_percent, duration_s, param_id = merge_shocks(shock, merged, max_duration)[:3]
+        shocker_log.info(f"{RESET}Merged %d triggers into one shock: %d%% | %ss", len(merged) + 1, intensity_percent, duration_s)
+        for other in merged:
+            journal_event(other[3], other[2], MERGED, other[0], shocker_index, other[1], (other[4] - other[3]) // 1000)
+    return (intensity_percent, duration_s, param_id, received_ns, queued_ns, session_index, shocker_index)
+
+# Hands a batch of prepared shocks to the backend in one call
+def send_shocks(batch):
+    picked_ns = time.monotonic_ns()
+    try:
+        backend.send_batch([(shocker_index, intensity, duration) for intensity, duration, _, _, _, _, shocker_index in batch])
+        outcome = FIRED
+    except Exception as e:
+        shocker_log.exception(f"{RED}Shock failed ({backend.name}): {e}")
+        outcome = ERROR
+    done_ns = time.monotonic_ns()
+    send_us = (done_ns - picked_ns) // 1000
+
+    for intensity_percent, duration_s, param_id, received_ns, queued_ns, session_index, shocker_index in batch:
+        if outcome == FIRED:
+            metrics.shock_fired(shocker_index)
+            sessions[session_index].stats.record_fired((done_ns - received_ns) // 1000)
+            for listener in shock_listeners:
+                listener(session_index, intensity_percent, duration_s, received_ns, done_ns)
+        journal_event(received_ns, param_id, outcome, intensity_percent, shocker_index, duration_s,
+                      (queued_ns - received_ns) // 1000, (picked_ns - queued_ns) // 1000, send_us)
+
 def shocker_worker():
-    global shock_q, serial_connection, shockers, last_shocker_index
     while not shocker_stop.is_set():
         try:
-            intensity_percent, duration_s = shock_q.get(timeout=0.3)
+            shock = shock_q.get(timeout=0.3)
         except Empty:
             continue
-        
-        if not shockers:
-            logging.warning(f"{YELLOW}No shockers configured, dropping shock.")
-            continue
-    
-        if not RANDOM_OR_SEQUENTIAL:
-            # Random
-            chosen_shocker = random.choice(shockers)
-            logging.info(f"{RESET}Selected shocker: {chosen_shocker}")
-        else:
-            # Sequential
-            last_shocker_index = (last_shocker_index + 1) % len(shockers)
-            chosen_shocker = shockers[last_shocker_index]
-            logging.info(f"{RESET}Selected shocker: {chosen_shocker}")
-            
+        batch = [prepared] if (prepared := prepare_shock(shock)) else []
 
-        # Using OpenShock
-        if not USE_PISHOCK:
-            if serial_connection is None or not getattr(serial_connection, "is_open", False):
-                logging.warning(f"{YELLOW}Serial not available. Cannot send shock. Attempting to reconnect...")
-                connect_serial()
-                if serial_connection and serial_connection.is_open:
-                    shock_q.put((intensity_percent, duration_s)) # Re-queue shock
-                else:
-                    logging.error(f"{RED}Reconnect failed, dropping shock.")
-                continue
-            # Data for shock
-            payload = {
-                "model": "caixianlin",
-                "id": chosen_shocker,
-                "type": "shock",
-                "intensity": int(intensity_percent),
-                "durationMs": int(round(float(duration_s) * 1000))
-            }
-            cmd = "rftransmit " + json.dumps(payload)
-            serial_q.put((cmd + "\n").encode('ascii'))
-        else:
-            # Using PiShock  
-            chosen_shocker.shock(duration=round(float(duration_s), 1), intensity=int(intensity_percent))
-        
-        
-# ~~~      BEZIER CURVE AND DISTRIBUTION LOGIC      ~~~
-def bezier_interpolate(points, steps):
-    p0, p1, p2 = np.array(points[0]), np.array(points[1]), np.array(points[2])
-    t = np.linspace(0, 1, steps)[:, None]
-    return (1-t)**2 * p0 + 2*(1-t)*t * p1 + t**2 * p2
+        # Backends that take batches get whatever else is already waiting, up to what they can have in flight
+        for _ in range(min(backend.batch_size, backend.max_in_flight) - 1):
+            try:
+                shock = shock_q.get(timeout=0)
+            except Empty:
+                break
+            if prepared := prepare_shock(shock):
+                batch.append(prepared)
+
+        if batch:
+            send_shocks(batch)
 
+# ~~~      BEZIER CURVE AND DISTRIBUTION LOGIC      ~~~
+# Curve, weight table and CDF for the points being edited, compiled once per change and shared by the plot and the profile.
+# Tk thread only, a drag changes the points on every motion and is published once on release.
 def compute_curve_distribution():
-    global curve_cache
-    
-    # Generate a smooth curve from control points
-    with curve_lock:
-        if curve_cache is not None:
-            return curve_cache # Same points as last time, skip compute
-        pts = sorted(UI_CONTROL_POINTS, key=lambda p: p[0])
-    
-    curve = bezier_interpolate(pts, steps=100)
-    curve = curve[curve[:, 1] > 0]
-    xs = np.clip(curve[:, 0].astype(int), 1, 100)
-    ys = np.clip(curve[:, 1], 0, 1)
-    if ys.sum() == 0:
-        ys[:] = 1
-        
-    curve_cache = (xs, ys)
-    return xs, ys
+    return curve_model.get(UI_CONTROL_POINTS)
+
+# Publishes the editor's state as a new profile (and the preset sessions' profiles) and swaps the sample pools over.
+# Called on the Tk thread after every committed edit, preset change or undo.
+def publish_profile():
+    global profile, published_state
+    published_state = editor_state()
+    profile = make_profile(UI_CONTROL_POINTS, MIN_SHOCK_DURATION, MAX_SHOCK_DURATION, COOLDOWN_ENABLED, curve_model, profile)
+    for session in sessions:
+        preset = presets[session.preset] if session.preset is not None and session.preset < PRESET_COUNT else None
+        session.profile = make_profile(preset["curve_points"], preset["min_duration"], preset["max_duration"],
+                                       COOLDOWN_ENABLED, session.curve_model, session.profile) if preset else None
+    invalidate_sample_pool()
+    if engine is not None:
+        engine.send_state(published_state)
+
+# For edits that end with a release (slider, drag), which may leave the editor as it was.
+# Publishing the same state again would still swap the pools and restart seeded draws. Returns True if it published.
+def publish_if_changed() -> bool:
+    if editor_state() == published_state:
+        return False
+    publish_profile()
+    return True
+
+# What the engine process needs from the editor to publish the same profiles on its side
+def editor_state() -> dict:
+    return {
+        "curve_points": list(UI_CONTROL_POINTS),
+        "min_duration": MIN_SHOCK_DURATION,
+        "max_duration": MAX_SHOCK_DURATION,
+        "cooldown_enabled": COOLDOWN_ENABLED,
+        "presets": list(presets),
+    }
+
+def apply_editor_state(state):
+    global MIN_SHOCK_DURATION, MAX_SHOCK_DURATION, COOLDOWN_ENABLED
+    UI_CONTROL_POINTS[:] = state["curve_points"]
+    MIN_SHOCK_DURATION = state["min_duration"]
+    MAX_SHOCK_DURATION = state["max_duration"]
+    COOLDOWN_ENABLED = state["cooldown_enabled"]
+    presets[:] = state["presets"]
+    publish_profile()
+
+# What the sample pool draws from, read again whenever it is invalidated
+def sample_source():
+    return profile.sample_source()
+
+# Extra sessions draw from their preset's curve and durations, or the editor's curve if the slot is empty
+def session_profile(session):
+    return session.profile or profile
+
+def session_sample_source(session):
+    return session_profile(session).sample_source()
 
 
 # ~~~      UI EVENT HANDLERS      ~~~
+# The sliders only update the value while moving, it is published once on release
 def on_min_duration_change(val):
     global MIN_SHOCK_DURATION
     MIN_SHOCK_DURATION = float(val)
@@ -721,7 +770,7 @@ def on_ui_view_max_change(val):
     throttled_render()
 
 def finish_text_input(event=None):
-    global right_click_input_widget, highlight_index, curve_cache
+    global right_click_input_widget, highlight_index
 
     if not right_click_input_widget:
         return
@@ -755,7 +804,7 @@ def finish_text_input(event=None):
 
     # Update point and re-render
     UI_CONTROL_POINTS[nearest] = (x_val, y_val / 100)
-    invalidate_curve_cache()
+    publish_profile()
     save_config()
     render_curve()
 
@@ -764,7 +813,7 @@ def on_mouse_press(event):
     global dragging_index, highlight_index, right_click_input_widget, drag_context
 
     # Ignore if not in axes
-    if event.inaxes != ax:
+    if event.inaxes is None:
         return
 
     # Right-click to edit point
@@ -781,7 +830,7 @@ def on_mouse_press(event):
         nearest_index = int(np.argmin(dists))
         highlight_index = nearest_index
             
-        canvas_widget = canvas.get_tk_widget()
+        canvas_widget = editor_widget
         
         pointer_x = canvas_widget.winfo_pointerx()
         pointer_y = canvas_widget.winfo_pointery()
@@ -816,10 +865,21 @@ def on_mouse_press(event):
         render_curve()
         return
 
-    # Left-click to drag point
-    if event.xdata is None:
+    if event.xdata is None or event.ydata is None:
         return
 
+    # Middle-click to remove the nearest point
+    if event.button == 2:
+        remove_curve_point(event.xdata)
+        return
+
+    # Double-click to add a point
+    if event.dblclick:
+        add_curve_point(event.xdata, event.ydata)
+        return
+
+    # Left-click to drag point
+
     # Find nearest point
     click_x = event.xdata
     dists = [abs(p[0] - click_x) for p in UI_CONTROL_POINTS]
@@ -830,88 +890,103 @@ def on_mouse_press(event):
         # Save snapshot before change
         save_undo_snapshot()
 
-        # Logic for the middle point follow
-        # Average the first and last points to stay relatively centered
-        if len(UI_CONTROL_POINTS) == 3 and dragging_index in (0, 2):
-            drag_context["dragged_endpoint"] = dragging_index
+        # Logic for the inner points follow
+        # They keep their place along and across the line between the first and last points
+        last = len(UI_CONTROL_POINTS) - 1
+        if last >= 2 and dragging_index in (0, last):
             drag_context["start_endpoint_pos"] = UI_CONTROL_POINTS[dragging_index]
-            drag_context["start_middle_pos"] = UI_CONTROL_POINTS[1]
+            drag_context["start_inner_pos"] = UI_CONTROL_POINTS[1:last]
             p0 = np.array(UI_CONTROL_POINTS[0])
-            p2 = np.array(UI_CONTROL_POINTS[2])
-            pm = np.array(UI_CONTROL_POINTS[1])
+            p2 = np.array(UI_CONTROL_POINTS[last])
             v = p2 - p0
             vlen = np.hypot(v[0], v[1])
             if vlen < 1e-6:
                 drag_context["follow_mode"] = "translate"
             else:
                 v_unit = v / vlen
-                proj = float(np.dot(pm - p0, v_unit))
-                t = proj / vlen
                 perp_unit = np.array([-v_unit[1], v_unit[0]])
-                perp_mag = float(np.dot(pm - (p0 + v_unit * proj), perp_unit))
+                inner = []
+                for pm in drag_context["start_inner_pos"]:
+                    pm = np.array(pm)
+                    proj = float(np.dot(pm - p0, v_unit))
+                    inner.append((proj / vlen, float(np.dot(pm - (p0 + v_unit * proj), perp_unit))))
                 drag_context["follow_mode"] = "project"
-                drag_context["t"] = t
-                drag_context["perp_mag"] = perp_mag
+                drag_context["inner"] = inner
+
+def add_curve_point(x, y):
+    save_undo_snapshot()
+    UI_CONTROL_POINTS.append((float(np.clip(x, 1, 100)), float(np.clip(y, 0, 1))))
+    UI_CONTROL_POINTS.sort(key=lambda p: p[0])
+    publish_profile()
+    save_config()
+    render_curve()
+
+def remove_curve_point(x):
+    if len(UI_CONTROL_POINTS) <= MIN_POINTS:
+        logging.info(f"{RESET}The curve needs at least {MIN_POINTS} points")
+        return
+    dists = [abs(p[0] - x) for p in UI_CONTROL_POINTS]
+    nearest = int(np.argmin(dists))
+    if dists[nearest] >= 5:
+        return
+    save_undo_snapshot()
+    del UI_CONTROL_POINTS[nearest]
+    publish_profile()
+    save_config()
+    render_curve()
 
 # Mouse release handler
 def on_mouse_release(event):
-    global dragging_index, curve_cache
+    global dragging_index
     
+    # A point may have been dragged past its neighbours, keep them in curve order
+    if dragging_index is not None:
+        UI_CONTROL_POINTS.sort(key=lambda p: p[0])
     dragging_index = None
     drag_context.clear()
-    invalidate_curve_cache()
-    save_config()
+    if publish_if_changed():
+        save_config()
+
+def on_duration_release(event):
+    if publish_if_changed():
+        save_config()
 
 # Mouse motion handler
 def on_mouse_motion(event):
-    global dragging_index, curve_cache
+    global dragging_index
 
     # Ignore if not dragging
-    if dragging_index is None or event.inaxes != ax or event.xdata is None:
+    if dragging_index is None or event.inaxes is None or event.xdata is None:
         return
 
     # Clamp to valid range
     new_x = np.clip(event.xdata, 1, 100)
     new_y = max(0, event.ydata)
 
-    # Logic for middle point
     UI_CONTROL_POINTS[dragging_index] = (new_x, new_y)
 
-    # If dragging an endpoint and we have stored start positions, move middle relative to them
-    if dragging_index in (0, 2) and "start_endpoint_pos" in drag_context:
-        x0, y0 = drag_context["start_endpoint_pos"]
-        mx0, my0 = drag_context["start_middle_pos"]
-
-        dx = new_x - x0
-        dy = new_y - y0
-
-        UI_CONTROL_POINTS[1] = (mx0 + dx, my0 + dy)
-        invalidate_curve_cache() # Update cache after middle point updates
-
-    # If we have a follow mode, adjust middle point accordingly
-    # Average the first and last points to stay relatively centered
-    if len(UI_CONTROL_POINTS) == 3 and dragging_index in (0, 2) and "follow_mode" in drag_context:
+    # If dragging an endpoint, move the inner points along with it
+    # They keep their place between the first and last points so the shape stays the same
+    if "follow_mode" in drag_context:
+        last = len(UI_CONTROL_POINTS) - 1
         p0 = np.array(UI_CONTROL_POINTS[0])
-        p2 = np.array(UI_CONTROL_POINTS[2])
+        p2 = np.array(UI_CONTROL_POINTS[last])
         v = p2 - p0
         vlen = np.hypot(v[0], v[1])
 
-        if drag_context.get("follow_mode") == "translate" or vlen < 1e-6:
-            start_ep = np.array(drag_context["start_endpoint_pos"])
-            start_mid = np.array(drag_context["start_middle_pos"])
-            dx = np.array([new_x, new_y]) - start_ep
-            new_mid = start_mid + dx
+        if drag_context["follow_mode"] == "translate" or vlen < 1e-6:
+            dx = np.array([new_x, new_y]) - np.array(drag_context["start_endpoint_pos"])
+            new_inner = [np.array(pm) + dx for pm in drag_context["start_inner_pos"]]
         else:
             v_unit = v / vlen
             perp_unit = np.array([-v_unit[1], v_unit[0]])
-            t = drag_context.get("t", 0.5)
-            perp_mag = drag_context.get("perp_mag", 0.0)
-            new_mid = p0 + v_unit * (t * vlen) + perp_unit * perp_mag
+            new_inner = [p0 + v_unit * (t * vlen) + perp_unit * perp_mag for t, perp_mag in drag_context["inner"]]
 
-        UI_CONTROL_POINTS[1] = (float(new_mid[0]), float(new_mid[1]))
+        for i, pm in enumerate(new_inner, start=1):
+            UI_CONTROL_POINTS[i] = (float(pm[0]), float(pm[1]))
         
     # Mouse position label
-    if event.inaxes != ax or event.xdata is None or event.ydata is None:
+    if event.inaxes is None or event.xdata is None or event.ydata is None:
         mouse_pos_x.set("Intensity: -")
         mouse_pos_y.set("Weight:    -")
     else:
@@ -925,6 +1000,7 @@ def toggle_cooldown_enabled():
     global COOLDOWN_ENABLED
 
     COOLDOWN_ENABLED = not COOLDOWN_ENABLED
+    publish_profile()
     logging.info(f"{RESET}Cooldown {YELLOW}{'enabled' if COOLDOWN_ENABLED else 'disabled'}")
 
 # --- Preset Logic ---
@@ -1016,12 +1092,10 @@ def build_gradient():
     row = np.linspace(left_rgb, right_rgb, ncols)[None, :, :]
     return np.repeat(row, 40, axis=0)
 
-gradient = build_gradient()
-
 def init_plot():
     global line_artist, marker_artist, ring_artist, vline_min, vline_max, legend
     
-    ax.imshow(gradient, extent=(0, 100, 0, 1), aspect='auto', origin='lower', zorder=0)
+    ax.imshow(build_gradient(), extent=(0, 100, 0, 1), aspect='auto', origin='lower', zorder=0)
     
     # Create artists with dummy data, save references
     line_artist, = ax.plot([], [], linewidth = LINE_WIDTH, zorder = 4)
@@ -1057,16 +1131,24 @@ def init_plot():
         text.set_color(LABEL_COLOR)
 
 def render_curve():
-    global bezier_cache
-    
-    sorted_pts = sorted(UI_CONTROL_POINTS, key=lambda p: p[0])
+    global render_started
+    # Editor is built lazily after the window is shown
+    if canvas is None:
+        return
+    render_started = time.perf_counter()
     
-    if bezier_cache is None or bezier_cache[0] != sorted_pts:
-        bezier_cache = (
-            sorted_pts,
-            bezier_interpolate(sorted_pts, steps = 100)
-        )
-    curve = bezier_cache[1]
+    # Same compiled curve the sampler uses, only rebuilt when the points changed
+    compiled = compute_curve_distribution()
+    sorted_pts = compiled.points
+    curve = compiled.curve
+    active = dragging_index if dragging_index is not None else highlight_index
+
+    if CURVE_EDITOR == "canvas":
+        canvas.render(curve, sorted_pts, UI_CONTROL_POINTS[active] if active is not None else None,
+                      (UI_VIEW_MIN_PERCENT, UI_VIEW_MAX_PERCENT))
+        # Tk queued its repaint with the first moved item, so this runs once the frame is drawn
+        editor_widget.after_idle(on_draw, None)
+        return
 
     # Update curve line
     line_artist.set_data(curve[:, 0], curve[:, 1])
@@ -1076,7 +1158,6 @@ def render_curve():
     marker_artist.set_offsets(np.column_stack([xs, ys]))
 
     # Update selection ring
-    active = dragging_index if dragging_index is not None else highlight_index
     if active is not None:
         sx, sy = UI_CONTROL_POINTS[active]
         ring_artist.set_offsets([[sx, sy]])
@@ -1103,6 +1184,13 @@ def render_curve():
 
     canvas.draw_idle() 
 
+# Frame time from render_curve until the canvas actually finished drawing
+def on_draw(event):
+    global render_started
+    if render_started is not None:
+        metrics.observe_render(time.perf_counter() - render_started)
+        render_started = None
+
 def throttled_render():
     global last_render
     now = time.perf_counter()
@@ -1111,209 +1199,386 @@ def throttled_render():
         last_render = now
         render_curve()
         
-def invalidate_curve_cache():
-    global curve_cache, bezier_cache
-    curve_cache = None
-    bezier_cache = None
+def invalidate_sample_pool():
+    for session in sessions:
+        if session.pool is not None:
+            session.pool.invalidate()
 
 # ~~~      TKINTER UI SETUP      ~~~
-root = tk.Tk()
-root.title("Shock Control GUI")
-
-style = ttk.Style(root)
-
-# Apply a dark theme if available
-try:
-    style.theme_use('clam')
-except Exception:
-    logging.exception(f"{RED}Unable to apply theme, UI might look wrong.")
-
-# Configure styles
-style.configure('.', font=('Segoe UI', 11), padding=6)
-style.configure('TButton', padding=(0, 0), relief='flat', font=('Segoe UI', 9))
-style.configure('TLabel', font=('Segoe UI', 11), background=BACKGROUND_COLOR, foreground='white')
-style.configure('TCheckbutton', font=('Segoe UI', 11), background=BACKGROUND_COLOR, foreground='white')
-style.configure('TFrame', background=BACKGROUND_COLOR)
-style.configure('TScale', troughcolor='#222', background=BACKGROUND_COLOR)
-root.configure(bg=BACKGROUND_COLOR)
-
-# Main frame
-frame_controls = ttk.Frame(root)
-frame_controls.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
-
-# MIN DURATION SLIDER
-min_duration_var = tk.StringVar(value=f"Min Duration ({MIN_SHOCK_DURATION:.1f}s)")
-ttk.Label(frame_controls, textvariable=min_duration_var).pack()
-min_duration_scale = ttk.Scale(frame_controls, from_=0.1, to=5, orient=tk.HORIZONTAL, command=on_min_duration_change)
-min_duration_scale.set(MIN_SHOCK_DURATION)
-min_duration_scale.pack(fill=tk.X)
-min_duration_scale.bind("<ButtonPress-1>", lambda e: save_undo_snapshot())
-min_duration_scale.bind("<ButtonRelease-1>", lambda e: save_config())
-
-# MAX DURATION SLIDER
-max_duration_var = tk.StringVar(value=f"Max Duration ({MAX_SHOCK_DURATION:.1f}s)")
-ttk.Label(frame_controls, textvariable=max_duration_var).pack()
-max_duration_scale = ttk.Scale(frame_controls, from_=0.1, to=5, orient=tk.HORIZONTAL, command=on_max_duration_change)
-max_duration_scale.set(MAX_SHOCK_DURATION)
-max_duration_scale.pack(fill=tk.X)
-max_duration_scale.bind("<ButtonPress-1>", lambda e: save_undo_snapshot())
-max_duration_scale.bind("<ButtonRelease-1>", lambda e: save_config())
-
-# PLOT FRAME
-frame_plot = ttk.Frame(root)
-frame_plot.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
-
-# Matplotlib figure and canvas
-fig, ax = plt.subplots(figsize=(5, 4))
-canvas = FigureCanvasTkAgg(fig, master=frame_plot)
-canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-init_plot()
-
-minmax_frame = ttk.Frame(frame_plot)
-minmax_frame.pack(fill=tk.X, pady=5)
-
-# UI VIEW MIN SLIDER
-min_view_var = tk.StringVar(value=f"UI View Min ({int(UI_VIEW_MIN_PERCENT)}%)")
-ttk.Label(minmax_frame, text="UI View Min %", textvariable=min_view_var).pack(anchor='w')
-ui_min_scale = ttk.Scale(minmax_frame, from_=1, to=99, orient=tk.HORIZONTAL, command=on_ui_view_min_change)
-ui_min_scale.set(UI_VIEW_MIN_PERCENT)
-ui_min_scale.pack(fill=tk.X)
-ui_min_scale.bind("<ButtonPress-1>", lambda e: save_undo_snapshot())
-ui_min_scale.bind("<ButtonRelease-1>", lambda e: save_config())
-
-# UI VIEW MAX SLIDER
-max_view_var = tk.StringVar(value=f"UI View Max ({int(UI_VIEW_MAX_PERCENT)}%)")
-ttk.Label(minmax_frame, text="UI View Max %", textvariable=max_view_var).pack(anchor='w')
-ui_max_scale = ttk.Scale(minmax_frame, from_=2, to=100, orient=tk.HORIZONTAL, command=on_ui_view_max_change)
-ui_max_scale.set(UI_VIEW_MAX_PERCENT)
-ui_max_scale.pack(fill=tk.X)
-ui_max_scale.bind("<ButtonPress-1>", lambda e: save_undo_snapshot())
-ui_max_scale.bind("<ButtonRelease-1>", lambda e: save_config())
-
-label_temporary_mode = tk.Label(root, text="Temporary Mode", bg=BACKGROUND_COLOR, fg='white')
-label_temporary_mode.place(relx=0.01, rely=0.93, anchor='sw')
-
-# TEMPORARY TOGGLE
-temporary_mode_disabled = tk.BooleanVar(value=False)
-
-temporary_toggle = ttk.Checkbutton(root, text="", variable=temporary_mode_disabled, command=lambda: toggle_temporary_mode())
-temporary_toggle.place(relx=0.01, rely=0.98, anchor='sw')
-
-# COOLDOWN TOGGLE
-cooldown_var = tk.BooleanVar(value=True)
-cooldown_check = ttk.Checkbutton(frame_controls, text="Enable Cooldown", variable=cooldown_var, command=toggle_cooldown_enabled)
-
-# Test shock button
-buttons_frame = ttk.Frame(frame_controls)
-buttons_frame.pack(fill=tk.X)
-
-if config.get('SHOCK_PARAMETER'):
-    test_shock = ttk.Button(buttons_frame, text="Test 1st Param", command=lambda: handle_osc_packet(SHOCK_PARAM, 1))
-    test_shock.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 2))
-
-if config.get('SECOND_SHOCK_PARAMETER'):
-    second_test_shock = ttk.Button(buttons_frame, text="Test 2nd Param", command=lambda: handle_osc_packet(SECOND_SHOCK_PARAM, 1))
-    second_test_shock.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(2, 0))
-
-# --- Presets UI ---
-preset_frame = ttk.Frame(frame_controls)
-preset_frame.pack(fill=tk.X, pady=(8, 4))
-
-for i in range(PRESET_COUNT):
-    btn = tk.Button(preset_frame, text=preset_names[i], width=10,
-                    command=lambda i=i: load_preset(i))
-    btn.grid(row=i, column=0, sticky='w', padx=(0,4), pady=2)
-
-    # Right-click -> inline rename (Entry overlay). Middle-click -> set default.
-    btn.bind("<Button-3>", lambda e, i=i: start_preset_rename(e, i))
-    btn.bind("<Button-2>", lambda e, i=i: set_default_preset(i))
-
-    preset_buttons.append(btn)
-
-    sbtn = tk.Button(preset_frame, text="💾", width=3,
-                     command=lambda i=i: save_preset(i))
-    sbtn.grid(row=i, column=1, sticky='w', padx=(2,0))
-    preset_save_buttons.append(sbtn)
-
-# Connect mouse events
-canvas.mpl_connect("button_press_event", on_mouse_press)
-canvas.mpl_connect("button_release_event", on_mouse_release)
-canvas.mpl_connect("motion_notify_event", on_mouse_motion)
-
-# MOUSE POSITION LABELS
-mouse_pos_x = tk.StringVar(value="Intensity: -")
-mouse_pos_y = tk.StringVar(value="Weight:    -")
-
-mouse_pos_x_label = tk.Label(root, textvariable=mouse_pos_x, font=("Courier New", 8), bg=BACKGROUND_COLOR, fg='white')
-mouse_pos_y_label = tk.Label(root, textvariable=mouse_pos_y, font=("Courier New", 8), bg=BACKGROUND_COLOR, fg='white')
-
-mouse_pos_x_label.place(relx=0.01, rely=0.84, anchor='sw')
-mouse_pos_y_label.place(relx=0.01, rely=0.87, anchor='sw')
-
-# Extra padding for children in the control frame
-for child in frame_controls.winfo_children():
+def build_ui():
+    global root, frame_controls, frame_plot, minmax_frame, preset_frame, temporary_mode_disabled, cooldown_var
+    global min_duration_var, max_duration_var, min_duration_scale, max_duration_scale
+    global min_view_var, max_view_var, ui_min_scale, ui_max_scale, mouse_pos_x, mouse_pos_y, cooldown_status_var
+
+    root = tk.Tk()
+    root.title("Shock Control GUI")
+
+    style = ttk.Style(root)
+
+    # Apply a dark theme if available
     try:
-        child.pack_configure(padx=8, pady=6)
+        style.theme_use('clam')
     except Exception:
-        logging.exception(f"{RED}Unable to apply padding. UI sizing might be broken.")
-        pass
+        logging.exception(f"{RED}Unable to apply theme, UI might look wrong.")
+
+    # Configure styles
+    style.configure('.', font=('Segoe UI', 11), padding=6)
+    style.configure('TButton', padding=(0, 0), relief='flat', font=('Segoe UI', 9))
+    style.configure('TLabel', font=('Segoe UI', 11), background=BACKGROUND_COLOR, foreground='white')
+    style.configure('TCheckbutton', font=('Segoe UI', 11), background=BACKGROUND_COLOR, foreground='white')
+    style.configure('TFrame', background=BACKGROUND_COLOR)
+    style.configure('TScale', troughcolor='#222', background=BACKGROUND_COLOR)
+    root.configure(bg=BACKGROUND_COLOR)
+
+    # Main frame
+    frame_controls = ttk.Frame(root)
+    frame_controls.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
+
+    # MIN DURATION SLIDER
+    min_duration_var = tk.StringVar(value=f"Min Duration ({MIN_SHOCK_DURATION:.1f}s)")
+    ttk.Label(frame_controls, textvariable=min_duration_var).pack()
+    min_duration_scale = ttk.Scale(frame_controls, from_=0.1, to=5, orient=tk.HORIZONTAL, command=on_min_duration_change)
+    min_duration_scale.set(MIN_SHOCK_DURATION)
+    min_duration_scale.pack(fill=tk.X)
+    min_duration_scale.bind("<ButtonPress-1>", lambda e: save_undo_snapshot())
+    min_duration_scale.bind("<ButtonRelease-1>", on_duration_release)
+
+    # MAX DURATION SLIDER
+    max_duration_var = tk.StringVar(value=f"Max Duration ({MAX_SHOCK_DURATION:.1f}s)")
+    ttk.Label(frame_controls, textvariable=max_duration_var).pack()
+    max_duration_scale = ttk.Scale(frame_controls, from_=0.1, to=5, orient=tk.HORIZONTAL, command=on_max_duration_change)
+    max_duration_scale.set(MAX_SHOCK_DURATION)
+    max_duration_scale.pack(fill=tk.X)
+    max_duration_scale.bind("<ButtonPress-1>", lambda e: save_undo_snapshot())
+    max_duration_scale.bind("<ButtonRelease-1>", on_duration_release)
+
+    # PLOT FRAME
+    # The matplotlib canvas is added by build_editor() once the window is up
+    frame_plot = ttk.Frame(root)
+    frame_plot.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+
+    minmax_frame = ttk.Frame(frame_plot)
+    minmax_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
+
+    # UI VIEW MIN SLIDER
+    min_view_var = tk.StringVar(value=f"UI View Min ({int(UI_VIEW_MIN_PERCENT)}%)")
+    ttk.Label(minmax_frame, text="UI View Min %", textvariable=min_view_var).pack(anchor='w')
+    ui_min_scale = ttk.Scale(minmax_frame, from_=1, to=99, orient=tk.HORIZONTAL, command=on_ui_view_min_change)
+    ui_min_scale.set(UI_VIEW_MIN_PERCENT)
+    ui_min_scale.pack(fill=tk.X)
+    ui_min_scale.bind("<ButtonPress-1>", lambda e: save_undo_snapshot())
+    ui_min_scale.bind("<ButtonRelease-1>", lambda e: save_config())
+
+    # UI VIEW MAX SLIDER
+    max_view_var = tk.StringVar(value=f"UI View Max ({int(UI_VIEW_MAX_PERCENT)}%)")
+    ttk.Label(minmax_frame, text="UI View Max %", textvariable=max_view_var).pack(anchor='w')
+    ui_max_scale = ttk.Scale(minmax_frame, from_=2, to=100, orient=tk.HORIZONTAL, command=on_ui_view_max_change)
+    ui_max_scale.set(UI_VIEW_MAX_PERCENT)
+    ui_max_scale.pack(fill=tk.X)
+    ui_max_scale.bind("<ButtonPress-1>", lambda e: save_undo_snapshot())
+    ui_max_scale.bind("<ButtonRelease-1>", lambda e: save_config())
+
+    label_temporary_mode = tk.Label(root, text="Temporary Mode", bg=BACKGROUND_COLOR, fg='white')
+    label_temporary_mode.place(relx=0.01, rely=0.93, anchor='sw')
+
+    # TEMPORARY TOGGLE
+    temporary_mode_disabled = tk.BooleanVar(value=False)
+
+    temporary_toggle = ttk.Checkbutton(root, text="", variable=temporary_mode_disabled, command=lambda: toggle_temporary_mode())
+    temporary_toggle.place(relx=0.01, rely=0.98, anchor='sw')
+
+    # COOLDOWN TOGGLE
+    cooldown_var = tk.BooleanVar(value=True)
+    cooldown_check = ttk.Checkbutton(frame_controls, text="Enable Cooldown", variable=cooldown_var, command=toggle_cooldown_enabled)
+
+    # Test shock button
+    buttons_frame = ttk.Frame(frame_controls)
+    buttons_frame.pack(fill=tk.X)
+
+    if settings.SHOCK_PARAMETER:
+        test_shock = ttk.Button(buttons_frame, text="Test 1st Param", command=lambda: test_trigger(settings.shock_address))
+        test_shock.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 2))
+
+    if settings.SECOND_SHOCK_PARAMETER:
+        second_test_shock = ttk.Button(buttons_frame, text="Test 2nd Param", command=lambda: test_trigger(settings.second_shock_address))
+        second_test_shock.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(2, 0))
+
+    # --- Service status ---
+    status_frame = ttk.Frame(frame_controls)
+    status_frame.pack(fill=tk.X)
+    for name in service_status:
+        status_labels[name] = tk.Label(status_frame, text=f"● {name}", bg=BACKGROUND_COLOR, fg=STATUS_COLORS["starting"], font=('Segoe UI', 9))
+        status_labels[name].pack(anchor='w')
+    status_labels["OSCQuery"].bind("<Button-1>", lambda e: reannounce_oscquery())
+    cooldown_status_var = tk.StringVar(value="Cooldown: ready")
+    tk.Label(status_frame, textvariable=cooldown_status_var, bg=BACKGROUND_COLOR, fg=STATUS_COLORS["starting"], font=('Segoe UI', 9)).pack(anchor='w')
+
+    # --- Presets UI ---
+    preset_frame = ttk.Frame(frame_controls)
+    preset_frame.pack(fill=tk.X, pady=(8, 4))
+
+    for i in range(PRESET_COUNT):
+        btn = tk.Button(preset_frame, text=preset_names[i], width=10,
+                        command=lambda i=i: load_preset(i))
+        btn.grid(row=i, column=0, sticky='w', padx=(0,4), pady=2)
+
+        # Right-click -> inline rename (Entry overlay). Middle-click -> set default.
+        btn.bind("<Button-3>", lambda e, i=i: start_preset_rename(e, i))
+        btn.bind("<Button-2>", lambda e, i=i: set_default_preset(i))
+
+        preset_buttons.append(btn)
+
+        sbtn = tk.Button(preset_frame, text="💾", width=3,
+                         command=lambda i=i: save_preset(i))
+        sbtn.grid(row=i, column=1, sticky='w', padx=(2,0))
+        preset_save_buttons.append(sbtn)
+
+    # MOUSE POSITION LABELS
+    mouse_pos_x = tk.StringVar(value="Intensity: -")
+    mouse_pos_y = tk.StringVar(value="Weight:    -")
+
+    mouse_pos_x_label = tk.Label(root, textvariable=mouse_pos_x, font=("Courier New", 8), bg=BACKGROUND_COLOR, fg='white')
+    mouse_pos_y_label = tk.Label(root, textvariable=mouse_pos_y, font=("Courier New", 8), bg=BACKGROUND_COLOR, fg='white')
+
+    mouse_pos_x_label.place(relx=0.01, rely=0.84, anchor='sw')
+    mouse_pos_y_label.place(relx=0.01, rely=0.87, anchor='sw')
+
+    # Extra padding for children in the control frame
+    for child in frame_controls.winfo_children():
+        try:
+            child.pack_configure(padx=8, pady=6)
+        except Exception:
+            logging.exception(f"{RED}Unable to apply padding. UI sizing might be broken.")
+            pass
+
+    # Bind Undo/Redo
+    root.bind_all('<Control-z>', undo_action)
+    root.bind_all('<Control-y>', redo_action)
+
+    root.protocol("WM_DELETE_WINDOW", shutdown)
+
+# Tk isn't thread safe, so the startup threads only write service_status and this polls it
+def refresh_service_status():
+    for name, label in status_labels.items():
+        state = service_status[name]
+        label.config(fg=STATUS_COLORS.get(state, STATUS_COLORS["starting"]), text=f"● {name}: {state}")
+
+    cooldown_status_var.set(engine.cooldown_text if engine is not None else cooldown_status_text())
+    root.after(250, refresh_service_status)
+
+# Cooldown state straight from the policies, nothing is recomputed here
+def cooldown_status_text():
+    now = trigger_clock()
+    parts = [f"{name} {cooldowns.describe(param_id, now)}" for param_id, name in ((0, "1st"), (1, "2nd"))
+             if (settings.SHOCK_PARAMETER, settings.SECOND_SHOCK_PARAMETER)[param_id]]
+    return f"Cooldown: {' | '.join(parts)}" if profile.cooldown_enabled else "Cooldown: off"
+
+# Matplotlib is only imported once the editor is actually shown
+def build_editor():
+    global fig, ax, canvas, editor_widget
+    if CURVE_EDITOR == "canvas":
+        build_canvas_editor()
+        return
+
+    with StartupProfiler.phase("import matplotlib"):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+    with StartupProfiler.phase("Editor construction"):
+        fig = Figure(figsize=(5, 4))
+        ax = fig.add_subplot()
+        canvas = FigureCanvasTkAgg(fig, master=frame_plot)
+        editor_widget = canvas.get_tk_widget()
+        editor_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        init_plot()
+
+    # Connect mouse events
+    canvas.mpl_connect("button_press_event", on_mouse_press)
+    canvas.mpl_connect("button_release_event", on_mouse_release)
+    canvas.mpl_connect("motion_notify_event", on_mouse_motion)
+    canvas.mpl_connect("draw_event", on_draw)
+
+    render_curve()
+    with StartupProfiler.phase("fig.tight_layout"):
+        fig.tight_layout(pad=1.2)
+    canvas.draw_idle()
+
+# Same editor drawn with plain Tk canvas items, matplotlib is never imported
+def build_canvas_editor():
+    global canvas, editor_widget
+    with StartupProfiler.phase("Editor construction"):
+        from CurveCanvas import CurveCanvas
+        canvas = CurveCanvas(frame_plot, settings, (UI_VIEW_MIN_PERCENT, UI_VIEW_MAX_PERCENT))
+        editor_widget = canvas.widget
+        editor_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+    canvas.connect(on_mouse_press, on_mouse_release, on_mouse_motion)
+    render_curve()
+
+# ~~~      JANITOR      ~~~
+# Removes leftovers from older versions, runs in the background after startup
+to_be_deleted = {
+    "vrchat_oscquery"
+}
 
-# Bind Undo/Redo
-root.bind_all('<Control-z>', undo_action)
-root.bind_all('<Control-y>', redo_action)
+def run_janitor():
+    for item in to_be_deleted:
+        if os.path.isdir(item):
+            try:
+                shutil.rmtree(os.path.abspath(item))
+                logging.info(f"[Janitor] {CYAN}Deleted a no longer needed directory {item}.")
+            except Exception as e:
+                logging.warning(f"[Janitor] {YELLOW}Failed to delete a no longer needed directory {item}, please delete this folder manually.")
 
 
 # Shutdown logic
 def shutdown():
     save_config()
+    if engine is not None:
+        engine.stop()
+    else:
+        stop_services()
+    root.destroy()
+    LogPipeline.stop_logging()
+    os._exit(0)
+
+# Everything start_services brought up, the engine process calls this on its own
+def stop_services():
+    if config_watcher:
+        config_watcher.stop()
     logging.info(f"{YELLOW}Stopping serial server")
-    global serial_connection
-    serial_stop.set()
     shocker_stop.set()
-    serial_thread.join(timeout=1)
     shocker_thread.join(timeout=1)
-    try:
-        if serial_connection and getattr(serial_connection, "is_open", False):
-            serial_connection.close()
-            logging.info(f"{YELLOW}Closed serial port")
-    except Exception as e:
-        logging.exception(f"{RED}Error closing serial: {e}")
-    if zeroconf_instance:
+    backend.close()
+    if oscquery_advertiser:
         logging.info(f"{YELLOW}Stopping OSC server")
-        zeroconf_instance.unregister_all_services()
-        zeroconf_instance.close()
-    root.destroy()
-    os._exit(0)
-
-# Start OSC server thread
-osc_server_thread = threading.Thread(target=osc_server, daemon=True)
-serial_thread = threading.Thread(target=serial_worker, daemon=True)
+        oscquery_advertiser.close()
+    if shock_journal:
+        shock_journal.close()
+    if metrics_server:
+        metrics_server.server_close()
+    stats = shock_q.stats()
+    if stats["queued"]:
+        logging.info(f"{RESET}Shock queue: {stats['queued']} queued ({stats['strong']} strong), {stats['jumped_ahead']} jumped ahead, "
+                     f"{stats['merged_triggers']} merged into {stats['merged_commands']} shocks")
+    for session in sessions:
+        sent = getattr(session.chatbox.client, "stats", None)
+        if sent and sent["sent"]:
+            logging.info(f"{RESET}Chatbox {session.name}: {sent['sent']} sent ({sent['cache_hits']} from cache), "
+                         f"{sent['encode_ns'] / max(sent['encoded'], 1) / 1000:.1f}us per encode")
+        if session.stats.triggers:
+            logging.info(f"{RESET}Session {session.name}: " + ", ".join(f"{k} {v}" for k, v in session.stats.report().items()))
+        if session is not main_session:
+            session.close()
+    if osc_capture:
+        osc_capture.close()
+
+# Worker threads
 shocker_thread = threading.Thread(target=shocker_worker, daemon=True)
 
-root.protocol("WM_DELETE_WINDOW", shutdown)
-
 
 # ~~~      STARTUP      ~~~
 def start_services():
-    global vrc_udp_client
+    global config_watcher, shock_journal
     
-    vrc_udp_client = vrc_client(VRCHAT_HOST)
-    connect_serial()
-    serial_thread.start()
-    osc_server_thread.start()
+    main_session.chatbox.client = vrc_client(VRCHAT_HOST)
+    sessions.extend(build_sessions(settings.SESSIONS, len(sessions), lambda: CooldownTable(settings)))
+
+    # A fixed seed makes the whole session (intensities, durations and random shocker picks) reproducible
+    if settings.sampler_seed is not None:
+        random.seed(settings.sampler_seed)
+        logging.info(f"{RESET}Using sampler seed {CYAN}{settings.sampler_seed}")
+    start_sample_pools(settings.sampler_seed)
+
+    if settings.JOURNAL_ENABLED:
+        try:
+            shock_journal = ShockJournal("journal", max_bytes=int(settings.JOURNAL_MAX_MB * 1024 * 1024)).start()
+        except OSError as e:
+            logging.warning(f"{YELLOW}Couldn't open the shock journal, events won't be recorded: {e}")
+
+    if settings.METRICS_PORT:
+        start_metrics()
+
+    # Serial discovery, OSC servers and the Zeroconf instance all come up in parallel
+    startup_tasks["bring_up_osc"] = startup_pool.submit(bring_up_osc)
+    startup_tasks["bring_up_serial"] = startup_pool.submit(bring_up_serial)
+    for session in sessions[1:]:
+        startup_tasks[f"session {session.name} OSC"] = startup_pool.submit(session.start_osc, handle_trigger)
+
+    # Workers start right away, early triggers are handled by EARLY_TRIGGER_POLICY
+    backend.start()
     shocker_thread.start()
 
+    config_watcher = ConfigWatcher(config_path, settings, apply_config_reload).start()
+
+# Depths and counts that already live elsewhere are read when the endpoint is scraped
+def start_metrics():
+    global metrics_server
+    metrics.register("osc_packets_received_total", "counter", "OSC datagrams received, any address",
+                     lambda: osc_dispatcher.received if osc_dispatcher else 0)
+    metrics.register("shock_queue_depth", "gauge", "Shocks waiting in shock_q", shock_q.qsize)
+    metrics.register("serial_queue_depth", "gauge", "Commands waiting for the shocker backend",
+                     lambda: backend.health().get("queued", 0))
+    metrics.register("backend_commands_total", "counter", "Commands handed to the shocker backend by outcome",
+                     lambda: {"sent": backend.sent, "errors": backend.errors}, label="outcome")
+    metrics.register("shock_queue_total", "counter", "Shock queue counts by kind",
+                     lambda: {k: v for k, v in shock_q.stats().items() if k not in ("depth", "max_depth")}, label="kind")
+    metrics.register("osc_sender_total", "counter", "Outgoing OSC datagrams of the main session by kind (sent, cache_hits, dropped, encoded)",
+                     lambda: {k: v for k, v in main_session.chatbox.client.stats.items() if k != "encode_ns"}, label="kind")
+    metrics.register("osc_encode_seconds_total", "counter", "Time spent encoding outgoing OSC messages",
+                     lambda: sum(s.chatbox.client.stats["encode_ns"] for s in sessions) / 1e9)
+    metrics.register("sampler_rebuilds_total", "counter", "Sample pool rebuilds after a curve or duration change",
+                     lambda: sum(s.pool.rebuilds for s in sessions))
+    for kind in ("triggers", "accepted", "cooldown", "fired"):
+        metrics.register(f"session_{kind}_total", "counter", f"Shock triggers per session ({kind})",
+                         lambda kind=kind: {s.name: getattr(s.stats, kind) for s in sessions}, label="session")
+    metrics.register("session_latency_p99_seconds", "gauge", "Trigger to device latency per session, p99 of the last 2048 shocks",
+                     lambda: {s.name: s.stats.report().get("latency_p99_us", 0) / 1e6 for s in sessions}, label="session")
+    metrics_server = start_metrics_server(settings.METRICS_PORT)
+
+# One pool per session, all drawing from the same seed sequence offset by the session
+def start_sample_pools(seed):
+    for session in sessions:
+        source = sample_source if session is main_session else (lambda session=session: session_sample_source(session))
+        session.pool = SamplePool(source, seed=None if seed is None else seed + session.index).start()
+
+def editor_startup():
+    with StartupProfiler.phase("build_editor"):
+        build_editor()
+    if StartupProfiler.profile_requested():
+        root.after_idle(print_startup_report, time.monotonic() + STARTUP_REPORT_WAIT_S)
+
+# Waits (without blocking Tk) for serial and OSC bring-up, so their phases are in the totals
+def print_startup_report(deadline):
+    running = [name for name, future in startup_tasks.items() if not future.done()]
+    if running and time.monotonic() < deadline:
+        root.after(50, print_startup_report, deadline)
+        return
+    StartupProfiler.print_phase_report(running)
+
 if __name__ == '__main__':
-    load_config_from_file()
+    with StartupProfiler.phase("build_ui (Tk widgets)"):
+        build_ui()
+    with StartupProfiler.phase("load_config_from_file"):
+        load_config_from_file()
     update_preset_buttons_appearance()
-    render_curve()
-    root.after(0, lambda: (fig.tight_layout(pad=1.2), canvas.draw_idle()))
     
     # Make an initial undo snapshot of the startup state
     save_undo_snapshot()
     
-    start_services()
+    with StartupProfiler.phase("start_services"):
+        if settings.ENGINE_PROCESS:
+            engine = EngineProcess.EngineClient(service_status).start(editor_state())
+        else:
+            start_services()
+
+    # Heavy editor and cleanup only after the first frame is drawn
+    root.after_idle(editor_startup)
+    refresh_service_status()
+    root.after(500, lambda: threading.Thread(target=run_janitor, daemon=True).start())
+    if StartupProfiler.import_report_requested():
+        root.after(1000, StartupProfiler.print_import_report)
 
     try:
         root.mainloop()
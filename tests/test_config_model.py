@@ -0,0 +1,13 @@
+from ConfigModel import ShockerConfig, parse_config
+
+
+def test_int_fields_reject_fractions():
+    cfg = parse_config({"PRESET_COUNT": 2.5, "METRICS_PORT": 9469.0})
+    assert cfg.PRESET_COUNT == ShockerConfig().PRESET_COUNT
+    assert cfg.METRICS_PORT == 9469
+
+
+def test_invalid_value_keeps_previous():
+    previous = parse_config({"BASE_COOLDOWN_S": 3})
+    cfg = parse_config({"BASE_COOLDOWN_S": "soon"}, previous)
+    assert cfg.BASE_COOLDOWN_S == 3
@@ -0,0 +1,14 @@
+import numpy as np
+
+from CurveModel import compile_curve, INTENSITIES
+from SamplePool import SamplePool
+
+
+# The upper half has no area, the second parameter must still stay on the curve
+def test_upper_draws_stay_within_the_curve():
+    compiled = compile_curve([(30, 1), (35, 0), (60, 0), (70, 0)])
+    support = INTENSITIES[compiled.weights > 0]
+    pool = SamplePool(lambda: (INTENSITIES, compiled.cdf, compiled.upper_cdf, 1.0, 1.0), seed=0)
+    drawn = np.array([pool.draw(upper=True)[0] for _ in range(20_000)])
+    assert support.min() <= drawn.min() and drawn.max() <= support.max()
+    assert np.isin(drawn, support).all()
@@ -0,0 +1,23 @@
+import sys
+import os
+import pytest
+
+from EditorBench import EDITORS, run, median_run
+
+needs_display = pytest.mark.skipif(sys.platform.startswith("linux") and not os.environ.get("DISPLAY"),
+                                   reason="the editors need a display")
+
+
+def test_median_run_takes_the_median_of_every_number():
+    runs = [{"editor": "canvas", "startup_ms": ms, "editor_mb": None} for ms in (30.0, 10.0, 20.0)]
+    assert median_run(runs) == {"editor": "canvas", "startup_ms": 20.0, "editor_mb": None}
+
+
+# Both editors come up in a fresh process and draw every drag frame
+@needs_display
+def test_both_editors_build_and_draw():
+    report = run(runs=1, frames=5)
+    assert set(report["editors"]) == set(EDITORS)
+    for result in report["editors"].values():
+        assert result["startup_ms"] > 0
+        assert result["frame_p50_ms"] > 0
@@ -0,0 +1,83 @@
+from pathlib import Path
+import subprocess
+import threading
+import socket
+import time
+import sys
+import os
+import pytest
+
+from EngineProcess import EngineClient, KEY_ENV
+from EngineBench import OVERRIDES, STATE, trigger_datagram
+from ConfigModel import load_config
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def shock_address():
+    address = load_config(str(ROOT / "config.yml")).shock_address
+    if not address:
+        pytest.skip("SHOCK_PARAMETER isn't set in config.yml")
+    return address
+
+
+def test_engine_without_a_key_says_so():
+    env = {k: v for k, v in os.environ.items() if k != KEY_ENV}
+    result = subprocess.run([sys.executable, "EngineProcess.py", "--engine", "unused"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 1
+    assert KEY_ENV in result.stderr
+    assert "KeyError" not in result.stderr
+
+
+def test_test_button_fires_in_the_engine(shock_address):
+    fired = threading.Event()
+    engine = EngineClient()
+    engine.listeners.append(lambda *shock: fired.set())
+    engine.start(STATE, overrides=OVERRIDES, bench=True)
+    try:
+        assert engine.ready.wait(60), "engine process didn't come up"
+        engine.send_trigger(shock_address)
+        assert fired.wait(10)
+    finally:
+        engine.stop()
+
+
+# Every OSC trigger fires in the engine process, even with this process's GUI thread holding the GIL,
+# and every shock stays inside the curve and the duration range
+@pytest.mark.parametrize("busy", [False, True], ids=["idle", "busy_gui"])
+def test_every_osc_trigger_fires_in_the_engine(shock_address, busy):
+    count = 20
+    fired = []
+    stop = threading.Event()
+    def spin():
+        while not stop.is_set():
+            sum(range(1000))
+
+    engine = EngineClient()
+    engine.listeners.append(lambda *shock: fired.append(shock))
+    engine.start(STATE, overrides=OVERRIDES, bench=True)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        assert engine.ready.wait(60), "engine process didn't come up"
+        if busy:
+            threading.Thread(target=spin, daemon=True).start()
+        datagram = trigger_datagram(shock_address)
+        for _ in range(count):
+            sock.sendto(datagram, ("127.0.0.1", engine.osc_port))
+            time.sleep(0.01)
+        deadline = time.monotonic() + 10
+        while len(fired) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        sock.close()
+        engine.stop()
+
+    assert len(fired) == count
+    xs = [x for x, _ in STATE["curve_points"]]
+    for session, intensity, duration_s, received_ns, fired_ns in fired:
+        assert min(xs) <= intensity <= max(xs)
+        assert STATE["min_duration"] <= duration_s <= STATE["max_duration"]
+        assert received_ns <= fired_ns
@@ -0,0 +1,42 @@
+import logging
+
+from LogPipeline import RateLimitFilter, RATE_LIMITED
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+def make_logger(name):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = Collect()
+    handler.addFilter(RateLimitFilter(interval_s=60))
+    logger.handlers[:] = [handler]
+    return logger, handler
+
+
+def test_only_opted_in_lines_are_limited():
+    logger, handler = make_logger("test.ratelimit.optin")
+    for _ in range(5):
+        logger.info("Shock sent: %d%%", 40)
+        logger.info("Selected shocker: %s", "a", extra=RATE_LIMITED)
+    assert handler.lines.count("Shock sent: 40%") == 5
+    assert handler.lines.count("Selected shocker: a") == 1
+
+
+def test_skipped_count_is_its_own_line(monkeypatch):
+    logger, handler = make_logger("test.ratelimit.count")
+    clock = iter([0.0, 1.0, 2.0, 100.0])
+    monkeypatch.setattr("LogPipeline.time.monotonic", lambda: next(clock))
+    for _ in range(4):
+        logger.info("Selected shocker: %s", "a", extra=RATE_LIMITED)
+    assert len(handler.lines) == 3
+    assert "2 similar lines skipped" in handler.lines[1]
+    assert handler.lines[2] == "Selected shocker: a"
@@ -0,0 +1,37 @@
+import threading
+
+from Metrics import Metrics
+
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_counters_keep_every_increment_from_many_threads():
+    metrics = Metrics()
+    def hammer():
+        for _ in range(20000):
+            metrics.inc("osc_triggers_received")
+            metrics.shock_fired(3)
+
+    run_threads(hammer, 8)
+    total = metrics.totals()
+    assert total["osc_triggers_received"] == 8 * 20000
+    assert total["shocks_fired"][3] == 8 * 20000
+    text = metrics.render()
+    assert "shocker_link_osc_triggers_received_total 160000" in text
+    assert 'shocker_link_shocks_fired_total{shocker="3"} 160000' in text
+
+
+# Short-lived threads (chatbox timers) are folded into one total instead of keeping a shard each
+def test_exited_threads_are_folded():
+    metrics = Metrics()
+    run_threads(lambda: metrics.inc("chatbox_sent"), 50)
+    metrics.inc("chatbox_sent")
+    assert metrics.totals()["chatbox_sent"] == 51
+    assert len(metrics.shards) == 1
+    assert metrics.totals()["chatbox_sent"] == 51
@@ -0,0 +1,18 @@
+from VRC_OSCQuery import OSCSender
+
+
+def test_equal_values_of_different_types_encode_apart():
+    sender = OSCSender("127.0.0.1", 9)
+    assert sender.encode("/x", True).endswith(b",T\0\0")
+    assert sender.encode("/x", 1).endswith(b",i\0\0" + b"\0\0\0\1")
+    assert sender.encode("/x", 1.0).endswith(b",f\0\0" + b"\x3f\x80\0\0")
+    assert sender.encode("/x", False).endswith(b",F\0\0")
+    assert sender.encode("/x", 0).endswith(b",i\0\0" + b"\0\0\0\0")
+    assert sender.stats["cache_hits"] == 0
+
+
+def test_repeated_message_is_cached():
+    sender = OSCSender("127.0.0.1", 9)
+    first = sender.encode("/chatbox/input", ("hi", True, False))
+    assert sender.encode("/chatbox/input", ("hi", True, False)) is first
+    assert sender.stats["cache_hits"] == 1
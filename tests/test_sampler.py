@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from SamplerBench import SHAPES, P_VALUE_THRESHOLD, reference_weights, draw_counts, chi_square, ks_test
+from CurveModel import compile_curve, INTENSITIES
+
+DRAWS = 50_000
+CASES = [(name, points, upper) for name, points in SHAPES for upper in (False, True)]
+IDS = [f"{name}-{'upper_half' if upper else 'full_curve'}" for name, _, upper in CASES]
+
+
+@pytest.mark.parametrize("name, points, upper", CASES, ids=IDS)
+def test_weight_table_matches_the_drawn_curve(name, points, upper):
+    compiled = compile_curve(points)
+    reference = reference_weights(points, upper=upper)
+    table = np.diff(compiled.upper_cdf if upper else compiled.cdf, prepend=0.0)
+    np.testing.assert_allclose(table, reference / reference.sum(), atol=1e-4)
+
+
+# Never an intensity the curve gives no weight to, for either parameter
+@pytest.mark.parametrize("name, points, upper", CASES, ids=IDS)
+def test_draws_stay_on_the_curve(name, points, upper):
+    counts = draw_counts(compile_curve(points), DRAWS, upper=upper, seed=0)
+    allowed = reference_weights(points, upper=upper) > 0
+    assert counts.sum() == DRAWS
+    assert not counts[~allowed].any(), f"drew {INTENSITIES[(counts > 0) & ~allowed].tolist()}"
+
+
+@pytest.mark.parametrize("name, points, upper", CASES, ids=IDS)
+def test_draws_follow_the_curve(name, points, upper):
+    counts = draw_counts(compile_curve(points), DRAWS, upper=upper, seed=0)
+    target = reference_weights(points, upper=upper)
+    target = target / target.sum()
+    _, _, chi_p = chi_square(counts, target)
+    _, ks_p = ks_test(counts, target)
+    assert chi_p > P_VALUE_THRESHOLD
+    assert ks_p > P_VALUE_THRESHOLD
+
+
+# The statistics have to be able to fail: draws from one curve tested against another
+def test_draws_from_another_curve_are_rejected():
+    (_, default), (_, flat) = SHAPES[0], SHAPES[2]
+    counts = draw_counts(compile_curve(default), DRAWS, seed=0)
+    target = reference_weights(flat)
+    _, _, p_value = chi_square(counts, target / target.sum())
+    assert p_value < P_VALUE_THRESHOLD
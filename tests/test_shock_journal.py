@@ -0,0 +1,74 @@
+import pytest
+import time
+import os
+import ShockJournal
+from ShockJournal import ShockJournal as Journal, FIRED, COOLDOWN, summarize, journal_files
+
+HOUR_S = 3600
+
+
+def write_run(directory, monkeypatch, wall_s, mono_ns, events):
+    monkeypatch.setattr(ShockJournal.time, "time", lambda: wall_s)
+    monkeypatch.setattr(ShockJournal.time, "time_ns", lambda: int(wall_s * 1e9))
+    monkeypatch.setattr(ShockJournal.time, "monotonic_ns", lambda: mono_ns)
+    journal = Journal(directory, flush_interval=60).start()
+    for offset_s, outcome in events:
+        journal.record(mono_ns + int(offset_s * 1e9), 0, 40, 0, outcome, 1.0, 10, 20, 30)
+    journal.close()
+    monkeypatch.undo()
+
+
+def test_restart_uses_the_new_clock_anchor(tmp_path, monkeypatch):
+    start = (int(time.time()) // HOUR_S - 48) * HOUR_S + 600
+    write_run(tmp_path, monkeypatch, start, 9 * 10**12, [(0, FIRED), (60, COOLDOWN)])
+    # Rebooted five hours later, the monotonic clock starts over lower than before
+    write_run(tmp_path, monkeypatch, start + 5 * HOUR_S, 10**9, [(0, FIRED), (1, FIRED)])
+
+    summary = summarize(journal_files(tmp_path))
+    assert summary["events"] == 4
+    assert summary["outcomes"]["fired"] == 3 and summary["outcomes"]["cooldown"] == 1
+    first = time.strftime("%Y-%m-%d %H:00", time.localtime(start))
+    later = time.strftime("%Y-%m-%d %H:00", time.localtime(start + 5 * HOUR_S))
+    assert summary["per_hour"] == {
+        first: {"fired": 1, "cooldown": 1, "dropped": 0, "error": 0, "merged": 0},
+        later: {"fired": 2, "cooldown": 0, "dropped": 0, "error": 0, "merged": 0},
+    }
+
+
+def test_rotated_files_keep_their_own_anchor(tmp_path, monkeypatch):
+    start = (int(time.time()) // HOUR_S - 48) * HOUR_S + 600
+    monkeypatch.setattr(ShockJournal.time, "time", lambda: start)
+    monkeypatch.setattr(ShockJournal.time, "monotonic_ns", lambda: 10**9)
+    journal = Journal(tmp_path, max_bytes=ShockJournal.HEADER.size + 4 * ShockJournal.RECORD.size, flush_interval=60).start()
+    for i in range(10):
+        journal.record(10**9 + i * 10**9, 0, 40, 0, FIRED)
+    journal.close()
+    monkeypatch.undo()
+
+    files = journal_files(tmp_path)
+    assert len(files) == 3
+    summary = summarize(files)
+    assert summary["events"] == 10
+    assert list(summary["per_hour"]) == [time.strftime("%Y-%m-%d %H:00", time.localtime(start))]
+
+
+# +5:30: UTC 10:20 and 10:40 are 15:50 and 16:10 local, two different local hours
+@pytest.mark.skipif(not hasattr(time, "tzset"), reason="needs time.tzset")
+def test_half_hour_offset_buckets_by_local_hour(tmp_path, monkeypatch):
+    # Set directly, write_run undoes the monkeypatches
+    old_tz = os.environ.get("TZ")
+    os.environ["TZ"] = "Asia/Kolkata"
+    time.tzset()
+    try:
+        start = (int(time.time()) // HOUR_S - 48) * HOUR_S + 20 * 60
+        write_run(tmp_path, monkeypatch, start, 10**9, [(0, FIRED), (20 * 60, FIRED)])
+        summary = summarize(journal_files(tmp_path))
+        labels = [time.strftime("%Y-%m-%d %H:00", time.localtime(start + s)) for s in (0, 20 * 60)]
+        assert labels[0] != labels[1]
+        assert {label: bucket["fired"] for label, bucket in summary["per_hour"].items()} == {labels[0]: 1, labels[1]: 1}
+    finally:
+        if old_tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = old_tz
+        time.tzset()
@@ -0,0 +1,27 @@
+from ShockScheduler import ShockScheduler
+
+MS = 10**6
+
+
+def shock(received_ms, session, param_id=0):
+    return (50, 1.0, param_id, received_ms * MS, received_ms * MS, session)
+
+
+def test_merge_stays_within_the_head_session():
+    queue = ShockScheduler()
+    head = shock(0, session=0)
+    for s in (shock(10, 0), shock(20, 1), shock(30, 0)):
+        queue.put(s)
+
+    taken = queue.take_mergeable(head, window_s=0.1)
+    assert [s[3] // MS for s in taken] == [10, 30]
+    assert queue.qsize() == 1
+    assert queue.get(timeout=0)[5] == 1
+    assert queue.stats()["merged_triggers"] == 2
+
+
+def test_nothing_outside_the_window_is_taken():
+    queue = ShockScheduler()
+    queue.put(shock(500, 0))
+    assert queue.take_mergeable(shock(0, 0), window_s=0.1) == []
+    assert queue.qsize() == 1
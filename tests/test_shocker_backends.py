@@ -0,0 +1,150 @@
+import pytest
+
+from ShockerBackends import ShockerBackend, MockBackend
+from BackendBench import StandInHub, connected_backend, wait_until
+
+
+def test_backend_must_implement_connect_connected_and_send():
+    class Partial(ShockerBackend):
+        def connect(self):
+            return True
+
+    with pytest.raises(TypeError, match="connected, send"):
+        Partial()
+    assert MockBackend().start().connect()
+
+
+def test_only_unopened_connections_count_as_never_sent():
+    from requests import ConnectionError, ConnectTimeout, ReadTimeout
+    from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+    from ShockerBackends import never_sent
+
+    refused = MaxRetryError(None, "/", NewConnectionError(None, "refused"))
+    dropped = MaxRetryError(None, "/", ProtocolError("Connection aborted"))
+    assert never_sent(ConnectionError(refused))
+    assert never_sent(ConnectTimeout())
+    assert not never_sent(ReadTimeout())
+    assert not never_sent(ConnectionError(dropped))
+    assert not never_sent(ConnectionError("Connection aborted"))
+
+
+# ~~~      AGAINST THE STAND-IN HUB      ~~~
+@pytest.fixture
+def hub(request):
+    hub = StandInHub(**getattr(request, "param", {}))
+    yield hub
+    hub.stop()
+
+
+# One post per send(), they overlap on a few reused connections
+@pytest.mark.parametrize("hub", [{"latency_s": 0.01}], indirect=True)
+def test_posts_overlap_on_pooled_connections(hub):
+    backend = connected_backend(hub, max_in_flight=4)
+    try:
+        for _ in range(100):
+            backend.send(0, 20, 0.5)
+        assert wait_until(lambda: len(hub.commands) == 100, 10)
+    finally:
+        backend.close()
+    assert 1 < hub.max_in_flight <= 4
+    assert hub.connections <= 4 + 1         # The senders' pool and the probe
+    assert hub.posts == 100
+
+
+def test_batch_is_one_post_with_every_command(hub):
+    backend = connected_backend(hub)
+    try:
+        backend.send_batch([(0, 30, 1.0)] * 8)
+        assert wait_until(lambda: len(hub.commands) == 8, 5)
+    finally:
+        backend.close()
+    assert hub.posts == 1
+    assert hub.commands[0] == {"model": "caixianlin", "id": 41838, "type": "shock", "intensity": 30, "durationMs": 1000}
+
+
+# 500s and dropped answers are counted once and never posted again, the hub may have fired already
+@pytest.mark.parametrize("hub", [{"latency_s": 0.002, "error_rate": 0.1, "drop_rate": 0.1, "seed": 0}], indirect=True)
+def test_failed_posts_are_never_resent(hub):
+    backend = connected_backend(hub)
+    try:
+        for _ in range(100):
+            backend.send(0, 20, 0.5)
+        assert wait_until(lambda: backend.sent + backend.errors + backend.dropped >= 100, 10)
+    finally:
+        backend.close()
+    assert hub.posts == 100
+    assert backend.sent == len(hub.commands)
+    assert backend.errors > 0
+
+
+def test_dropped_answer_is_not_posted_again():
+    hub = StandInHub(drop_rate=1.0)
+    backend = connected_backend(hub)
+    try:
+        backend.send(0, 20, 0.5)
+        assert wait_until(lambda: backend.errors == 1, 5)
+        assert hub.posts == 1
+        assert backend.sent == 0
+    finally:
+        backend.close()
+        hub.stop()
+
+
+def test_lost_hub_is_reconnected_in_the_background(hub):
+    import threading
+    import time
+
+    reconnected = threading.Event()
+    backend = connected_backend(hub, on_connected=reconnected.set)
+    backend.MAX_AGE_S = 0.5
+    try:
+        hub.stop()
+        backend.send(0, 20, 0.5)
+        assert wait_until(lambda: not backend.connected(), 5)
+
+        # The worker's reconnect call must not wait on the network
+        start = time.perf_counter()
+        assert not backend.connect()
+        assert time.perf_counter() - start < 0.05
+
+        # Commands older than MAX_AGE_S are dropped, not fired late
+        backend.send(0, 20, 0.5)
+        assert wait_until(lambda: backend.dropped >= 1, 3)
+
+        hub.restart()
+        assert reconnected.wait(10)
+        before = len(hub.commands)
+        for _ in range(10):
+            backend.send(0, 20, 0.5)
+        assert wait_until(lambda: len(hub.commands) == before + 10, 5)
+        assert backend.reconnects == 1
+    finally:
+        backend.close()
+
+
+# Something answers on the URL, but not the bridge handshake: connect() must fail, not look connected
+def test_connect_fails_when_the_url_is_not_a_bridge():
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import threading
+    from ShockerBackends import OpenShockLanBackend
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b"<html>router login</html>"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *a): pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    backend = OpenShockLanBackend(f"http://127.0.0.1:{httpd.server_address[1]}/", [41838]).start()
+    try:
+        assert not backend.connect()
+        assert not backend.connected()
+        assert "not an rftransmit bridge" in backend.last_error
+    finally:
+        backend.close()
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,13 @@
+import logging
+
+import StartupProfiler
+
+
+def test_report_names_phases_that_are_still_running(caplog, monkeypatch):
+    monkeypatch.setattr(StartupProfiler, "phases", [])
+    with StartupProfiler.phase("build_ui"):
+        pass
+    with caplog.at_level(logging.INFO):
+        StartupProfiler.print_phase_report(["bring_up_serial"])
+    assert "build_ui" in caplog.text
+    assert "Still running, not in the totals above: bring_up_serial" in caplog.text
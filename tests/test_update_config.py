@@ -0,0 +1,43 @@
+from ConfigModel import parse_config
+from UpdateConfig import CANONICAL, merge_config
+import yaml
+
+BLANK = 'SERIAL_PORT: "" # Leave blank to auto-detect'
+OLD = "serial_port: COM3"
+
+
+def merged_port(lines):
+    merged, changes = merge_config(lines)
+    ports = [line for line in merged if line.startswith("SERIAL_PORT:")]
+    assert len(ports) == 1, ports
+    assert not any(line.startswith("serial_port") for line in merged)
+    return yaml.safe_load("\n".join(merged))["SERIAL_PORT"], changes
+
+
+def test_old_spelling_fills_blank_key_in_either_order():
+    assert merged_port([BLANK, OLD])[0] == "COM3"
+    assert merged_port([OLD, BLANK])[0] == "COM3"
+
+
+def test_new_spelling_wins_when_both_are_set():
+    assert merged_port(['SERIAL_PORT: "COM5"', OLD])[0] == "COM5"
+    assert merged_port([OLD, 'SERIAL_PORT: "COM5"'])[0] == "COM5"
+
+
+def test_old_spelling_alone_is_renamed():
+    port, changes = merged_port([OLD])
+    assert port == "COM3" and "Renamed serial_port to SERIAL_PORT" in changes
+
+
+def test_nested_keys_are_not_top_level():
+    lines = [line for _, _, line in CANONICAL if not line.startswith(("SESSIONS", "SHOCK_PARAMETER"))]
+    lines += ["SESSIONS:", "  - name: Alt", "    SHOCK_PARAMETER: Shock", "    serial_port: 9002"]
+    merged, changes = merge_config(lines)
+    assert changes == ["Added SHOCK_PARAMETER"]
+    assert "    serial_port: 9002" in merged
+
+
+def test_parse_config_prefers_the_set_spelling():
+    assert parse_config({"SERIAL_PORT": "", "serial_port": "COM3"}).SERIAL_PORT == "COM3"
+    assert parse_config({"serial_port": "COM3", "SERIAL_PORT": ""}).SERIAL_PORT == "COM3"
+    assert parse_config({"serial_port": "COM3", "SERIAL_PORT": "COM5"}).SERIAL_PORT == "COM5"
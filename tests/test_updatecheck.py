@@ -0,0 +1,202 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import subprocess
+import threading
+import shutil
+import json
+import os
+import zipfile
+import time
+import sys
+import io
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+COMMITS = "/repos/poprox24/VRChat-Shocker-Link/commits/master"
+ZIPBALL = "/repos/poprox24/VRChat-Shocker-Link/zipball/master"
+
+
+# Local stand-in for the GitHub API, answers the commit check (with ETag / 304), serves `zipball` and counts requests
+class StandInApi:
+    def __init__(self, sha="abc123", etag='"v1"'):
+        self.sha = sha
+        self.etag = etag
+        self.zipball = b""
+        self.requests = []
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                api.requests.append((self.path, self.headers.get("If-None-Match")))
+                if self.path == ZIPBALL:
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(api.zipball)))
+                    self.end_headers()
+                    self.wfile.write(api.zipball)
+                    return
+                if self.path != COMMITS:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if self.headers.get("If-None-Match") == api.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = json.dumps({"sha": api.sha, "commit": {"author": {"name": "dev"}, "message": "Fix"}}).encode()
+                self.send_response(200)
+                self.send_header("ETag", api.etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a): pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def api():
+    server = StandInApi()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def install(tmp_path):
+    for name in ("Updatecheck.py", "UpdateConfig.py"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    (tmp_path / "config.yml").write_text('SHOCK_PARAMETER: "Shock"\n')
+    return tmp_path
+
+
+def run_check(install, api, *args, ttl_s=3600):
+    env = dict(os.environ, SHOCKER_LINK_UPDATE_API=api.url, SHOCKER_LINK_UPDATE_TTL_S=str(ttl_s))
+    return subprocess.run([sys.executable, "Updatecheck.py", *args], cwd=install, env=env, capture_output=True, text=True, timeout=60)
+
+
+def write_version(install, sha, etag, checked_at):
+    (install / "version.json").write_text(json.dumps({"hash": sha, "author": "dev", "message": "Fix", "etag": etag, "checked_at": checked_at}))
+
+
+def read_version(install):
+    return json.loads((install / "version.json").read_text())
+
+
+# ~~~      CHECK (TTL, ETag)      ~~~
+def test_recent_check_skips_the_network(install, api):
+    write_version(install, "abc123", '"v1"', time.time())
+    result = run_check(install, api)
+    assert result.returncode == 0
+    assert api.requests == []
+
+
+def test_force_checks_even_when_recent(install, api):
+    write_version(install, "abc123", '"v1"', time.time())
+    result = run_check(install, api, "--force")
+    assert result.returncode == 0
+    assert api.requests == [(COMMITS, '"v1"')]
+
+
+def test_not_modified_refreshes_the_check_time(install, api):
+    write_version(install, "abc123", '"v1"', 0)
+    result = run_check(install, api)
+    assert result.returncode == 0, result.stdout
+    assert api.requests == [(COMMITS, '"v1"')]
+    assert "not modified" in result.stdout
+    assert time.time() - read_version(install)["checked_at"] < 60
+
+
+def test_same_commit_stores_the_new_etag(install, api):
+    write_version(install, "abc123", '"old"', 0)
+    result = run_check(install, api)
+    assert result.returncode == 0, result.stdout
+    assert read_version(install)["etag"] == '"v1"'
+    assert [path for path, _ in api.requests] == [COMMITS]
+
+
+# ~~~      UPDATE (zipball)      ~~~
+# Zipball layout, every member under "<owner>-<repo>-<sha>/"
+def make_zipball(files: dict, sha="abc123") -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr(f"poprox24-VRChat-Shocker-Link-{sha}/", "")
+        for rel, content in files.items():
+            zf.writestr(f"poprox24-VRChat-Shocker-Link-{sha}/{rel}", content)
+    return buffer.getvalue()
+
+
+def test_update_only_replaces_changed_files(install, api):
+    (install / "Changed.py").write_text("old")
+    (install / "Same.py").write_text("same")
+    same_mtime = (install / "Same.py").stat().st_mtime_ns
+    api.zipball = make_zipball({"Changed.py": "new", "Same.py": "same", "sub/Added.py": "added", "config.yml": "SHOCK_PARAMETER: Overwritten\n"})
+    write_version(install, "old000", '"old"', 0)
+
+    result = run_check(install, api)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert (install / "Changed.py").read_text() == "new"
+    assert (install / "sub" / "Added.py").read_text() == "added"
+    assert (install / "Same.py").stat().st_mtime_ns == same_mtime
+    assert "Overwritten" not in (install / "config.yml").read_text()
+    assert "2 file(s) changed" in result.stdout
+
+    manifest = json.loads((install / "update_manifest.json").read_text())
+    assert set(manifest) == {"Changed.py", "Same.py", "sub/Added.py"}
+    assert read_version(install)["hash"] == "abc123"
+    assert not (install / "update" / "update.zip").exists()
+
+
+def test_broken_archive_keeps_the_current_version(install, api):
+    (install / "Changed.py").write_text("old")
+    api.zipball = b"not a zip"
+    write_version(install, "old000", '"old"', 0)
+
+    result = run_check(install, api)
+    assert result.returncode == 1
+    assert (install / "Changed.py").read_text() == "old"
+    assert read_version(install)["hash"] == "old000"
+
+
+def test_failed_first_update_is_retried_on_the_next_start(install, api):
+    api.zipball = b"not a zip"
+    assert run_check(install, api).returncode == 1
+    assert read_version(install)["checked_at"] == 0
+
+    api.zipball = make_zipball({"New.py": "new"})
+    result = run_check(install, api)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert [path for path, _ in api.requests] == [COMMITS, ZIPBALL, COMMITS, ZIPBALL]
+    assert (install / "New.py").read_text() == "new"
+    assert read_version(install)["hash"] == "abc123"
+
+
+def test_failed_swap_rolls_back(tmp_path, monkeypatch):
+    import Updatecheck
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "A.py").write_text("old a")
+    (tmp_path / "B.py").write_text("old b")
+    zip_path = tmp_path / "update.zip"
+    zip_path.write_bytes(make_zipball({"A.py": "new a", "B.py": "new b"}))
+
+    real_replace = os.replace
+    def replace(src, dst):
+        if Path(src).name == "B.py" and "staging" in Path(src).parts:
+            raise OSError("file in use")
+        real_replace(src, dst)
+    monkeypatch.setattr(Updatecheck.os, "replace", replace)
+
+    with pytest.raises(OSError):
+        Updatecheck.apply_update(zip_path, tmp_path)
+    assert (tmp_path / "A.py").read_text() == "old a"
+    assert (tmp_path / "B.py").read_text() == "old b"
+    assert not (tmp_path / "update_manifest.json").exists()